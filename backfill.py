@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+番剧补全模块
+为新加入的已完结番剧或停机期间错过的剧集批量提交离线任务：先获取RSS源，按日期或集数范围
+一次性规划出全部条目并保存，再以有限的并发和速率逐个提交，每完成一个条目即记录检查点。
+中断后以相同的参数再次运行，会跳过已完成的条目，从中断处继续（失败的条目会重新提交）。
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import namedtuple
+from datetime import date, datetime, timezone
+
+import core
+import episode
+import filters
+import history
+import outbox
+import ratelimit
+
+MIKAN_BANGUMI_RSS = "https://mikanani.me/RSS/Bangumi?bangumiId={}"
+DEFAULT_PARALLEL = 2       # 同时提交的条目数
+DEFAULT_PER_MINUTE = 30    # 每分钟最多提交的条目数
+
+PENDING = "pending"        # 等待提交
+DONE = "done"              # 已提交（PikPak中已存在也算）
+FAILED = "failed"          # 提交失败，再次运行时重试
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backfill_jobs (
+    job TEXT PRIMARY KEY,
+    feed TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS backfill_items (
+    job TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    torrent TEXT NOT NULL,
+    title TEXT,
+    link TEXT,
+    pub TEXT,
+    bangumi_title TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job, torrent)
+);
+"""
+
+outbox.register_schema(SCHEMA)
+
+# 补全范围：发布日期（含首尾，北京时间）和集数（含首尾），未指定的一端为None
+Scope = namedtuple("Scope", ["since", "until", "first", "last"])
+
+
+def feed_url(target):
+    """将RSS链接或蜜柑的 bangumiId 转换为RSS链接"""
+    target = target.strip()
+    return MIKAN_BANGUMI_RSS.format(target) if target.isdigit() else target
+
+
+def parse_scope(since=None, until=None, episodes=None):
+    """解析命令行给出的补全范围
+
+    Args:
+        since: 起始日期 YYYY-MM-DD
+        until: 结束日期 YYYY-MM-DD
+        episodes: 集数范围，如 "1-12"、"13-"、"-6" 或单集 "5"
+
+    Raises:
+        ValueError: 日期或集数格式错误
+    """
+    first = last = None
+    if episodes:
+        low, sep, high = episodes.partition("-")
+        first = float(low) if low.strip() else None
+        last = (float(high) if high.strip() else None) if sep else first
+        if first is not None and last is not None and first > last:
+            raise ValueError(f"集数范围无效: {episodes}")
+    since = date.fromisoformat(since) if since else None
+    until = date.fromisoformat(until) if until else None
+    if since and until and since > until:
+        raise ValueError(f"日期范围无效: {since} ~ {until}")
+    return Scope(since, until, first, last)
+
+
+def describe_scope(scope):
+    parts = []
+    if scope.since or scope.until:
+        parts.append(f"日期 {scope.since or '…'} ~ {scope.until or '…'}")
+    if scope.first is not None or scope.last is not None:
+        def number(value):
+            return "…" if value is None else f"{value:g}"
+        parts.append(f"第 {number(scope.first)} ~ {number(scope.last)} 集")
+    return "，".join(parts) or "全部"
+
+
+def job_key(feed, scope):
+    """同一RSS源和范围对应同一个补全任务，再次运行时据此找到检查点"""
+    return hashlib.sha1(f"{feed}|{describe_scope(scope)}".encode("utf-8")).hexdigest()[:12]
+
+
+def in_scope(entry, scope):
+    """RSS条目是否在补全范围内；指定了范围但无法确定发布日期或集数的条目不在范围内"""
+    if scope.since or scope.until:
+        published = entry[core.RSS_KEY_PUBLISHED_AT]
+        if published is None:
+            return False
+        day = published.astimezone(filters.MIKAN_TZ).date()
+        if (scope.since and day < scope.since) or (scope.until and day > scope.until):
+            return False
+    if scope.first is not None or scope.last is not None:
+        number = episode.parse(entry[core.RSS_KEY_TITLE]).episode
+        if number is None:
+            return False
+        if (scope.first is not None and number < scope.first) or (scope.last is not None and number > scope.last):
+            return False
+    return True
+
+
+async def plan(feed, scope):
+    """获取RSS源并规划需要补全的条目
+
+    已处理过或已在发件箱中的种子、未通过过滤规则的条目跳过；同一集的多个版本只保留最好的一个（同 episode.select）。
+    规划时不写入历史记录和剧集记录，条目提交成功后才记录。
+
+    Returns:
+        list: 发件箱记录格式的条目，按发布时间从旧到新排列
+
+    Raises:
+        RuntimeError: RSS源获取或解析失败
+    """
+    import feedparser
+    import httpx
+
+    await ratelimit.acquire(feed)
+    try:
+        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
+            response = await client.get(feed)
+            response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise RuntimeError(f"获取RSS源失败: HTTP {e.response.status_code}")
+    except httpx.HTTPError as e:
+        raise RuntimeError(f"获取RSS源失败: {str(e) or type(e).__name__}")
+    rss = feedparser.parse(response.text)
+    if not rss.get("entries"):
+        raise RuntimeError("RSS源解析失败或不包含条目")
+
+    entry_filter = filters.matcher(feed, core.RSS_TAGS.get(feed))
+    entries = []
+    processed = filtered = 0
+    for entry in rss["entries"]:
+        if core.RSS_KEY_TITLE not in entry or core.RSS_KEY_LINK not in entry or not entry.get(core.RSS_KEY_TORRENT):
+            continue
+        torrent = entry[core.RSS_KEY_TORRENT][0].get("url")
+        if not torrent:
+            continue
+        if history.contains(torrent) or outbox.contains(torrent):
+            processed += 1
+            continue
+        entry[core.RSS_KEY_PUBLISHED_AT] = filters.entry_published(entry, core.RSS_KEY_PUB)
+        entry.setdefault(core.RSS_KEY_PUB, "")
+        if not in_scope(entry, scope):
+            continue
+        # 补全的就是较早的剧集，不检查时间窗口，只按包含、排除和大小规则过滤
+        accepted, reason = entry_filter.accepts(entry[core.RSS_KEY_TITLE], filters.entry_size(entry))
+        if not accepted:
+            logging.debug(f"过滤条目: {entry[core.RSS_KEY_TITLE]} ({reason})")
+            filtered += 1
+            continue
+        entries.append(entry)
+    logging.info(f"RSS源中共有 {len(rss['entries'])} 个条目，{len(entries)} 个在补全范围内，"
+                 f"{processed} 个已处理过" + (f"，{filtered} 个未通过过滤规则" if filtered else ""))
+
+    # 按播出顺序提交，发布时间未知的条目排在最前
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    entries.sort(key=lambda entry: entry[core.RSS_KEY_PUBLISHED_AT] or oldest)
+    resolved = await core.resolve_titles(feed, rss, entries)
+    if len(resolved) < len(entries):
+        logging.warning(f"{len(entries) - len(resolved)} 个条目暂时无法确定番剧标题，未加入本次补全")
+    items, _ = episode.select([core.outbox_item(entry) for entry in resolved], unknown_show="未知番剧", record=False)
+    return items
+
+
+def save_plan(job, feed, scope, items):
+    now = time.time()
+    with outbox.db_lock:
+        conn = outbox.connect()
+        conn.execute("INSERT OR REPLACE INTO backfill_jobs (job, feed, scope, created_at, updated_at) "
+                     "VALUES (?, ?, ?, ?, ?)", (job, feed, describe_scope(scope), now, now))
+        conn.executemany(
+            "INSERT OR IGNORE INTO backfill_items (job, position, torrent, title, link, pub, bangumi_title, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(job, position, item["torrent"], item["title"], item["link"], item["pub"], item["bangumi_title"], now)
+             for position, item in enumerate(items)])
+        conn.commit()
+
+
+def job_exists(job):
+    with outbox.db_lock:
+        return outbox.connect().execute("SELECT 1 FROM backfill_jobs WHERE job = ?", (job,)).fetchone() is not None
+
+
+def remaining(job):
+    """尚未完成的条目（含失败待重试的），按规划顺序排列"""
+    with outbox.db_lock:
+        rows = outbox.connect().execute(
+            "SELECT * FROM backfill_items WHERE job = ? AND status != ? ORDER BY position", (job, DONE)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def counts(job):
+    """各状态的条目数 {status: count}"""
+    with outbox.db_lock:
+        rows = outbox.connect().execute(
+            "SELECT status, COUNT(*) AS n FROM backfill_items WHERE job = ? GROUP BY status", (job,)).fetchall()
+    return {row["status"]: row["n"] for row in rows}
+
+
+def checkpoint(job, torrent, ok, error=None):
+    """记录一个条目的提交结果，提交完成后立即写入，中断后从这里继续"""
+    now = time.time()
+    with outbox.db_lock:
+        conn = outbox.connect()
+        conn.execute(
+            "UPDATE backfill_items SET status = ?, attempts = attempts + 1, last_error = ?, updated_at = ? "
+            "WHERE job = ? AND torrent = ?", (DONE if ok else FAILED, error, now, job, torrent))
+        conn.execute("UPDATE backfill_jobs SET updated_at = ? WHERE job = ?", (now, job))
+        conn.commit()
+
+
+class Progress:
+    """统计补全进度并估计剩余时间"""
+
+    def __init__(self, total, done):
+        self.total = total
+        self.done = done
+        self.failed = 0
+        self.started = time.monotonic()
+        self.finished = 0   # 本次运行中完成（成功或失败）的条目数
+
+    def update(self, item, ok):
+        self.finished += 1
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+        left = self.total - self.done - self.failed
+        eta = (time.monotonic() - self.started) / self.finished * left
+        logging.info(f"[补全 {self.done}/{self.total}] {'已提交' if ok else '提交失败'}: {item['title']}"
+                     f"（失败 {self.failed}，剩余 {left}，预计还需 {format_duration(eta)}）")
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+async def run(target, scope, parallel=DEFAULT_PARALLEL, per_minute=DEFAULT_PER_MINUTE):
+    """规划（或从检查点恢复）并执行补全任务
+
+    Args:
+        target: RSS链接或蜜柑的 bangumiId
+        scope: parse_scope() 返回的补全范围
+        parallel: 同时提交的条目数
+        per_minute: 每分钟最多提交的条目数，0 表示不限制（仍受各主机的限速约束）
+
+    Returns:
+        dict: 各状态的条目数，登录失败时为None
+
+    Raises:
+        RuntimeError: 规划时RSS源获取或解析失败
+    """
+    feed = feed_url(target)
+    job = job_key(feed, scope)
+    if job_exists(job):
+        progress = counts(job)
+        logging.info(f"继续补全任务 {job}（{describe_scope(scope)}）：已完成 {progress.get(DONE, 0)}/"
+                     f"{sum(progress.values())}" + (f"，{progress[FAILED]} 个失败待重试" if progress.get(FAILED) else ""))
+    else:
+        logging.info(f"正在规划补全任务 {job}: {feed}（{describe_scope(scope)}）")
+        items = await plan(feed, scope)
+        if not items:
+            # 不保存空的计划，之后再次运行时重新规划
+            logging.info("补全范围内没有需要提交的条目")
+            return {}
+        save_plan(job, feed, scope, items)
+        logging.info(f"已规划 {len(items)} 个条目，检查点保存在 {outbox.DB_FILE}")
+
+    items = remaining(job)
+    status = counts(job)
+    if not items:
+        logging.info("补全任务中没有待提交的条目")
+        return status
+
+    logged_in = await core.prepare_accounts()
+    if not logged_in:
+        return None
+
+    progress = Progress(sum(status.values()), status.get(DONE, 0))
+    # 令牌桶控制总体提交速率，各主机的请求另受 ratelimit 的限速
+    bucket = ratelimit.TokenBucket(per_minute / 60.0, 1) if per_minute > 0 else None
+
+    async def submit(item):
+        if bucket is not None:
+            wait = bucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        item["feed"] = feed
+        if history.contains(item["torrent"]):
+            # 上次中断后已由常规循环从发件箱中提交
+            ok = True
+        else:
+            # 先写入发件箱，提交结果和失败重试与常规条目一样记录在发件箱中
+            outbox.enqueue([item])
+            ok = await core.submit_item(item, logged_in)
+            if ok:
+                episode.remember(item, unknown_show="未知番剧")
+        checkpoint(job, item["torrent"], ok, None if ok else "下载种子或提交离线任务失败，详见日志")
+        progress.update(item, ok)
+
+    # 第一个条目单独提交，番剧文件夹创建后再并发提交其余条目，避免重复创建文件夹
+    await submit(items[0])
+    queue = asyncio.Queue()
+    for item in items[1:]:
+        queue.put_nowait(item)
+
+    async def worker():
+        while not queue.empty():
+            await submit(queue.get_nowait())
+
+    await asyncio.gather(*(worker() for _ in range(max(1, parallel))))
+    core.save_client(force=True)
+    status = counts(job)
+    logging.info(f"补全任务 {job} 结束：已完成 {status.get(DONE, 0)}/{sum(status.values())}"
+                 + (f"，{status[FAILED]} 个失败，再次运行相同的命令可重试" if status.get(FAILED) else ""))
+    return status
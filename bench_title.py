@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+番剧标题提取基准测试
+对比完整下载+完整解析与流式部分解析两种方式的传输字节数和CPU时间
+
+用法:
+    python bench_title.py                       # 使用生成的模拟页面
+    python bench_title.py page.html -n 200      # 使用保存的蜜柑剧集页面
+    python bench_title.py --url https://mikanani.me/Home/Episode/xxx -n 5
+"""
+
+import argparse
+import asyncio
+import http.server
+import threading
+import time
+
+import httpx
+
+import scrape
+
+
+def sample_page():
+    """生成结构接近蜜柑剧集页面的模拟HTML"""
+    head = "<html><head><title>Mikan Project - 葬送的芙莉莲</title>" + "<link rel='stylesheet'>" * 40 + "</head><body>"
+    nav = "<div class='nav'>" + "<a href='#'>导航</a>" * 300 + "</div>"
+    title = '<p class="bangumi-title">葬送的芙莉莲 <a class="mikan-rss" href="/RSS/Bangumi?bangumiId=3141"><i class="fa fa-rss-square"></i></a></p>'
+    body = "<div class='episode-desc'>" + "<p>字幕组简介与文件列表</p>" * 3000 + "</div>"
+    return (head + nav + title + body + "</body></html>").encode("utf-8")
+
+
+def serve(page):
+    """在本地随机端口启动只返回指定页面的HTTP服务"""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(page)))
+            self.end_headers()
+            try:
+                self.wfile.write(page)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # 流式读取提前关闭连接
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+async def full_path(client, url):
+    """原有方式：下载完整页面并构建完整的解析树"""
+    response = await client.get(url, follow_redirects=True)
+    response.raise_for_status()
+    title, _ = scrape.extract_title(response.text)
+    return title, len(response.content)
+
+
+async def streaming_path(client, url):
+    """流式方式：找到标题元素后停止读取"""
+    async with client.stream("GET", url, follow_redirects=True) as response:
+        response.raise_for_status()
+        result = await scrape.stream_title(response)
+    return result.title, result.bytes_read
+
+
+async def measure(name, func, url, iterations):
+    total_bytes = 0
+    title = None
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        for _ in range(iterations):
+            title, size = await func(client, url)
+            total_bytes += size
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    print(f"{name:<12} 标题={title!s:<16} 字节/页={total_bytes / iterations:>10.0f} "
+          f"CPU毫秒/页={cpu * 1000 / iterations:>8.2f} 耗时毫秒/页={wall * 1000 / iterations:>8.2f}")
+    return total_bytes / iterations, cpu / iterations
+
+
+async def run(args):
+    server = None
+    if args.url:
+        url = args.url
+    else:
+        if args.page:
+            with open(args.page, "rb") as f:
+                page = f.read()
+        else:
+            page = sample_page()
+        server, url = serve(page)
+    try:
+        full_bytes, full_cpu = await measure("完整解析", full_path, url, args.iterations)
+        stream_bytes, stream_cpu = await measure("流式解析", streaming_path, url, args.iterations)
+        print(f"传输字节减少 {100 * (1 - stream_bytes / full_bytes):.1f}%，"
+              f"CPU时间减少 {100 * (1 - stream_cpu / full_cpu):.1f}%")
+    finally:
+        if server:
+            server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="番剧标题提取基准测试")
+    parser.add_argument("page", nargs="?", help="保存的剧集页面HTML文件，缺省时使用模拟页面")
+    parser.add_argument("--url", help="直接请求的页面URL（注意控制次数，避免给蜜柑造成压力）")
+    parser.add_argument("-n", "--iterations", type=int, default=100, help="每种方式的请求次数")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
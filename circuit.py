@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+熔断器模块
+按RSS源和主机记录连续失败次数，失败过多时暂停调用，超时后放行单个探测请求
+"""
+
+import logging
+import threading
+import time
+
+import ratelimit
+
+CLOSED = "closed"        # 正常
+OPEN = "open"            # 熔断中，跳过调用
+HALF_OPEN = "half_open"  # 放行一个探测请求
+
+FAILURE_THRESHOLD = 3    # 连续失败多少次后熔断
+RESET_TIMEOUT = 600      # 熔断后多少秒进入半开状态
+MAX_RESET_TIMEOUT = 6 * 3600  # 探测反复失败时熔断时长的上限
+
+STATE_LABELS = {CLOSED: "正常", OPEN: "熔断", HALF_OPEN: "探测中"}
+
+_breakers = {}
+_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """单个调用目标的熔断器"""
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or FAILURE_THRESHOLD
+        self.base_timeout = reset_timeout or RESET_TIMEOUT
+        self.reset_timeout = self.base_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """是否允许本次调用；半开状态下只放行一个探测请求"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.probing = False
+                logging.info(f"熔断器 {self.name} 进入半开状态，发送探测请求")
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def is_open(self):
+        """是否处于熔断期内（不消耗探测机会）"""
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logging.info(f"熔断器 {self.name} 已恢复")
+            self.state = CLOSED
+            self.failures = 0
+            self.probing = False
+            self.reset_timeout = self.base_timeout
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # 熔断期已过但还没有调用 allow() 进入半开状态时，失败同样视为探测失败
+            expired = self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout
+            if self.state == HALF_OPEN or expired:
+                # 探测失败，延长熔断时间
+                self.reset_timeout = min(self.reset_timeout * 2, MAX_RESET_TIMEOUT)
+                self._open()
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def release_probe(self):
+        """探测请求未得出结果（如被取消）时交还探测机会，下一次调用可以重新探测"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probing = False
+        logging.warning(
+            f"熔断器 {self.name} 已打开（连续失败 {self.failures} 次），{self.reset_timeout} 秒内跳过调用")
+
+    def retry_in(self):
+        """距离下一次探测的秒数，非熔断状态返回0"""
+        if self.state != OPEN:
+            return 0
+        return max(0, int(self.reset_timeout - (time.monotonic() - self.opened_at)))
+
+    def describe(self):
+        """供日志和界面显示的状态描述"""
+        label = STATE_LABELS[self.state]
+        if self.state == OPEN:
+            return f"{label}({self.retry_in()}秒后探测)"
+        if self.failures:
+            return f"{label}(失败{self.failures}次)"
+        return label
+
+
+def configure(options):
+    """应用配置文件中的熔断设置 {"failure_threshold": 3, "reset_timeout": 600}"""
+    global FAILURE_THRESHOLD, RESET_TIMEOUT
+    options = options or {}
+    FAILURE_THRESHOLD = int(options.get("failure_threshold", FAILURE_THRESHOLD))
+    RESET_TIMEOUT = int(options.get("reset_timeout", RESET_TIMEOUT))
+    with _lock:
+        for breaker in _breakers.values():
+            breaker.failure_threshold = FAILURE_THRESHOLD
+            breaker.base_timeout = RESET_TIMEOUT
+
+
+def export_options():
+    return {"failure_threshold": FAILURE_THRESHOLD, "reset_timeout": RESET_TIMEOUT}
+
+
+def get_breaker(name):
+    with _lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def feed_breaker(rss_url):
+    """RSS源对应的熔断器"""
+    return get_breaker(f"feed:{rss_url}")
+
+
+def host_breaker(url_or_host):
+    """主机对应的熔断器"""
+    return get_breaker(f"host:{ratelimit.host_key(url_or_host)}")
+
+
+def snapshot():
+    """返回所有熔断器的状态 {名称: 描述}"""
+    with _lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.describe() for breaker in breakers}
+
+
+def forget(name):
+    """移除不再使用的熔断器（如已删除的RSS源）"""
+    with _lock:
+        _breakers.pop(name, None)
@@ -1,20 +1,41 @@
 import asyncio
 import urllib.request
-import feedparser
 import logging
 import os
 import sys
 import time
-import httpx
+import threading
 import json
 import urllib
 from logging.handlers import RotatingFileHandler
-from pikpakapi import PikPakApi  # requirement: python >= 3.10
-from bs4 import BeautifulSoup
-from pathvalidate import sanitize_filepath
+# feedparser、httpx、pikpakapi、pathvalidate 等第三方库在用到时才导入，缩短启动时间
+
+import ratelimit
+import circuit
+import deadline
+import outbox
+import tracker
+import filters
+import titles
+import scrape
+import trigger
+import lease
+import history
+import state
+import drive
+import episode
+import tracing
+import scheduler
+import singleflight
+import metrics
 
 CONFIG_FILE = "config.json"     # 配置文件（保存基本配置）
 CLIENT_STATE_FILE = "pikpak.json"    # 客户端状态文件（保存 PikPakApi 登录状态及 token 等信息）
+CLIENT_SAVE_DEBOUNCE = 30  # 客户端状态的最短写入间隔（秒），期间的修改合并到下一次写入
+
+# 状态文件只在内容变化时原子写入
+config_state = state.JsonFile(CONFIG_FILE)
+client_state = state.JsonFile(CLIENT_STATE_FILE, debounce=CLIENT_SAVE_DEBOUNCE)
 
 # 全局变量（由配置文件或手动填写）
 USER = [""]
@@ -24,10 +45,31 @@ RSS = []  # RSS链接列表
 RSS_TAGS = {}  # 存储RSS链接对应的标签 {rss_url: tag}
 INTERVAL_TIME_RSS = 600  # rss 检查间隔
 INTERVAL_TIME_REFRESH = 21600  # token 刷新间隔
+RATE_LIMITS = {}  # 按主机的限速配置 {host: {"rate": 每秒请求数, "burst": 突发容量}}
+CIRCUIT_BREAKER = {}  # 熔断配置 {"failure_threshold": 连续失败次数, "reset_timeout": 熔断秒数}
+CYCLE_DEADLINE = 0  # 单次处理周期的截止时间（秒），0 表示使用 rss 检查间隔
+MIN_ITEM_BUDGET = 5  # 剩余预算低于该秒数时不再开始处理新条目
+FETCH_CONCURRENCY = 4  # 流水线中同时获取的RSS源数量
+TITLE_CONCURRENCY = 2  # 流水线中同时解析番剧标题的RSS源数量
+PIPELINE_QUEUE_SIZE = 32  # 流水线各阶段之间队列的容量，队列满时上游等待
+SCRAPE_CONCURRENCY = 6  # 同时抓取的蜜柑页面数量上限（所有RSS源共用）
+FILTERS = {}  # 条目过滤规则 {"global": {...}, "tags": {tag: {...}}, "feeds": {rss_url: {...}}}
+EPISODE_POLICY = {}  # 剧集去重偏好 {"default": {...}, "shows": {番剧标题: {...}}}
+TRIGGER = {}  # 推送触发接口设置 {"enabled": bool, "host": str, "port": int, "token": str, "secret": str}
+TRACING = {}  # 处理链路追踪设置 {"enabled": bool, "file": str}
+SCHEDULING = {}  # 提交顺序设置 {"tags": {tag: {"priority": int, "weight": float}}, "feeds": {rss_url: {...}}}
 PIKPAK_CLIENTS = [""]
 last_refresh_time = 0
 mylist = []  # 存储所有RSS源的解析结果
-processed_torrents = set()  # 用于存储已处理的种子URL，避免重复处理
+HISTORY_DAYS = history.DEFAULT_WINDOW_DAYS  # 已处理种子历史的保留天数，0 表示永久保留
+pending_entries = []  # 上个周期超时未处理完的条目，下个周期优先处理
+config_mtime = None  # 最近一次加载或保存时配置文件的修改时间
+last_cycle_timed_out = False  # 最近一次处理周期是否超出截止时间
+last_first_submission = None  # 最近一次处理周期从开始到首个条目提交成功的秒数，没有提交时为None
+title_requests = singleflight.SingleFlight("番剧标题请求")  # 同一页面的并发请求只抓取一次
+scrape_slots = singleflight.LoopSemaphore(SCRAPE_CONCURRENCY)
+fetch_requests = set()  # 等待立即获取的RSS源（如新增的RSS源）
+_fetch_requests_lock = threading.Lock()
 
 # CSS_Selector
 BANGUMI_TITLE_SELECTOR = 'bangumi-title'
@@ -38,81 +80,276 @@ RSS_KEY_LINK = 'link'
 RSS_KEY_TORRENT = 'enclosures'
 RSS_KEY_PUB = 'published'
 RSS_KEY_BGM_TITLE = 'bangumi_title'
+RSS_KEY_FEED = 'feed'
+RSS_KEY_PUBLISHED_AT = 'published_at'  # 解析后的发布时间（带时区的datetime）
 
 # Regex
 CHAR_RULE = "\"M\"\\a/ry/ h**ad:>> a\\/:*?\"| li*tt|le|| la\"mb.?"
 
 # 加载基本配置文件，并更新全局变量
+def read_config():
+    """读取并校验配置文件
+
+    Returns:
+        dict: 配置内容，文件不存在或格式错误时返回None
+    """
+    if not os.path.exists(CONFIG_FILE):
+        logging.error("配置文件不存在，请创建config.json文件")
+        return None
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except json.JSONDecodeError as e:
+        logging.error(f"配置文件JSON格式错误: {str(e)}")
+        return None
+    except Exception as e:
+        logging.error(f"加载配置文件失败: {str(e)}")
+        return None
+
+    # 检查必要的配置项
+    if not all(key in config for key in ["username", "password", "path", "rss"]):
+        logging.error("配置文件缺少必要的字段(username, password, path, rss)")
+        return None
+    if not isinstance(config.get("rss"), (str, list)):
+        logging.error(f"RSS配置格式错误: {type(config.get('rss'))}")
+        return None
+    config_state.remember(config)
+    return config
+
+
 def load_config():
     """加载基本配置文件，并更新全局变量"""
-    global RSS, RSS_TAGS, USER, PASSWORD, PATH, INTERVAL_TIME_RSS
-    
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                
-            # 检查必要的配置项
-            if not all(key in config for key in ["username", "password", "path", "rss"]):
-                logging.error("配置文件缺少必要的字段(username, password, path, rss)")
-                return False
-                
-            # 检查用户名和密码
-            USER[0] = config.get("username")
-            PASSWORD[0] = config.get("password")
-            
-            # 检查路径 
-            PATH[0] = config.get("path")
-            
-            # 处理RSS链接，确保是列表格式
-            rss_config = config.get("rss")
-            if isinstance(rss_config, str):
-                # 兼容旧版本配置（单个字符串）
-                RSS = [rss_config]
-                logging.info(f"已加载单个RSS源: {rss_config}")
-            elif isinstance(rss_config, list):
-                # 新版本配置（列表）
-                RSS = rss_config
-                logging.info(f"已加载 {len(rss_config)} 个RSS源")
-            else:
-                logging.error(f"RSS配置格式错误: {type(rss_config)}")
-                return False
-                
-            # 读取RSS标签，如果存在的话
-            if "rss_tags" in config:
-                RSS_TAGS = config.get("rss_tags", {})
-                logging.info(f"已加载 {len(RSS_TAGS)} 个RSS标签")
-            else:
-                # 向后兼容：为没有标签的RSS链接创建空标签
-                RSS_TAGS = {}
-                
-            # 检查间隔设置
-            if "interval" in config:
-                interval_minutes = config.get("interval", 10)
-                INTERVAL_TIME_RSS = interval_minutes * 60  # 转换为秒
-                
-            logging.info("配置文件加载成功！")
-            return True
-        except json.JSONDecodeError as e:
-            logging.error(f"配置文件JSON格式错误: {str(e)}")
-            return False
-        except Exception as e:
-            logging.error(f"加载配置文件失败: {str(e)}")
-            return False
-    else:
-        logging.error("配置文件不存在，请创建config.json文件")
+    global config_mtime
+    config = read_config()
+    if config is None:
         return False
+    try:
+        config_mtime = _config_file_mtime()
+        apply_config(config)
+        logging.info("配置文件加载成功！")
+        return True
+    except Exception as e:
+        logging.error(f"加载配置文件失败: {str(e)}")
+        return False
+
+
+def apply_config(config):
+    """将配置应用到全局变量，只对发生变化的部分生效
+
+    凭据变化时才重建PikPak客户端，其余设置（RSS源、标签、过滤、限速等）
+    直接替换，已有的缓存、连接和熔断状态保持不变。
+
+    Args:
+        config: 配置内容（与 config.json 结构相同）
+
+    Returns:
+        dict: 变化情况 {"added_feeds": [...], "removed_feeds": [...], "credentials": bool}
+    """
+    global RSS, RSS_TAGS, INTERVAL_TIME_RSS, RATE_LIMITS, CIRCUIT_BREAKER, CYCLE_DEADLINE, FILTERS, EPISODE_POLICY, TRIGGER, TRACING, SCHEDULING, HISTORY_DAYS, pending_entries
+
+    # 检查用户名、密码和路径
+    credentials = (config.get("username"), config.get("password"), config.get("path"))
+    credentials_changed = credentials != (USER[0], PASSWORD[0], PATH[0])
+    USER[0], PASSWORD[0], PATH[0] = credentials
+
+    # 处理RSS链接，确保是列表格式
+    rss_config = config.get("rss")
+    if isinstance(rss_config, str):
+        # 兼容旧版本配置（单个字符串）
+        new_rss = [rss_config]
+        logging.info(f"已加载单个RSS源: {rss_config}")
+    else:
+        # 新版本配置（列表）
+        new_rss = list(rss_config)
+        logging.info(f"已加载 {len(rss_config)} 个RSS源")
+    added_feeds = [url for url in new_rss if url not in RSS]
+    removed_feeds = [url for url in RSS if url not in new_rss]
+    RSS = new_rss
+    # 新增的RSS源安排立即获取，不必等到下一个检查周期
+    if added_feeds:
+        request_fetch(added_feeds)
+
+    # 读取RSS标签，向后兼容：没有标签时为空
+    RSS_TAGS = config.get("rss_tags", {})
+    if RSS_TAGS:
+        logging.info(f"已加载 {len(RSS_TAGS)} 个RSS标签")
+        
+    # 检查间隔设置
+    if "interval" in config:
+        interval_minutes = config.get("interval", 10)
+        INTERVAL_TIME_RSS = interval_minutes * 60  # 转换为秒
+
+    # 周期截止时间（秒）
+    CYCLE_DEADLINE = config.get("cycle_deadline", 0)
+
+    # 已处理种子历史的保留天数
+    HISTORY_DAYS = config.get("history_days", history.DEFAULT_WINDOW_DAYS)
+    history.configure(HISTORY_DAYS)
+
+    # 条目过滤规则、限速和熔断设置只在变化时重新应用，避免清空已有状态
+    new_filters = config.get("filters", {})
+    if new_filters != FILTERS:
+        FILTERS = new_filters
+        filters.configure(FILTERS)
+
+    new_episode_policy = config.get("episode_policy", {})
+    if new_episode_policy != EPISODE_POLICY:
+        EPISODE_POLICY = new_episode_policy
+        episode.configure(EPISODE_POLICY)
+
+    new_trigger = config.get("trigger", {})
+    if new_trigger != TRIGGER:
+        TRIGGER = new_trigger
+        trigger.configure(TRIGGER)
+
+    new_scheduling = config.get("scheduling", {})
+    if new_scheduling != SCHEDULING:
+        SCHEDULING = new_scheduling
+        scheduler.configure(SCHEDULING)
+
+    new_tracing = config.get("tracing", {})
+    if new_tracing != TRACING:
+        TRACING = new_tracing
+        tracing.configure(TRACING)
+
+    new_rate_limits = config.get("rate_limits", {})
+    if new_rate_limits != RATE_LIMITS:
+        RATE_LIMITS = new_rate_limits
+        ratelimit.configure(RATE_LIMITS)
+
+    new_circuit = config.get("circuit_breaker", {})
+    if new_circuit != CIRCUIT_BREAKER:
+        CIRCUIT_BREAKER = new_circuit
+        circuit.configure(CIRCUIT_BREAKER)
+
+    # 已删除的RSS源：取消顺延条目和发件箱中尚未提交的条目
+    for url in removed_feeds:
+        circuit.forget(f"feed:{url}")
+        metrics.forget_feed(url)
+        cancelled = outbox.cancel_feed(url)
+        logging.info(f"已移除RSS源: {url}" + (f"，取消 {cancelled} 个待提交条目" if cancelled else ""))
+    if removed_feeds:
+        pending_entries = [entry for entry in pending_entries if entry.get(RSS_KEY_FEED) not in removed_feeds]
+
+    # 凭据变化且客户端已初始化时才重建客户端
+    if credentials_changed and not isinstance(PIKPAK_CLIENTS[0], str):
+        logging.info("PikPak账号信息已变化，重新初始化客户端")
+        init_clients()
+
+    return {"added_feeds": added_feeds, "removed_feeds": removed_feeds, "credentials": credentials_changed}
+
+
+def request_fetch(feeds):
+    """安排立即获取指定的RSS源，未订阅的链接会被忽略
+
+    Returns:
+        list: 已安排获取的RSS链接
+    """
+    accepted = [url for url in feeds if url in RSS]
+    with _fetch_requests_lock:
+        fetch_requests.update(accepted)
+    return accepted
+
+
+def is_subscribed(feed):
+    """RSS链接是否已订阅"""
+    return feed in RSS
+
+
+def take_fetch_requests():
+    """取出等待立即获取的RSS源（按订阅顺序）并清空请求"""
+    with _fetch_requests_lock:
+        feeds = [url for url in RSS if url in fetch_requests]
+        fetch_requests.clear()
+    return feeds
+
+
+def _config_file_mtime():
+    try:
+        return os.stat(CONFIG_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+
+def check_config_reload():
+    """检查配置文件是否被外部修改，若有变化则增量应用
+
+    Returns:
+        dict: 变化情况（同 apply_config），配置未变化或读取失败时返回None
+    """
+    global config_mtime
+    mtime = _config_file_mtime()
+    if mtime is None or mtime == config_mtime:
+        return None
+    config_mtime = mtime
+    config = read_config()
+    if config is None:
+        logging.warning("配置文件已修改但无法读取，继续使用当前配置")
+        return None
+    logging.info("检测到配置文件修改，正在应用变化...")
+    changes = apply_config(config)
+    if changes["added_feeds"]:
+        logging.info(f"新增 {len(changes['added_feeds'])} 个RSS源，将立即获取")
+    return changes
+
+
+def wait_next_cycle(last_full_cycle, should_stop=None, on_reload=None):
+    """等待下一次检查（同步版本，供GUI工作线程使用）
+
+    等待期间每秒检查配置文件是否被修改、是否有RSS源需要立即获取，
+    并按 tracker 的自适应间隔查询离线任务状态（不受检查间隔限制）。
+
+    Args:
+        last_full_cycle: 上一次完整检查开始的 time.monotonic() 时间
+        should_stop: 返回True时停止等待的函数
+        on_reload: 配置文件重新加载后调用的函数，参数为变化情况
+
+    Returns:
+        list: 需要立即获取的RSS源；到达检查间隔时返回None，表示获取全部RSS源
+    """
+    metrics.set_next_poll(time.time() + last_full_cycle + INTERVAL_TIME_RSS - time.monotonic())
+    while last_full_cycle + INTERVAL_TIME_RSS > time.monotonic():
+        if should_stop and should_stop():
+            return None
+        time.sleep(1)
+        state.flush_all()
+        changes = check_config_reload()
+        if changes and on_reload:
+            on_reload(changes)
+        if tracker.poll_due():
+            asyncio.run(track_tasks())
+        feeds = take_fetch_requests()
+        if feeds:
+            return feeds
+    return None
+
+
+async def async_wait_next_cycle(last_full_cycle):
+    """等待下一次检查（异步版本，供命令行主循环使用），返回值同 wait_next_cycle"""
+    metrics.set_next_poll(time.time() + last_full_cycle + INTERVAL_TIME_RSS - time.monotonic())
+    while last_full_cycle + INTERVAL_TIME_RSS > time.monotonic():
+        await asyncio.sleep(1)
+        state.flush_all()
+        check_config_reload()
+        await track_tasks()
+        feeds = take_fetch_requests()
+        if feeds:
+            return feeds
+    return None
 
 
 # 如果存在保存的客户端状态，则优先从 CLIENT_STATE_FILE 中加载token
 # 否则根据用户名和密码新建客户端对象
 def init_clients():
+    from pikpakapi import PikPakApi  # requirement: python >= 3.10
+
     global last_refresh_time
     client = None
     if os.path.exists(CLIENT_STATE_FILE):
         try:
             with open(CLIENT_STATE_FILE, "r", encoding="utf-8") as f:
                 config = json.load(f)
+            client_state.remember(config)
             last_refresh_time = config.get("last_refresh_time", 0)
             client_token = config.get("client_token", {})
             if client_token and client_token.get("username") == USER[0]:
@@ -128,113 +365,160 @@ def init_clients():
     PIKPAK_CLIENTS[0] = client
 
 
-# 保存基本配置到 CONFIG_FILE
-def update_config():
-    """保存基本配置到 CONFIG_FILE"""
+def current_config():
+    """返回当前内存中的配置（与 config.json 结构相同）"""
     interval_minutes = INTERVAL_TIME_RSS // 60
-    config = {
+    return {
         "username": USER[0],
         "password": PASSWORD[0],
         "path": PATH[0],
         "rss": RSS,
         "rss_tags": RSS_TAGS,  # 保存RSS标签
-        "interval": interval_minutes
+        "interval": interval_minutes,
+        "cycle_deadline": CYCLE_DEADLINE,
+        "history_days": HISTORY_DAYS,
+        "rate_limits": ratelimit.export_limits(),
+        "circuit_breaker": circuit.export_options(),
+        "filters": FILTERS,
+        "episode_policy": EPISODE_POLICY,
+        "trigger": TRIGGER,
+        "scheduling": SCHEDULING,
+        "tracing": TRACING
     }
+
+
+# 保存基本配置到 CONFIG_FILE
+def update_config():
+    """保存基本配置到 CONFIG_FILE"""
+    global config_mtime
+    config = current_config()
     try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
+        if not config_state.save(config, force=True):
+            logging.debug("配置未变化，跳过写入")
+            return
+        # 记录自身写入后的修改时间，避免被当作外部修改重新加载
+        config_mtime = _config_file_mtime()
         logging.info("配置文件更新成功！")
     except Exception as e:
         logging.error(f"配置文件更新失败: {str(e)}")
 
 # 读取bangumi番剧名称
-async def read_bangumi_title(mikan_episode_url):
+async def read_bangumi_title(mikan_episode_url, fallback=True):
     """从蜜柑计划网页中提取番剧标题
+
+    同一页面（同一剧集或同一番剧，包括不同RSS源中的重复条目）正在抓取时，
+    其他调用等待并共享该次结果；同时抓取的页面数不超过 SCRAPE_CONCURRENCY。
     
     Args:
         mikan_episode_url: 蜜柑计划的剧集URL
+        fallback: 找不到番剧标题元素时是否使用网页的 <title>；结果会被缓存时应为False
         
     Returns:
-        str: 提取到的番剧标题或None（如果提取失败）
+        str: 提取到的番剧标题，提取失败时为"未知番剧"；主机熔断时返回None，留待下次循环
     """
+    return await title_requests.do((mikan_episode_url, fallback),
+                                   lambda: fetch_bangumi_title(mikan_episode_url, fallback))
+
+
+@tracing.traced("read_bangumi_title")
+async def fetch_bangumi_title(mikan_episode_url, fallback=True):
+    """抓取蜜柑计划网页并提取番剧标题，参数和返回值同 read_bangumi_title"""
+    import httpx
+
+    tracing.set_attributes(link=mikan_episode_url)
+    breaker = circuit.host_breaker(mikan_episode_url)
     try:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         # 设置超时和重试
         for retry in range(3):  # 尝试3次
+            if not breaker.allow():
+                logging.warning(f"主机熔断中，暂不获取番剧标题: {mikan_episode_url}")
+                return None
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(
-                        mikan_episode_url, 
-                        headers=headers, 
-                        timeout=30.0,
-                        follow_redirects=True  # 自动处理重定向
-                    )
-                    response.raise_for_status()  # 确保请求成功
-                    
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # 尝试多种选择器查找标题
-                    title_element = soup.select_one(f".{BANGUMI_TITLE_SELECTOR}")
-                    
-                    # 如果第一种选择器失败，尝试备用选择器
-                    if not title_element:
-                        title_element = soup.select_one("p.bangumi-title")
-                    
-                    # 如果仍然失败，尝试其他可能的选择器
-                    if not title_element:
-                        title_element = soup.select_one("h3.bangumi-title")
-
-                    # 如果找到标题，返回标题文本
-                    if title_element and title_element.text:
-                        title = title_element.text.strip()
-                        logging.info(f"成功获取番剧标题: {title}")
-                        return title
+                # 限制同时抓取的页面数，等待期间不占用限速令牌
+                async with scrape_slots():
+                    await ratelimit.acquire(mikan_episode_url)
+                    async with httpx.AsyncClient() as client:
+                        # 流式读取页面，找到番剧标题元素后立即停止，只解析该片段
+                        async with client.stream(
+                            "GET",
+                            mikan_episode_url, 
+                            headers=headers, 
+                            timeout=deadline.timeout(30.0),
+                            follow_redirects=True  # 自动处理重定向
+                        ) as response:
+                            response.raise_for_status()  # 确保请求成功
+                            breaker.record_success()
+                            result = await scrape.stream_title(response)
+
+                # 如果找到标题，返回标题文本
+                if result.title:
+                    logging.info(f"成功获取番剧标题: {result.title}")
+                    return result.title
                         
-                    # 如果没有找到标题，尝试从URL或页面标题提取
-                    page_title = soup.title.text if soup.title else None
-                    if page_title and "错误" not in page_title and len(page_title) < 100:
-                        logging.warning(f"使用页面标题作为番剧标题: {page_title}")
-                        return page_title.strip()
+                # 如果没有找到标题，尝试从页面标题提取
+                page_title = result.page_title
+                if fallback and page_title and "错误" not in page_title and len(page_title) < 100:
+                    logging.warning(f"使用页面标题作为番剧标题: {page_title}")
+                    return page_title.strip()
                         
-                    # 所有方法都失败，记录HTML以便调试
-                    logging.debug(f"无法从页面提取标题，页面内容: {response.text[:500]}...")
+                # 所有方法都失败，记录HTML以便调试
+                logging.debug(f"无法从页面提取标题，页面内容: {result.snippet}...")
                     
-                    # 如果是最后一次尝试，返回"未知番剧"
-                    if retry == 2:
-                        logging.error(f"无法从URL {mikan_episode_url} 提取番剧标题")
-                        return "未知番剧"
-                    else:
-                        # 等待一段时间后重试
-                        await asyncio.sleep(2 * (retry + 1))  # 指数退避
+                # 如果是最后一次尝试，返回"未知番剧"
+                if retry == 2:
+                    logging.error(f"无法从URL {mikan_episode_url} 提取番剧标题")
+                    return "未知番剧"
+                else:
+                    # 等待一段时间后重试
+                    await ratelimit.backoff(mikan_episode_url, retry)
                         
             except httpx.TimeoutException:
+                breaker.record_failure()
                 if retry == 2:
                     logging.error(f"获取番剧标题超时: {mikan_episode_url}")
                     return "未知番剧"
-                await asyncio.sleep(2 * (retry + 1))
+                await ratelimit.backoff(mikan_episode_url, retry)
                 
             except httpx.HTTPStatusError as e:
+                # 仅服务端错误和限流计入主机失败，404等说明主机本身可用
+                if e.response.status_code >= 500 or e.response.status_code == 429:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
                 if retry == 2:
                     logging.error(f"HTTP错误 {e.response.status_code}: {str(e)}")
                     return "未知番剧"
-                await asyncio.sleep(2 * (retry + 1))
+                await ratelimit.backoff(mikan_episode_url, retry, e.response)
                 
     except Exception as e:
+        breaker.record_failure()
         logging.error(f"获取番剧标题失败: {str(e)}")
         return "未知番剧"
+    except BaseException:
+        # 被取消时没有记录结果，释放探测机会，否则半开的熔断器不再放行
+        breaker.release_probe()
+        raise
 
 # 保存token到 CLIENT_STATE_FILE
-def save_client():
+def save_client(force=False):
     """保存PikPak客户端状态到文件
     
-    将当前的token和刷新时间保存到CLIENT_STATE_FILE文件
+    将当前的token和刷新时间保存到CLIENT_STATE_FILE文件。内容未变化时不写文件，
+    距上次写入不足 CLIENT_SAVE_DEBOUNCE 秒时推迟到下一次 state.flush_all()。
+    
+    Args:
+        force: 立即写入（如刷新token后、程序退出前）
     """
     # 检查客户端是否已初始化且是有效的PikPakApi对象
     if isinstance(PIKPAK_CLIENTS[0], str) or not hasattr(PIKPAK_CLIENTS[0], 'to_dict'):
         logging.warning("PikPak客户端未初始化或不是有效的对象，跳过保存客户端状态")
         return
+    # 多进程模式下只由持有该账号的工作进程保存，避免覆盖其他进程刷新后的token
+    if not owns_account(0):
+        return
         
     try:
         config = {
@@ -242,9 +526,8 @@ def save_client():
             "client_token": PIKPAK_CLIENTS[0].to_dict(),
         }
         
-        with open(CLIENT_STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
-        logging.info("客户端状态保存成功！")
+        if client_state.save(config, force=force):
+            logging.info("客户端状态保存成功！")
     except Exception as e:
         logging.error(f"客户端状态保存失败: {str(e)}")
 
@@ -268,6 +551,7 @@ async def login(account_index):
     for retry in range(max_retries):
         try:
             # 尝试用 token 调用 file_list() 检查 token 是否有效
+            await ratelimit.acquire(ratelimit.PIKPAK_HOST)
             await client.file_list(parent_id=PATH[account_index])
             logging.info(f"账号 {USER[account_index]} Token 有效")
             await auto_refresh_token()
@@ -275,6 +559,7 @@ async def login(account_index):
         except Exception as e:
             logging.warning(f"使用 token 读取文件列表失败: {str(e)}，将尝试重新登录 (尝试 {retry+1}/{max_retries})")
             try:
+                await ratelimit.acquire(ratelimit.PIKPAK_HOST)
                 await client.login()
                 logging.info(f"账号 {USER[account_index]} 登录成功！")
                 await auto_refresh_token()
@@ -288,10 +573,10 @@ async def login(account_index):
                 elif "captcha" in err_msg.lower():
                     logging.error(f"账号 {USER[account_index]} 登录失败: 需要验证码，请稍后再试")
                     # 等待更长时间再重试
-                    await asyncio.sleep(30 * (retry + 1))
+                    await ratelimit.backoff(ratelimit.PIKPAK_HOST, retry, base=30.0)
                 else:
                     logging.error(f"账号 {USER[account_index]} 登录失败: {err_msg}")
-                    await asyncio.sleep(5 * (retry + 1))
+                    await ratelimit.backoff(ratelimit.PIKPAK_HOST, retry, base=5.0)
                     
     logging.error(f"账号 {USER[account_index]} 登录失败，已达到最大重试次数")
     return False
@@ -306,16 +591,21 @@ async def auto_refresh_token():
     global last_refresh_time
     current_time = time.time()
     
+    # 多进程模式下由持有该账号的工作进程负责刷新
+    if not owns_account(0):
+        return
+    
     # 检查是否需要刷新token
     if current_time - last_refresh_time >= INTERVAL_TIME_REFRESH:
         max_retries = 3
         for retry in range(max_retries):
             try:
                 client = PIKPAK_CLIENTS[0]
+                await ratelimit.acquire(ratelimit.PIKPAK_HOST)
                 await client.refresh_access_token()
                 logging.info("Token刷新成功！")
                 last_refresh_time = current_time
-                save_client()
+                save_client(force=True)
                 return
             except Exception as e:
                 if "invalid_grant" in str(e).lower():
@@ -328,146 +618,262 @@ async def auto_refresh_token():
                     # 重置时间戳，强制下次循环进行完整登录
                     last_refresh_time = 0
                 else:
-                    logging.warning(f"Token刷新失败: {str(e)}，将在 {2*(retry+1)} 秒后重试 ({retry+1}/{max_retries})")
-                    await asyncio.sleep(2 * (retry + 1))  # 指数退避
+                    logging.warning(f"Token刷新失败: {str(e)}，稍后重试 ({retry+1}/{max_retries})")
+                    await ratelimit.backoff(ratelimit.PIKPAK_HOST, retry)
 
 
-# 解析 RSS 并返回种子列表
-async def get_rss():
-    """解析多个RSS源并返回合并去重后的种子列表
-    
-    返回的列表中每个元素包含标题、链接、种子URL、发布日期和番剧名称
-    
+# 获取并解析单个RSS源
+async def fetch_feed(rss_url):
+    """获取并解析一个RSS源，返回未处理过且通过过滤规则的条目
+
+    Args:
+        rss_url: RSS链接
+
     Returns:
-        list: 包含RSS条目信息的字典列表
+        tuple: (feedparser 解析结果, 条目列表)，RSS源熔断或获取失败时返回None
     """
-    global processed_torrents
-    all_entries = []
-    
-    # 遍历所有RSS源
-    for rss_url in RSS:
+    # 熔断中的RSS源或主机直接跳过，避免每次循环都耗尽重试时间
+    feed_cb = circuit.feed_breaker(rss_url)
+    host_cb = circuit.host_breaker(rss_url)
+    if host_cb.is_open():
+        logging.warning(f"主机熔断中，跳过RSS源: {rss_url} [{host_cb.describe()}]")
+        return None
+    if not feed_cb.allow():
+        logging.warning(f"RSS源熔断中，跳过: {rss_url} [{feed_cb.describe()}]")
+        return None
+    # 主机熔断期过后只放行一个探测请求，同一主机的其他RSS源等待探测结果
+    if not host_cb.allow():
+        feed_cb.release_probe()
+        logging.warning(f"主机探测中，跳过RSS源: {rss_url} [{host_cb.describe()}]")
+        return None
+    try:
+        return await _fetch_feed(rss_url, feed_cb, host_cb)
+    except BaseException:
+        # 被取消（超出截止时间、流水线停止）时没有记录结果，释放探测机会，否则半开的熔断器不再放行
+        feed_cb.release_probe()
+        host_cb.release_probe()
+        raise
+
+
+async def _fetch_feed(rss_url, feed_cb, host_cb):
+    """fetch_feed 的获取和解析部分，由调用方完成熔断检查"""
+    import feedparser
+    import httpx
+
+    started = time.perf_counter()
+    with tracing.span("fetch_feed", feed=rss_url):
+        result = None
+        entry_filter = filters.matcher(rss_url, RSS_TAGS.get(rss_url))
         max_retries = 3
         for retry in range(max_retries):
+            # 主机已熔断（如探测失败）时不再重试
+            if retry and host_cb.is_open():
+                break
             try:
                 logging.info(f"正在获取RSS源: {rss_url}")
-                async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
+                await ratelimit.acquire(rss_url)
+                async with httpx.AsyncClient(timeout=deadline.timeout(30.0), follow_redirects=True) as client:
                     # 使用httpx进行请求，以支持更好的超时和错误处理
                     response = await client.get(rss_url)
                     response.raise_for_status()
-                    
-                    # 使用响应文本进行解析
-                    rss_content = response.text
-                    rss = feedparser.parse(rss_content)
-                    
-                    # 验证解析结果
-                    if not rss.get('entries'):
-                        if retry == max_retries - 1:
-                            logging.error(f"RSS源 {rss_url} 解析失败或不包含条目")
-                            break
-                        else:
-                            logging.warning(f"RSS源 {rss_url} 解析失败，将在 {2*(retry+1)} 秒后重试 ({retry+1}/{max_retries})")
-                            await asyncio.sleep(2 * (retry + 1))
-                            continue
-                    
-                    # 提取所有条目
-                    current_entries = []
-                    for entry in rss['entries']:
-                        # 验证必要的字段是否存在
-                        if RSS_KEY_TITLE not in entry or RSS_KEY_LINK not in entry or RSS_KEY_PUB not in entry:
-                            logging.warning(f"RSS条目缺少必要字段: {entry.get(RSS_KEY_TITLE, '未知标题')}")
-                            continue
-                        
-                        # 验证种子链接是否存在
-                        if RSS_KEY_TORRENT not in entry or not entry[RSS_KEY_TORRENT]:
-                            logging.warning(f"RSS条目缺少种子链接: {entry.get(RSS_KEY_TITLE, '未知标题')}")
-                            continue
-                            
-                        # 提取种子URL
-                        torrent_url = entry[RSS_KEY_TORRENT][0]['url'] if entry[RSS_KEY_TORRENT] else None
-                        if not torrent_url:
-                            continue
-                            
-                        # 检查是否已处理过该种子（全局去重）
-                        if torrent_url in processed_torrents:
-                            logging.debug(f"跳过已处理的种子: {entry.get(RSS_KEY_TITLE, '未知标题')}")
+                    host_cb.record_success()
+
+                # 使用响应文本进行解析
+                rss = feedparser.parse(response.text)
+
+                # 验证解析结果
+                if not rss.get('entries'):
+                    if retry == max_retries - 1:
+                        logging.error(f"RSS源 {rss_url} 解析失败或不包含条目")
+                        # 格式正确的空RSS源不计入失败
+                        if not rss.get('bozo'):
+                            result = (rss, [])
+                        break
+                    else:
+                        logging.warning(f"RSS源 {rss_url} 解析失败，稍后重试 ({retry+1}/{max_retries})")
+                        await ratelimit.backoff(rss_url, retry)
+                        continue
+
+                # 提取所有条目
+                current_entries = []
+                filtered = 0
+                for entry in rss['entries']:
+                    # 验证必要的字段是否存在
+                    if RSS_KEY_TITLE not in entry or RSS_KEY_LINK not in entry or RSS_KEY_PUB not in entry:
+                        logging.warning(f"RSS条目缺少必要字段: {entry.get(RSS_KEY_TITLE, '未知标题')}")
+                        continue
+
+                    # 验证种子链接是否存在
+                    if RSS_KEY_TORRENT not in entry or not entry[RSS_KEY_TORRENT]:
+                        logging.warning(f"RSS条目缺少种子链接: {entry.get(RSS_KEY_TITLE, '未知标题')}")
+                        continue
+
+                    # 提取种子URL
+                    torrent_url = entry[RSS_KEY_TORRENT][0]['url'] if entry[RSS_KEY_TORRENT] else None
+                    if not torrent_url:
+                        continue
+
+                    # 检查是否已处理过该种子或已在发件箱中（全局去重）
+                    if history.contains(torrent_url) or outbox.contains(torrent_url):
+                        logging.debug(f"跳过已处理的种子: {entry.get(RSS_KEY_TITLE, '未知标题')}")
+                        continue
+
+                    # 解析发布时间（带时区），用于时间窗口和条目上限
+                    entry[RSS_KEY_PUBLISHED_AT] = filters.entry_published(entry, RSS_KEY_PUB)
+
+                    # 按过滤规则筛选，未通过的条目不再进行后续网络请求
+                    if not entry_filter.empty:
+                        accepted, reason = entry_filter.accepts(
+                            entry[RSS_KEY_TITLE], filters.entry_size(entry), entry[RSS_KEY_PUBLISHED_AT])
+                        if not accepted:
+                            logging.debug(f"过滤条目: {entry[RSS_KEY_TITLE]} ({reason})")
+                            filtered += 1
                             continue
-                            
-                        # 添加到当前RSS源的条目列表
-                        current_entries.append(entry)
-                    
-                    # 并行获取番剧标题
-                    if current_entries:
-                        # 创建获取番剧标题的任务
-                        tasks = [read_bangumi_title(entry[RSS_KEY_LINK]) for entry in current_entries]
-                        bangumi_titles = await asyncio.gather(*tasks)
-                        
-                        # 构建结果列表
-                        for i, entry in enumerate(current_entries):
-                            # 将发布日期格式化为YYYY-MM-DD
-                            pub_date = entry[RSS_KEY_PUB].split("T")[0] if 'T' in entry[RSS_KEY_PUB] else entry[RSS_KEY_PUB]
-                            
-                            # 提取种子URL
-                            torrent_url = entry[RSS_KEY_TORRENT][0]['url']
-                            
-                            # 确保番剧标题有效
-                            bgm_title = bangumi_titles[i] if i < len(bangumi_titles) else "未知番剧"
-                            bgm_title = sanitize_filepath(bgm_title) if bgm_title else "未知番剧"
-                            
-                            # 添加到结果列表
-                            all_entries.append({
-                                RSS_KEY_TITLE: entry[RSS_KEY_TITLE],
-                                RSS_KEY_LINK: entry[RSS_KEY_LINK],
-                                RSS_KEY_TORRENT: torrent_url,
-                                RSS_KEY_PUB: pub_date,
-                                RSS_KEY_BGM_TITLE: bgm_title
-                            })
-                    
-                    logging.info(f"从RSS源 {rss_url} 获取了 {len(current_entries)} 个条目")
-                    # 成功获取RSS源，跳出重试循环
-                    break
-                    
+
+                    # 添加到当前RSS源的条目列表
+                    current_entries.append(entry)
+
+                # 每个周期只处理最新的若干条目，其余的留待下个周期，避免新订阅时一次性抓取全部历史条目
+                current_entries, deferred = filters.newest(
+                    current_entries, entry_filter.max_items, lambda entry: entry[RSS_KEY_PUBLISHED_AT])
+                if deferred:
+                    logging.info(f"RSS源 {rss_url} 本周期只处理最新的 {len(current_entries)} 个条目，"
+                                 f"{deferred} 个留待下个周期")
+
+                logging.info(f"从RSS源 {rss_url} 获取了 {len(current_entries)} 个条目"
+                             + (f"，过滤掉 {filtered} 个" if filtered else ""))
+                tracing.set_attributes(entries=len(current_entries), filtered=filtered, deferred=deferred)
+                # 成功获取RSS源，跳出重试循环
+                result = (rss, current_entries)
+                break
+
             except httpx.TimeoutException:
+                host_cb.record_failure()
                 if retry == max_retries - 1:
                     logging.error(f"获取RSS源超时: {rss_url}")
                 else:
-                    logging.warning(f"获取RSS源超时，将在 {2*(retry+1)} 秒后重试 ({retry+1}/{max_retries})")
-                    await asyncio.sleep(2 * (retry + 1))
-                
+                    logging.warning(f"获取RSS源超时，稍后重试 ({retry+1}/{max_retries})")
+                    await ratelimit.backoff(rss_url, retry)
+
             except httpx.HTTPStatusError as e:
+                if e.response.status_code >= 500 or e.response.status_code == 429:
+                    host_cb.record_failure()
+                else:
+                    host_cb.record_success()
                 if retry == max_retries - 1:
                     logging.error(f"HTTP错误 {e.response.status_code}: {str(e)}")
                 else:
-                    logging.warning(f"HTTP错误 {e.response.status_code}，将在 {2*(retry+1)} 秒后重试 ({retry+1}/{max_retries})")
-                    await asyncio.sleep(2 * (retry + 1))
-                
+                    logging.warning(f"HTTP错误 {e.response.status_code}，稍后重试 ({retry+1}/{max_retries})")
+                    await ratelimit.backoff(rss_url, retry, e.response)
+
             except Exception as e:
+                if isinstance(e, httpx.RequestError):
+                    host_cb.record_failure()
                 if retry == max_retries - 1:
                     logging.error(f"获取RSS源时发生未知错误: {str(e)}")
                 else:
-                    logging.warning(f"获取RSS源时发生错误: {str(e)}，将在 {2*(retry+1)} 秒后重试 ({retry+1}/{max_retries})")
-                    await asyncio.sleep(2 * (retry + 1))
-    
-    # 处理获取到的所有条目
-    # 使用字典进行去重，以种子URL为键
-    unique_entries = {}
-    for entry in all_entries:
-        torrent_url = entry[RSS_KEY_TORRENT]
-        # 如果是新条目或者更新的版本，则保留
-        if torrent_url not in unique_entries:
-            unique_entries[torrent_url] = entry
-            
-    result = list(unique_entries.values())
+                    logging.warning(f"获取RSS源时发生错误: {str(e)}，稍后重试 ({retry+1}/{max_retries})")
+                    await ratelimit.backoff(rss_url, retry)
+
+        if result is not None:
+            feed_cb.record_success()
+        else:
+            feed_cb.record_failure()
+            tracing.set_attributes(failed=True)
+    metrics.record_feed(rss_url, time.perf_counter() - started, len(result[1]) if result else 0, result is not None)
+    return result
+
+
+# 确定条目的番剧标题
+async def resolve_titles(rss_url, rss, entries):
+    """确定一个RSS源中各条目的番剧标题，并转换为条目字典
+
+    先从频道信息或 bangumiId 确定整个RSS源的番剧标题，
+    无法确定时（如"我的番组"聚合RSS）再逐集并行抓取。
+
+    Args:
+        rss_url: RSS链接
+        rss: feedparser 解析结果
+        entries: fetch_feed 返回的条目
+
+    Returns:
+        list: 条目字典列表，主机熔断导致未能获取标题的条目留待下次循环
+    """
+    from pathvalidate import sanitize_filepath
+
+    if not entries:
+        return []
+    try:
+        # 番剧页面的标题会被缓存，只接受番剧标题元素，不使用网页 <title>
+        feed_title = await titles.resolve_feed_title(
+            rss_url, rss, lambda url: read_bangumi_title(url, fallback=False))
+        if feed_title:
+            bangumi_titles = [feed_title] * len(entries)
+        else:
+            tasks = [read_bangumi_title(entry[RSS_KEY_LINK]) for entry in entries]
+            bangumi_titles = await asyncio.gather(*tasks)
+            titles.stats["episode"] += len(entries)
+    except deadline.DeadlineExceeded:
+        raise
+    except Exception as e:
+        logging.error(f"获取RSS源 {rss_url} 的番剧标题失败: {str(e)}")
+        return []
+
+    results = []
+    for entry, bgm_title in zip(entries, bangumi_titles):
+        if bgm_title is None:
+            logging.info(f"番剧标题暂不可用，下次循环再处理: {entry[RSS_KEY_TITLE]}")
+            continue
+
+        # 发布时间保存为带时区的ISO格式，无法解析时保留原始字符串
+        published = entry[RSS_KEY_PUBLISHED_AT]
+        pub_date = published.isoformat() if published else entry[RSS_KEY_PUB]
+
+        results.append({
+            RSS_KEY_TITLE: entry[RSS_KEY_TITLE],
+            RSS_KEY_LINK: entry[RSS_KEY_LINK],
+            RSS_KEY_TORRENT: entry[RSS_KEY_TORRENT][0]['url'],
+            RSS_KEY_PUB: pub_date,
+            RSS_KEY_BGM_TITLE: sanitize_filepath(bgm_title) if bgm_title else "未知番剧",
+            RSS_KEY_FEED: rss_url
+        })
+    return results
+
+
+# 解析 RSS 并返回种子列表
+async def get_rss(feeds=None):
+    """解析多个RSS源并返回合并去重后的种子列表
+
+    返回的列表中每个元素包含标题、链接、种子URL、发布日期和番剧名称。
+    处理周期使用流水线逐个RSS源处理（见 run_pipeline），本函数用于需要一次性取得全部条目的场合。
+
+    Args:
+        feeds: 只获取指定的RSS源，默认获取全部
+
+    Returns:
+        list: 包含RSS条目信息的字典列表
+    """
+    all_entries = []
+    for rss_url in (RSS if feeds is None else feeds):
+        fetched = await fetch_feed(rss_url)
+        if fetched:
+            all_entries.extend(await resolve_titles(rss_url, *fetched))
+
+    # 以种子URL为键去重，保留先出现的条目
+    result = merge_entries(all_entries)
     logging.info(f"从所有RSS源获取了 {len(all_entries)} 个条目，去重后剩余 {len(result)} 个")
     return result
-    
+
 
 # 根据番剧名称创建文件夹
-async def get_folder_id(account_index, torrent):
+@tracing.traced(failed=lambda folder_id: folder_id is None)
+async def get_folder_id(account_index, torrent, title=None):
     """根据番剧名称创建或获取PikPak中的文件夹ID
     
     Args:
         account_index: PikPak账号的索引
         torrent: 种子文件URL
+        title: 番剧标题，未提供时从本周期的RSS列表中查找
         
     Returns:
         str: 文件夹ID，失败则返回None
@@ -477,10 +883,12 @@ async def get_folder_id(account_index, torrent):
         folder_path = PATH[account_index]
         
         # 获取番剧标题
-        title = await get_title(torrent)
+        if not title:
+            title = await get_title(torrent)
         if not title:
             logging.error(f"无法获取种子 {torrent} 对应的番剧标题")
             return None
+        tracing.set_attributes(account=account_index, title=title)
             
         # 有效性检查
         if not title or len(title.strip()) == 0:
@@ -493,16 +901,16 @@ async def get_folder_id(account_index, torrent):
         
         for retry in range(max_retries):
             try:
-                folder_list = await client.file_list(parent_id=folder_path)
-                
-                # 查找是否已存在对应名称的文件夹
-                for file in folder_list.get('files', []):
-                    if file['name'] == title and file['kind'] == 'drive#folder':
-                        logging.info(f"找到已存在的番剧文件夹: {title} (ID: {file['id']})")
-                        return file['id']
+                # 逐页查找是否已存在对应名称的文件夹，只列出文件夹，找到后不再翻页
+                file = await drive.find_file(client, folder_path, lambda file: file['name'] == title,
+                                             kind=drive.FOLDER_KIND)
+                if file:
+                    logging.info(f"找到已存在的番剧文件夹: {title} (ID: {file['id']})")
+                    return file['id']
                 
                 # 未找到则创建新文件夹
                 try:
+                    await ratelimit.acquire(ratelimit.PIKPAK_HOST)
                     folder_info = await client.create_folder(name=title, parent_id=folder_path)
                     if folder_info and 'file' in folder_info and 'id' in folder_info['file']:
                         folder_id = folder_info['file']['id']
@@ -516,7 +924,7 @@ async def get_folder_id(account_index, torrent):
                     logging.error(f"创建文件夹 {title} 失败: {str(e)}")
                     if retry == max_retries - 1:
                         return None
-                    await asyncio.sleep(2 * (retry + 1))
+                    await ratelimit.backoff(ratelimit.PIKPAK_HOST, retry)
                     
             except Exception as e:
                 if "not_found" in str(e).lower():
@@ -525,7 +933,7 @@ async def get_folder_id(account_index, torrent):
                 logging.error(f"获取文件夹列表失败: {str(e)}")
                 if retry == max_retries - 1:
                     return None
-                await asyncio.sleep(2 * (retry + 1))
+                await ratelimit.backoff(ratelimit.PIKPAK_HOST, retry)
         
         return folder_id
         
@@ -545,9 +953,12 @@ async def get_title(torrent):
 
 
 # 提交离线磁力任务至 PikPak
+@tracing.traced(failed=lambda result: result[0] is None)
 async def magnet_upload(account_index, file_url, folder_id):
     client = PIKPAK_CLIENTS[account_index]
+    tracing.set_attributes(account=account_index, torrent=file_url)
     try:
+        await ratelimit.acquire(ratelimit.PIKPAK_HOST)
         result = await client.offline_download(file_url=file_url, parent_id=folder_id)
     except Exception as e:
         logging.error(
@@ -558,6 +969,7 @@ async def magnet_upload(account_index, file_url, folder_id):
 
 
 # 下载 torrent 文件并保存到本地
+@tracing.traced(failed=lambda file_path: file_path is None)
 async def download_torrent(folder, name, torrent):
     """下载种子文件到本地
     
@@ -569,6 +981,9 @@ async def download_torrent(folder, name, torrent):
     Returns:
         str: 下载的文件路径，失败则返回None
     """
+    import httpx
+
+    tracing.set_attributes(torrent=torrent)
     max_retries = 3
     for retry in range(max_retries):
         try:
@@ -583,10 +998,11 @@ async def download_torrent(folder, name, torrent):
                 return None
                 
             # 下载种子文件
+            await ratelimit.acquire(torrent)
             async with httpx.AsyncClient() as client:
                 response = await client.get(
                     torrent, 
-                    timeout=30.0,
+                    timeout=deadline.timeout(30.0),
                     follow_redirects=True
                 )
                 response.raise_for_status()
@@ -606,20 +1022,21 @@ async def download_torrent(folder, name, torrent):
         except httpx.HTTPStatusError as e:
             logging.error(f"HTTP错误 {e.response.status_code} - 下载种子 {name} 失败: {str(e)}")
             if retry < max_retries - 1:
-                await asyncio.sleep(2 * (retry + 1))
+                await ratelimit.backoff(torrent, retry, e.response)
             else:
                 return None
                 
         except httpx.RequestError as e:
             logging.error(f"下载种子文件 {name} 请求失败: {str(e)}")
             if retry < max_retries - 1:
-                await asyncio.sleep(2 * (retry + 1))
+                await ratelimit.backoff(torrent, retry)
             else:
                 return None
                 
         except IOError as e:
             logging.error(f"写入种子文件 {name} 到磁盘失败: {str(e)}")
             if retry < max_retries - 1:
+                tracing.event("retry.sleep", retry=retry + 1, seconds=1)
                 await asyncio.sleep(1)
             else:
                 return None
@@ -627,12 +1044,13 @@ async def download_torrent(folder, name, torrent):
         except Exception as e:
             logging.error(f"下载种子文件 {name} 时发生未知错误: {str(e)}")
             if retry < max_retries - 1:
+                tracing.event("retry.sleep", retry=retry + 1, seconds=2)
                 await asyncio.sleep(2)
             else:
                 return None
                 
 # 检查本地是否存在种子文件；若不存在则下载并提交离线任务
-async def check_torrent(account_index, folder, name, torrent, check_mode: str):
+async def check_torrent(account_index, folder, name, torrent, check_mode: str, title=None):
     """检查本地是否存在种子文件；若不存在则下载并提交离线任务
     
     Args:
@@ -641,69 +1059,467 @@ async def check_torrent(account_index, folder, name, torrent, check_mode: str):
         name: 种子文件名
         torrent: 种子文件URL
         check_mode: 检查模式 "local"仅检查本地, "network"检查并下载提交
+        title: 番剧标题，未提供时从本周期的RSS列表中查找
         
     Returns:
-        bool: True表示需要登录或有新文件，False表示没有新文件需要处理
+        bool: local模式下True表示需要登录或有新文件；network模式下True表示已提交或PikPak中已存在
     """
     try:
-        # 检查本地文件是否存在
-        if not os.path.exists(f'{folder}/{name}'):
-            if check_mode == "local":
-                # 本地模式下，如果文件不存在，表示需要进行下载和提交
-                return True
-            else:
-                # 网络模式下，先下载种子文件
-                file_path = await download_torrent(folder, name, torrent)
-                if not file_path:
-                    logging.error(f"种子 {name} 下载失败，跳过后续处理")
-                    return False
-                
-                try:
-                    # 获取对应的文件夹ID
-                    folder_id = await get_folder_id(account_index, torrent)
-                    if not folder_id:
-                        logging.error(f"无法获取或创建文件夹，跳过种子 {name}")
-                        return False
-                    
-                    # 检查PikPak中是否已存在该种子文件的离线下载任务
-                    info_hash = name.rsplit('.', 1)[0]
-                    magnet_link = f"magnet:?xt=urn:btih:{info_hash}"
-                    client = PIKPAK_CLIENTS[account_index]
-                    
-                    try:
-                        sub_folder_list = await client.file_list(parent_id=folder_id)
-                        for sub_file in sub_folder_list.get('files', []):
-                            # 如果文件的URL参数与磁力链接匹配，说明已经存在
-                            if sub_file.get('params', {}).get('url') == magnet_link:
-                                logging.info(f"种子 {name} 已经在PikPak中存在，跳过")
-                                return False
-                    except Exception as e:
-                        logging.error(f"获取文件夹 {folder_id} 内容失败: {str(e)}")
-                        # 继续尝试提交离线下载任务
-                    
-                    # 提交离线下载任务
-                    task_id, task_name = await magnet_upload(account_index, torrent, folder_id)
-                    if task_id:
-                        logging.info(f"成功添加离线下载任务: {task_name}")
-                        return True
-                    else:
-                        logging.warning(f"添加离线下载任务失败: {torrent}")
-                        return False
-                        
-                except Exception as e:
-                    logging.error(f"处理种子 {name} 时发生错误: {str(e)}")
-                    return False
-        else:
-            logging.debug(f"种子文件 {name} 已存在，跳过")
-            return False
+        if check_mode == "local":
+            # 本地模式下，如果文件不存在，表示需要进行下载和提交
+            if os.path.exists(f'{folder}/{name}'):
+                logging.debug(f"种子文件 {name} 已存在，跳过")
+                return False
+            return True
+
+        ok, _, _ = await submit_torrent(account_index, folder, name, torrent, title)
+        return ok
             
     except Exception as e:
         logging.error(f"检查种子 {name} 时发生未预期错误: {str(e)}")
-        # 返回True以保证在遇到错误时仍然会尝试登录
+        # 本地模式返回True以保证在遇到错误时仍然会尝试登录
+        return check_mode == "local"
+
+
+# 下载种子文件并提交离线任务
+async def submit_torrent(account_index, folder, name, torrent, title=None):
+    """下载种子文件（本地已有时跳过）并提交PikPak离线下载任务
+    
+    Args:
+        account_index: PikPak账号的索引
+        folder: 本地保存的文件夹路径
+        name: 种子文件名
+        torrent: 种子文件URL
+        title: 番剧标题，未提供时从本周期的RSS列表中查找
+        
+    Returns:
+        tuple: (是否成功, 任务ID, 任务名称)，PikPak中已存在时任务ID为None
+    """
+    # 上次提交失败时种子文件可能已经下载到本地
+    if not os.path.exists(f'{folder}/{name}'):
+        file_path = await download_torrent(folder, name, torrent)
+        if not file_path:
+            logging.error(f"种子 {name} 下载失败，跳过后续处理")
+            return False, None, None
+    
+    try:
+        # 获取对应的文件夹ID
+        folder_id = await get_folder_id(account_index, torrent, title)
+        if not folder_id:
+            logging.error(f"无法获取或创建文件夹，跳过种子 {name}")
+            return False, None, None
+        
+        # 检查PikPak中是否已存在该种子文件的离线下载任务
+        info_hash = name.rsplit('.', 1)[0]
+        magnet_link = f"magnet:?xt=urn:btih:{info_hash}"
+        client = PIKPAK_CLIENTS[account_index]
+        
+        try:
+            # 逐页查找，文件的URL参数与磁力链接匹配说明已经存在，找到后不再翻页
+            sub_file = await drive.find_file(
+                client, folder_id, lambda file: file.get('params', {}).get('url') == magnet_link)
+            if sub_file:
+                logging.info(f"种子 {name} 已经在PikPak中存在，跳过")
+                return True, None, None
+        except Exception as e:
+            logging.error(f"获取文件夹 {folder_id} 内容失败: {str(e)}")
+            # 继续尝试提交离线下载任务
+        
+        # 提交离线下载任务
+        task_id, task_name = await magnet_upload(account_index, torrent, folder_id)
+        if task_id:
+            logging.info(f"成功添加离线下载任务: {task_name}")
+            return True, task_id, task_name
+        logging.warning(f"添加离线下载任务失败: {torrent}")
+        return False, None, None
+            
+    except Exception as e:
+        logging.error(f"处理种子 {name} 时发生错误: {str(e)}")
+        return False, None, None
+
+
+def outbox_item(entry):
+    """将RSS条目转换为发件箱记录"""
+    return {
+        "torrent": entry[RSS_KEY_TORRENT],
+        "title": entry[RSS_KEY_TITLE],
+        "link": entry[RSS_KEY_LINK],
+        "pub": entry[RSS_KEY_PUB],
+        "bangumi_title": entry[RSS_KEY_BGM_TITLE],
+        "feed": entry.get(RSS_KEY_FEED),
+    }
+
+
+def owns_account(account_index):
+    """本进程是否负责该账号（单进程模式下负责所有账号）"""
+    return not lease.enabled or str(account_index) in lease.owned(lease.ACCOUNT)
+
+
+async def login_all(accounts=None):
+    """登录所有账号
+
+    Args:
+        accounts: 只登录指定的账号索引，默认登录全部账号
+
+    Returns:
+        list: 登录成功的账号索引
+    """
+    if accounts is None:
+        accounts = list(range(len(USER)))
+    login_tasks = [login(i) for i in accounts]
+    login_results = await asyncio.gather(*login_tasks, return_exceptions=True)
+    
+    logged_in = []
+    for i, result in zip(accounts, login_results):
+        if isinstance(result, Exception):
+            logging.error(f"账号 {USER[i]} 登录失败: {str(result)}")
+        elif result is True:
+            logged_in.append(i)
+    return logged_in
+
+
+async def prepare_accounts():
+    """确定本进程负责提交的账号并登录
+
+    Returns:
+        list: 登录成功的账号索引，本进程未分配到账号时为空列表，全部登录失败时为None
+    """
+    # 多进程模式下各工作进程平分账号，未分到账号的进程不提交
+    accounts = list(range(len(USER)))
+    if lease.enabled:
+        accounts = lease.balance(lease.ACCOUNT, accounts)
+        if not accounts:
+            logging.info("本进程未分配到账号，发件箱由其他工作进程提交")
+            return []
+
+    # 登录（若有token，实际上是复用之前的连接状态）
+    logged_in = await login_all(accounts)
+    if not logged_in:
+        logging.error("所有账号登录失败，将在下次循环重试")
+        return None
+    return logged_in
+
+
+async def submit_item(item, logged_in):
+    """提交发件箱中的一个条目，依次尝试各个已登录账号
+
+    Args:
+        item: 发件箱记录
+        logged_in: 已登录的账号索引
+
+    Returns:
+        bool: 是否提交成功（PikPak中已存在也视为成功）
+    """
+    torrent = item["torrent"]
+    name = torrent.split('/')[-1]
+    folder = f'torrent/{item["bangumi_title"]}'
+    # 多进程模式下先取得条目租约，并确认条目没有被其他进程提交
+    if lease.enabled:
+        if not lease.claim(lease.ITEM, torrent):
+            return False
+        if not outbox.is_due(torrent):
+            lease.release(lease.ITEM, torrent)
+            return False
+    # 条目的追踪片段以 infohash 标识，可与获取RSS阶段的片段（按 link）关联
+    with tracing.span("submit_item", item=history.infohash(torrent).hex(), title=item.get("title"),
+                      link=item.get("link"), feed=item.get("feed")) as item_span:
+        try:
+            for i in logged_in:
+                ok, task_id, task_name = await submit_torrent(i, folder, name, torrent, item["bangumi_title"])
+                metrics.record_submission(USER[i], ok)
+                if ok:
+                    outbox.mark_done(torrent, task_id, task_name)
+                    if task_id:
+                        tracker.track(task_id, torrent, i)
+                    history.add(torrent)
+                    tracing.set_attributes(account=i, task_id=task_id)
+                    return True
+            outbox.mark_failed(torrent, "下载种子或提交离线任务失败，详见日志")
+            if item_span is not None:
+                item_span.status = {"code": "ERROR", "message": "所有账号提交失败"}
+        except Exception as e:
+            logging.error(f"处理条目 {item.get('title', '未知标题')} 时出错: {str(e)}")
+            outbox.mark_failed(torrent, str(e))
+            if item_span is not None:
+                item_span.status = {"code": "ERROR", "message": str(e)}
+        finally:
+            if lease.enabled:
+                lease.release(lease.ITEM, torrent)
+    return False
+
+
+async def drain_outbox():
+    """提交发件箱中已到期的条目
+
+    条目按标签优先级和RSS源之间的加权公平排队确定顺序（见 scheduler），
+    周期预算不足时先提交的是最新、最重要的条目。每个条目依次尝试各个已登录账号，
+    成功即标记完成；全部失败则按退避策略安排重试，多次失败后转入死信。
+    可以独立于RSS获取单独调用。
+
+    Returns:
+        bool: 处理是否成功
+    """
+    items = outbox.due()
+    if not items:
+        logging.info("RSS源没有新的更新")
         return True
+    logging.info(f"发件箱中有 {len(items)} 个条目待提交")
+
+    logged_in = await prepare_accounts()
+    if logged_in is None:
+        return False
+
+    # 串行处理避免文件夹创建冲突
+    for item in scheduler.order(items, RSS_TAGS) if logged_in else []:
+        check_budget()
+        await submit_item(item, logged_in)
+    return True
+
+
+async def run_stages(*stages):
+    """并发运行流水线的各个阶段，任一阶段出错（如超出截止时间）时取消其余阶段并抛出该异常"""
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_pipeline(feeds=None):
+    """以流水线处理RSS源：获取解析 → 番剧标题 → 去重 → 下载提交
+
+    各阶段通过有界队列连接，一个RSS源解析完成后其条目立即进入下一阶段，
+    不必等待所有RSS源获取完毕；下游处理不过来时上游在队列满时等待（背压）。
+    新条目在本周期所有RSS源都处理完后统一选择版本，并按调度顺序提交；
+    提交阶段优先提交本周期新发现的条目，空闲时（包括等待新条目期间）提交发件箱中待重试的条目。
+
+    Args:
+        feeds: 只获取指定的RSS源，默认获取全部
+
+    Returns:
+        bool: 处理是否成功
+    """
+    global mylist, pending_entries, last_first_submission
+    started = time.monotonic()
+    last_first_submission = None
+    title_stats = dict(title_requests.stats)
+    feed_queue = asyncio.Queue()
+    parsed_queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    entry_queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    submit_queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+
+    feeds = RSS if feeds is None else feeds
+    for rss_url in feeds:
+        feed_queue.put_nowait(rss_url)
+    fetch_workers = max(1, min(FETCH_CONCURRENCY, len(feeds)))
+    for _ in range(fetch_workers):
+        feed_queue.put_nowait(None)
+
+    # 上个周期顺延的条目作为第一批进入去重阶段，已计入 mylist，若本周期再次超时可以继续顺延
+    mylist = list(pending_entries)
+    if pending_entries:
+        entry_queue.put_nowait((pending_entries, True))
+    pending_entries = []
+
+    async def fetch_worker():
+        while True:
+            rss_url = await feed_queue.get()
+            if rss_url is None:
+                return
+            fetched = await fetch_feed(rss_url)
+            if fetched and fetched[1]:
+                await parsed_queue.put((rss_url, *fetched))
+
+    async def title_worker():
+        while True:
+            parsed = await parsed_queue.get()
+            if parsed is None:
+                return
+            entries = await resolve_titles(*parsed)
+            if entries:
+                await entry_queue.put((entries, False))
+
+    async def dedupe_worker():
+        seen = set()
+        candidates = []
+        while True:
+            batch = await entry_queue.get()
+            if batch is None:
+                break
+            entries, carried = batch
+            # 不同RSS源中的同一种子只处理一次
+            entries = [entry for entry in entries if entry[RSS_KEY_TORRENT] not in seen]
+            seen.update(entry[RSS_KEY_TORRENT] for entry in entries)
+            if not carried:
+                mylist.extend(entries)
+
+            # 先检查本地文件是否存在，不在发件箱中但本地已有种子文件的条目视为旧版本已处理过
+            for entry in entries:
+                try:
+                    torrent = entry[RSS_KEY_TORRENT]
+                    if outbox.contains(torrent):
+                        continue
+                    name = torrent.split('/')[-1]
+                    folder = f'torrent/{entry[RSS_KEY_BGM_TITLE]}'
+                    if not await check_torrent(0, folder, name, torrent, "local"):
+                        history.add(torrent)
+                        continue
+                    candidates.append(outbox_item(entry))
+                except Exception as e:
+                    logging.error(f"处理条目 {entry.get(RSS_KEY_TITLE, '未知标题')} 时出错: {str(e)}")
+
+        # 同一集的多个版本（不同字幕组、分辨率、v2）只提交最好的一个；等本周期所有RSS源的条目到齐后再选择，
+        # 否则先到达的版本提交后，其他RSS源中更好的版本会被当作升级再提交一次
+        new_items, rejected = episode.select(candidates, unknown_show="未知番剧")
+        for item in rejected:
+            history.add(item["torrent"])
+        if not new_items:
+            return
+        # 先写入发件箱，即使本周期未能提交也会在之后重试
+        added = outbox.enqueue(new_items)
+        logging.info(f"{added} 个新条目已加入发件箱")
+        # 新条目与发件箱中的积压条目一样按优先级和加权公平排队提交
+        for item in scheduler.order(new_items, RSS_TAGS):
+            await submit_queue.put(item)
+
+    async def submit_worker():
+        global last_first_submission
+        # 查询已提交任务的状态，失败或过期的任务放回发件箱
+        await track_tasks()
+        # 发件箱中之前失败待重试的条目，在没有新条目时提交
+        backlog = scheduler.order(outbox.due(), RSS_TAGS)
+        backlog.reverse()
+        logged_in = None
+        login_failed = False
+        queue_done = False
+        while not (queue_done and not backlog):
+            if not submit_queue.empty() or not backlog:
+                item = await submit_queue.get()
+                if item is None:
+                    queue_done = True
+                    continue
+            else:
+                item = backlog.pop()
+            # 没有条目需要提交时不登录；登录失败时继续取出条目，避免上游阻塞，条目留在发件箱中
+            if logged_in is None and not login_failed:
+                logged_in = await prepare_accounts()
+                login_failed = logged_in is None
+            if not logged_in:
+                continue
+            # 串行处理避免文件夹创建冲突
+            check_budget()
+            if await submit_item(item, logged_in) and last_first_submission is None:
+                last_first_submission = time.monotonic() - started
+                logging.info(f"本周期首个条目在开始后 {last_first_submission:.1f} 秒提交")
+                tracing.set_attributes(time_to_first_submission=round(last_first_submission, 3))
+        return not login_failed
+
+    async def stage(workers, downstream, consumers):
+        # 本阶段全部完成后通知下游的每个消费者
+        await asyncio.gather(*workers)
+        for _ in range(consumers):
+            await downstream.put(None)
 
+    submitted = asyncio.ensure_future(submit_worker())
+    await run_stages(
+        stage([fetch_worker() for _ in range(fetch_workers)], parsed_queue, TITLE_CONCURRENCY),
+        stage([title_worker() for _ in range(TITLE_CONCURRENCY)], entry_queue, 1),
+        stage([dedupe_worker()], submit_queue, 1),
+        submitted,
+    )
+    title_calls = title_requests.stats["calls"] - title_stats["calls"]
+    if title_calls:
+        coalesced = title_requests.stats["coalesced"] - title_stats["coalesced"]
+        logging.info(f"本周期获取番剧标题 {title_calls} 次，其中 {coalesced} 次与进行中的相同请求合并")
+        tracing.set_attributes(title_requests=title_calls, title_coalesced=coalesced)
+    return submitted.result()
 
-async def process_rss():
+
+async def track_tasks():
+    """到达轮询时间时批量查询已提交离线任务的状态
+
+    失败或过期的任务会被放回发件箱，在下一次提交时重新提交。
+    """
+    if not tracker.poll_due():
+        return
+    clients = {i: client for i, client in enumerate(PIKPAK_CLIENTS)
+               if not isinstance(client, str) and owns_account(i)}
+    try:
+        await tracker.poll(clients)
+    except Exception as e:
+        logging.error(f"查询离线任务状态失败: {str(e)}")
+
+
+def cycle_deadline_seconds():
+    """单次处理周期的时间预算（秒）"""
+    return CYCLE_DEADLINE if CYCLE_DEADLINE > 0 else INTERVAL_TIME_RSS
+
+
+def carry_over_entries():
+    """将本周期未处理完的条目顺延到下个周期"""
+    global pending_entries
+    # 已写入发件箱的条目会由发件箱继续提交，无需顺延
+    pending_entries = [entry for entry in mylist
+                       if not history.contains(entry[RSS_KEY_TORRENT])
+                       and not outbox.contains(entry[RSS_KEY_TORRENT])]
+    return len(pending_entries)
+
+
+def merge_entries(*entry_lists):
+    """按种子URL合并多个条目列表，保留先出现的条目"""
+    merged = {}
+    for entries in entry_lists:
+        for entry in entries:
+            merged.setdefault(entry[RSS_KEY_TORRENT], entry)
+    return list(merged.values())
+
+
+def check_budget():
+    """剩余预算不足以处理新条目时停止本周期
+
+    Raises:
+        deadline.DeadlineExceeded: 剩余时间不足
+    """
+    remaining = deadline.remaining()
+    if remaining is not None and remaining < MIN_ITEM_BUDGET:
+        raise deadline.DeadlineExceeded(f"周期剩余时间不足 {MIN_ITEM_BUDGET} 秒")
+
+
+async def process_rss(feeds=None):
+    """处理RSS源中的新条目
+
+    整个周期受 cycle_deadline 限制，超时后取消未完成的工作，
+    未处理完的条目顺延到下个周期。
+
+    Args:
+        feeds: 只获取指定的RSS源（如新增的RSS源），默认获取全部
+
+    Returns:
+        bool: 处理是否成功
+    """
+    global last_cycle_timed_out
+    last_cycle_timed_out = False
+    metrics.set_next_poll(None)
+    started = time.monotonic()
+    with tracing.span("cycle", feeds=len(feeds) if feeds is not None else len(RSS), full=feeds is None):
+        try:
+            result = await deadline.run(_process_rss(feeds), cycle_deadline_seconds())
+            tracing.set_attributes(ok=result)
+            metrics.record_cycle(time.monotonic() - started, result)
+            return result
+        except deadline.DeadlineExceeded as e:
+            last_cycle_timed_out = True
+            count = carry_over_entries()
+            logging.warning(f"{str(e)}，已取消未完成的工作，{count} 个条目顺延到下个周期")
+            tracing.set_attributes(ok=False, timed_out=True, carried_over=count)
+            metrics.record_cycle(time.monotonic() - started, False, timed_out=True)
+            save_client()
+            return False
+
+
+async def _process_rss(feeds=None):
     """处理RSS源中的新条目
     
     这是主要的业务逻辑函数，处理下载和提交离线任务
@@ -711,79 +1527,24 @@ async def process_rss():
     Returns:
         bool: 处理是否成功
     """
-    global mylist, processed_torrents
+    # 完整检查会获取所有RSS源，之前的立即获取请求已无必要
+    if feeds is None:
+        take_fetch_requests()
+        # 多进程模式下只获取分配给本进程的RSS源
+        if lease.enabled:
+            feeds = lease.balance(lease.FEED, RSS)
     try:
         # 刷新 token
         await auto_refresh_token()
         
-        # 获取 RSS 种子列表
-        mylist = await get_rss()
+        # 获取RSS源、去重并提交，各阶段以流水线方式重叠进行，顺延的条目优先处理
+        ok = await run_pipeline(feeds)
         if not mylist:
             logging.warning("获取到的RSS列表为空，请检查RSS链接是否有效")
-            return False
-            
-        # 先检查本地文件是否存在，减少重复请求次数
-        needLogin = False
-        for entry in mylist:
-            try:
-                torrent = entry[RSS_KEY_TORRENT]
-                name = torrent.split('/')[-1]
-                folder = f'torrent/{entry[RSS_KEY_BGM_TITLE]}'
-                
-                # 检查本地是否存在
-                if os.path.exists(f'{folder}/{name}'):
-                    # 已存在的种子加入到处理集合中
-                    processed_torrents.add(torrent)
-                    continue
-                    
-                need_login_for_entry = await check_torrent(0, folder, name, torrent, "local")
-                needLogin = needLogin or need_login_for_entry
-            except Exception as e:
-                logging.error(f"处理条目 {entry.get(RSS_KEY_TITLE, '未知标题')} 时出错: {str(e)}")
-                continue
-
-        # 如果需要下载文件，则登录（若有token，实际上是复用之前的连接状态）
-        if needLogin:
-            # 尝试登录所有账号
-            login_tasks = [login(i) for i in range(len(USER))]
-            login_results = await asyncio.gather(*login_tasks, return_exceptions=True)
-            
-            # 检查登录结果
-            all_failed = True
-            for i, result in enumerate(login_results):
-                if isinstance(result, Exception):
-                    logging.error(f"账号 {USER[i]} 登录失败: {str(result)}")
-                elif result is True:
-                    all_failed = False
-                
-            if all_failed:
-                logging.error("所有账号登录失败，将在下次循环重试")
-                return False
-                
-            # 遍历所有账号和 RSS 列表，串行处理避免文件夹创建冲突
-            for i in range(len(USER)):
-                for entry in mylist:
-                    try:
-                        torrent = entry[RSS_KEY_TORRENT]
-                        name = torrent.split('/')[-1]
-                        folder = f'torrent/{entry[RSS_KEY_BGM_TITLE]}'
-                        
-                        # 再次检查是否已处理（可能在处理其他账号时已经处理过）
-                        if torrent in processed_torrents:
-                            continue
-                            
-                        result = await check_torrent(i, folder, name, torrent, "network")
-                        if result:
-                            # 成功处理的种子加入到已处理集合
-                            processed_torrents.add(torrent)
-                    except Exception as e:
-                        logging.error(f"处理条目 {entry.get(RSS_KEY_TITLE, '未知标题')} 时出错: {str(e)}")
-                        continue
-            return True
-        else:
-            logging.info("RSS源没有新的更新")
-            return True
+        return ok
             
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         logging.error(f"处理RSS源时发生未预期错误: {str(e)}")
         # 保存当前状态，以免丢失
@@ -879,9 +1640,9 @@ def setup_logging(
 
 
 # 初始化系统
-def init_system():
+def init_system(log_file="rss-pikpak.log"):
     """初始化系统组件"""
-    setup_logging()
+    setup_logging(log_file)
     if load_config():
         init_clients()
         update_config()  # 将当前基本配置写入文件（用户将配置写在main.py内的情况）
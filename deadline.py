@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+周期截止时间模块
+为每次RSS处理周期设置总时间预算，各阶段的超时从剩余预算中推导
+"""
+
+import asyncio
+import contextvars
+import time
+
+MIN_STAGE_TIMEOUT = 1.0  # 单个阶段的最短超时（秒）
+
+_current = contextvars.ContextVar("cycle_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """周期超过截止时间"""
+
+
+class Deadline:
+    """一次处理周期的截止时间"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, default):
+        """阶段超时：取默认值与剩余预算中的较小者"""
+        return max(MIN_STAGE_TIMEOUT, min(default, self.remaining()))
+
+
+def current():
+    """当前任务所属周期的截止时间，不在周期内时返回None"""
+    return _current.get()
+
+
+def timeout(default):
+    """从当前周期的剩余预算推导阶段超时"""
+    deadline = _current.get()
+    return default if deadline is None else deadline.timeout(default)
+
+
+def remaining():
+    """当前周期的剩余秒数，不在周期内时返回None"""
+    deadline = _current.get()
+    return None if deadline is None else deadline.remaining()
+
+
+def expired():
+    """当前周期是否已超时"""
+    deadline = _current.get()
+    return deadline is not None and deadline.expired()
+
+
+async def run(coro, seconds):
+    """在截止时间内运行协程，超时后取消所有未完成的工作
+
+    Raises:
+        DeadlineExceeded: 超过截止时间
+    """
+    token = _current.set(Deadline(seconds))
+    try:
+        return await asyncio.wait_for(coro, seconds)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"处理周期超过 {seconds} 秒截止时间") from None
+    finally:
+        _current.reset(token)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PikPak 云盘列表模块
+按页惰性列出文件夹内容，类型过滤交给服务端，找到目标后立即停止翻页
+"""
+
+from contextlib import aclosing
+
+import ratelimit
+
+PAGE_SIZE = 100          # 每页的文件数
+FOLDER_KIND = "drive#folder"
+
+
+async def iter_files(client, parent_id, kind=None, page_size=PAGE_SIZE):
+    """逐页列出文件夹中的文件，调用方停止迭代后不再请求后续页面
+
+    Args:
+        client: PikPakApi 客户端
+        parent_id: 文件夹ID
+        kind: 只列出该类型的文件（如 FOLDER_KIND），由服务端过滤
+        page_size: 每页的文件数
+
+    Yields:
+        dict: 文件信息
+    """
+    additional_filters = {"kind": {"eq": kind}} if kind else None
+    page_token = None
+    while True:
+        await ratelimit.acquire(ratelimit.PIKPAK_HOST)
+        result = await client.file_list(size=page_size, parent_id=parent_id, next_page_token=page_token,
+                                        additional_filters=additional_filters)
+        for file in result.get("files", []):
+            # 服务端忽略过滤条件时在本地兜底
+            if kind and file.get("kind") != kind:
+                continue
+            yield file
+        page_token = result.get("next_page_token")
+        if not page_token:
+            return
+
+
+async def find_file(client, parent_id, predicate, kind=None):
+    """在文件夹中查找第一个满足条件的文件，找到后不再翻页
+
+    Returns:
+        dict: 文件信息，未找到时返回None
+    """
+    async with aclosing(iter_files(client, parent_id, kind)) as files:
+        async for file in files:
+            if predicate(file):
+                return file
+    return None
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+剧集去重模块
+从条目标题中解析集数、季数、字幕组、分辨率和版本，同一部番剧的同一集只提交按偏好策略最好的版本
+
+配置示例（config.json 中的 episode_policy 字段）:
+    {
+        "default": {"groups": ["ANi", "喵萌奶茶屋"], "resolutions": [1080, 2160, 720]},
+        "shows": {"葬送的芙莉莲": {"groups": ["LoliHouse"], "upgrade": false}}
+    }
+
+groups / resolutions 越靠前越优先，未列出的排在最后；同一字幕组和分辨率时版本号高的优先（v2 > v1）。
+upgrade 为 true（默认）时，之后出现更好的版本会再次提交；enabled 为 false 时该番剧不做剧集去重。
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import namedtuple
+
+import history
+import outbox
+
+DEFAULT_POLICY = {
+    "enabled": True,
+    "groups": [],
+    "resolutions": [1080, 2160, 720, 480],
+    "upgrade": True,
+}
+
+Release = namedtuple("Release", ["episode", "season", "group", "resolution", "version"])
+
+CHINESE_NUMERALS = {"一": 1, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9, "十": 10}
+
+GROUP_RE = re.compile(r"^\s*[\[【]([^\]】]+)[\]】]")
+RESOLUTION_RE = re.compile(r"(?<!\d)(?:(\d{3,4})[pP]|\d{3,4}[xX×](\d{3,4}))(?!\d)|\b(4K)\b", re.I)
+VERSION_RE = re.compile(r"(?<=\d)[vV](\d)\b|[\[【\s][vV](\d)[\]】\s]")
+# 合集（如 [01-12]、[01~12]）不是单集，不做剧集去重
+BATCH_RE = re.compile(r"[\[【]\d{1,4}\s*[-~～]\s*\d{1,4}|\s\d{1,4}[-~～]\d{1,4}(?=[\s\[【]|$)|合集|全集")
+EPISODE_RES = [
+    re.compile(r"\bS\d{1,2}E(\d{1,4}(?:\.\d)?)\b", re.I),
+    re.compile(r"第(\d{1,4}(?:\.\d)?)[话話集]"),
+    re.compile(r"[\[【](\d{1,4}(?:\.\d)?)(?:\s*[vV]\d)?(?:\s*END)?[\]】]", re.I),
+    re.compile(r"\s[-–]\s(\d{1,4}(?:\.\d)?)(?:[vV]\d)?(?=\s|$|[\[【(（])"),
+    re.compile(r"\bE[Pp]?(\d{1,4}(?:\.\d)?)\b"),
+]
+SEASON_RES = [
+    re.compile(r"第([一二三四五六七八九十\d]{1,3})季"),
+    re.compile(r"\bS(\d{1,2})(?:E\d+)?\b", re.I),
+    re.compile(r"\bSeason\s*(\d{1,2})\b", re.I),
+    re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)\s+Season\b", re.I),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    show TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    episode REAL NOT NULL,
+    torrent TEXT NOT NULL,
+    title TEXT,
+    group_name TEXT,
+    resolution INTEGER,
+    version INTEGER NOT NULL DEFAULT 1,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (show, season, episode)
+);
+"""
+
+outbox.register_schema(SCHEMA)
+
+_config = {}
+_lock = threading.Lock()
+
+
+def _season_number(text):
+    if text.isdigit():
+        return int(text)
+    if text in CHINESE_NUMERALS:
+        return CHINESE_NUMERALS[text]
+    if text.startswith("十") and text[1:] in CHINESE_NUMERALS:
+        return 10 + CHINESE_NUMERALS[text[1:]]
+    return 1
+
+
+def parse(title):
+    """从条目标题中解析剧集信息，无法确定集数（如合集）时 episode 为None"""
+    group = GROUP_RE.match(title)
+    group = group.group(1).strip() if group else None
+
+    resolution = None
+    match = RESOLUTION_RE.search(title)
+    if match:
+        resolution = 2160 if match.group(3) else int(match.group(1) or match.group(2))
+
+    version = 1
+    match = VERSION_RE.search(title)
+    if match:
+        version = int(match.group(1) or match.group(2))
+
+    season = 1
+    for pattern in SEASON_RES:
+        match = pattern.search(title)
+        if match:
+            season = _season_number(match.group(1))
+            break
+
+    episode = None
+    if not BATCH_RE.search(title):
+        for pattern in EPISODE_RES:
+            match = pattern.search(title)
+            # 排除被误认为集数的分辨率，如 [1080]
+            if match and not (pattern is EPISODE_RES[2] and match.group(1) in ("480", "720", "1080", "2160")):
+                episode = float(match.group(1))
+                break
+    return Release(episode, season, group, resolution, version)
+
+
+def describe(release):
+    """版本的简短描述，用于日志"""
+    parts = [release.group or "未知字幕组"]
+    if release.resolution:
+        parts.append(f"{release.resolution}p")
+    parts.append(f"v{release.version}")
+    return " ".join(parts)
+
+
+def configure(config):
+    """应用配置文件中的剧集偏好策略"""
+    global _config
+    with _lock:
+        _config = config if isinstance(config, dict) else {}
+
+
+def export_config():
+    return _config
+
+
+def policy_for(show):
+    """返回番剧生效的偏好策略（默认值 < default < shows 中该番剧的设置）"""
+    policy = dict(DEFAULT_POLICY)
+    policy.update(_config.get("default") or {})
+    policy.update((_config.get("shows") or {}).get(show) or {})
+    return policy
+
+
+def _rank(value, preferred, match):
+    """越靠前的偏好排名越高，未列出的为0"""
+    if value is not None:
+        for index, item in enumerate(preferred):
+            if match(value, item):
+                return len(preferred) - index
+    return 0
+
+
+def score(release, policy):
+    """按策略计算版本的优先级，值越大越好：字幕组 > 分辨率 > 版本号"""
+    group_rank = _rank(release.group, policy.get("groups") or [],
+                       lambda group, item: str(item).casefold() in group.casefold())
+    resolution_rank = _rank(release.resolution, policy.get("resolutions") or [],
+                            lambda resolution, item: int(item) == resolution)
+    return group_rank, resolution_rank, release.version
+
+
+def _recorded(show, release):
+    """查询已选中的版本及其提交状态
+
+    选中的版本转入死信或被移出发件箱（RSS源被移除）时不再有效，视为没有记录，其他版本可以重新参与选择。
+
+    Returns:
+        tuple: (已选中的版本或None, 是否已提交成功)
+    """
+    with outbox.db_lock:
+        conn = outbox.connect()
+        row = conn.execute(
+            "SELECT * FROM episodes WHERE show = ? AND season = ? AND episode = ?",
+            (show, release.season, release.episode)).fetchone()
+        if row is None:
+            return None, False
+        state = conn.execute("SELECT state FROM outbox WHERE torrent = ?", (row["torrent"],)).fetchone()
+    recorded = Release(row["episode"], row["season"], row["group_name"], row["resolution"], row["version"])
+    if history.contains(row["torrent"]) or (state is not None and state["state"] == outbox.DONE):
+        return recorded, True
+    if state is not None and state["state"] == outbox.PENDING:
+        return recorded, False
+    return None, False
+
+
+def _remember(show, release, item):
+    with outbox.db_lock:
+        conn = outbox.connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO episodes (show, season, episode, torrent, title, group_name, resolution, version, "
+            "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (show, release.season, release.episode, item["torrent"], item.get("title"), release.group,
+             release.resolution, release.version, time.time()))
+        conn.commit()
+
+
+def remember(item, unknown_show=None):
+    """记录一集已提交的版本，用于不经过发件箱选择的条目（如补全任务）提交成功之后"""
+    show = item.get("bangumi_title")
+    release = parse(item.get("title") or "")
+    if not show or show == unknown_show or not policy_for(show).get("enabled", True) or release.episode is None:
+        return
+    _remember(show, release, item)
+
+
+def select(items, unknown_show=None, record=True):
+    """同一集只保留最好的版本，并与已提交的版本比较
+
+    Args:
+        items: 发件箱记录列表，包含 torrent、title、bangumi_title
+        unknown_show: 无法确定番剧时的标题，这类条目不做剧集去重
+        record: 是否记录选中的版本；为False时由调用方在提交成功后调用 remember()
+
+    Returns:
+        tuple: (需要提交的条目（保持原有顺序）, 被已提交成功的更好版本取代的条目)
+        更好的版本还在等待提交时，较差的版本两者都不属于，留到之后的循环重新比较，
+        这样更好的版本转入死信后其他版本仍有机会被提交
+    """
+    best = {}
+    losers = {}
+    passthrough = set()
+    for index, item in enumerate(items):
+        show = item.get("bangumi_title")
+        policy = policy_for(show)
+        release = parse(item.get("title") or "")
+        if not show or show == unknown_show or not policy.get("enabled", True) or release.episode is None:
+            passthrough.add(index)
+            continue
+        key = (show, release.season, release.episode)
+        current = score(release, policy)
+        if key in best and current <= best[key][0]:
+            losers.setdefault(key, []).append(item)
+            continue
+        if key in best:
+            losers.setdefault(key, []).append(items[best[key][1]])
+        best[key] = (current, index, release, policy)
+
+    selected = set(passthrough)
+    rejected = []
+    deferred = []
+    for key, (current, index, release, policy) in best.items():
+        show = key[0]
+        recorded, submitted = _recorded(show, release)
+        if recorded is not None and (not policy.get("upgrade", True) or current <= score(recorded, policy)):
+            (rejected if submitted else deferred).extend([items[index]] + losers.get(key, []))
+            continue
+        if recorded is not None:
+            logging.info(f"发现更好的版本: {items[index].get('title')}（替代 {describe(recorded)}）")
+        if record:
+            _remember(show, release, items[index])
+        selected.add(index)
+        deferred.extend(losers.get(key, []))
+
+    for item in rejected:
+        logging.info(f"已有同一集更好的版本，跳过: {item.get('title')}")
+    for item in deferred:
+        logging.info(f"同一集更好的版本尚未提交，暂不处理: {item.get('title')}")
+    return [item for index, item in enumerate(items) if index in selected], rejected
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+条目过滤模块
+按全局、标签和RSS源配置包含/排除规则、大小范围、发布时间窗口和每周期条目上限，
+编译为合并的正则后在抓取前过滤条目
+
+配置示例（config.json 中的 filters 字段）:
+    {
+        "global": {"exclude": ["720p", "re:\\\\[合集\\\\]"], "max_age_days": 30},
+        "tags": {"国漫": {"include": ["1080p"]}},
+        "feeds": {"https://mikanani.me/RSS/...": {"min_size": 100, "max_size": 4096, "max_items": 10}}
+    }
+
+规则以 "re:" 开头时视为正则表达式，否则为不区分大小写的关键词；大小单位为MB。
+max_age_days（只处理最近N天发布的条目）和 max_items（每个周期最多处理的新条目数）
+以更具体的配置为准（RSS源 > 标签 > 全局），0 表示不限制。
+"""
+
+import logging
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+REGEX_PREFIX = "re:"
+MB = 1024 * 1024
+DEFAULT_MAX_ITEMS = 50  # 未配置时每个RSS源每周期最多处理的新条目数，避免新订阅时积压的旧条目一次性涌入
+MIKAN_TZ = timezone(timedelta(hours=8))  # 蜜柑的发布时间不带时区，为北京时间
+FRACTION_RE = re.compile(r"(?<=:\d\d)\.\d+")
+INLINE_FLAGS_RE = re.compile(r"^\(\?([aiLmsux]+)\)")
+
+_config = {}
+_cache = {}
+_lock = threading.Lock()
+
+
+class _RuleList:
+    """无法合并为一个正则时逐条匹配，接口与合并的正则相同"""
+
+    def __init__(self, patterns):
+        self.patterns = patterns
+
+    def search(self, text):
+        for pattern in self.patterns:
+            match = pattern.search(text)
+            if match:
+                return match
+        return None
+
+
+def _scoped(pattern):
+    """将开头的全局内联标志（如 (?i)）改为只作用于该规则的分组，合并后仍然有效"""
+    match = INLINE_FLAGS_RE.match(pattern)
+    if match:
+        return f"(?{match.group(1)}:{pattern[match.end():]})"
+    return f"(?:{pattern})"
+
+
+def _compile_rules(rules):
+    """将一组关键词和正则合并为一个正则，没有有效规则时返回None"""
+    parts = []
+    for rule in rules or []:
+        if not isinstance(rule, str) or not rule:
+            continue
+        if rule.startswith(REGEX_PREFIX):
+            pattern = rule[len(REGEX_PREFIX):]
+            part = _scoped(pattern)
+            # 以合并时的形式检查，单独有效但合并后无效的规则也会被发现
+            try:
+                re.compile(part, re.IGNORECASE)
+            except re.error as e:
+                logging.warning(f"忽略无效的过滤正则 {pattern}: {str(e)}")
+                continue
+            parts.append(part)
+        else:
+            parts.append(re.escape(rule))
+    if not parts:
+        return None
+    # 关键词去重后合并，规则很多时也只需一次匹配
+    parts = list(dict.fromkeys(parts))
+    try:
+        return re.compile("|".join(parts), re.IGNORECASE)
+    except re.error as e:
+        # 各规则有效但不能合并（如重名的命名分组）时逐条匹配
+        logging.warning(f"过滤规则无法合并，将逐条匹配: {str(e)}")
+        return _RuleList([re.compile(part, re.IGNORECASE) for part in parts])
+
+
+class CompiledFilter:
+    """某个RSS源（及其标签）生效的合并规则"""
+
+    def __init__(self, rule_sets):
+        self.includes = []  # 每个带包含规则的规则集都需要至少命中一条
+        excludes = []
+        self.min_size = 0
+        self.max_size = 0
+        self.max_age_days = 0
+        self.max_items = DEFAULT_MAX_ITEMS
+        for name, rules in rule_sets:
+            include = _compile_rules(rules.get("include"))
+            if include is not None:
+                self.includes.append((name, include))
+            excludes.extend(rules.get("exclude") or [])
+            min_size = float(rules.get("min_size") or 0) * MB
+            max_size = float(rules.get("max_size") or 0) * MB
+            self.min_size = max(self.min_size, min_size)
+            if max_size and (not self.max_size or max_size < self.max_size):
+                self.max_size = max_size
+            # 时间窗口和条目上限以更具体的配置为准
+            if "max_age_days" in rules:
+                self.max_age_days = float(rules.get("max_age_days") or 0)
+            if "max_items" in rules:
+                self.max_items = int(rules.get("max_items") or 0)
+        self.exclude = _compile_rules(excludes)
+
+    @property
+    def empty(self):
+        return (not self.includes and self.exclude is None and not self.min_size and not self.max_size
+                and not self.max_age_days)
+
+    def accepts(self, title, size=None, published=None):
+        """判断条目是否通过过滤
+
+        Args:
+            title: 条目标题
+            size: 文件大小（字节），未知时为None，此时不做大小检查
+            published: 发布时间（带时区的datetime），未知时为None，此时不做时间检查
+
+        Returns:
+            tuple: (是否通过, 未通过的原因)
+        """
+        if self.max_age_days and published is not None:
+            age = datetime.now(timezone.utc) - published
+            if age > timedelta(days=self.max_age_days):
+                return False, f"发布于 {age.days} 天前，超出 {self.max_age_days:g} 天的时间窗口"
+        if self.exclude is not None:
+            match = self.exclude.search(title)
+            if match:
+                return False, f"命中排除规则 {match.group(0)}"
+        for name, include in self.includes:
+            if not include.search(title):
+                return False, f"未命中{name}的包含规则"
+        if size:
+            if self.min_size and size < self.min_size:
+                return False, f"小于 {self.min_size / MB:.0f}MB"
+            if self.max_size and size > self.max_size:
+                return False, f"大于 {self.max_size / MB:.0f}MB"
+        return True, None
+
+
+def configure(config):
+    """应用配置文件中的过滤规则，并清空已编译的缓存"""
+    global _config
+    with _lock:
+        _config = config if isinstance(config, dict) else {}
+        _cache.clear()
+
+
+def export_config():
+    return _config
+
+
+def matcher(feed_url, tag=None):
+    """返回RSS源生效的过滤器，结果按 (RSS源, 标签) 缓存"""
+    key = (feed_url, tag or "")
+    with _lock:
+        compiled = _cache.get(key)
+        if compiled is None:
+            rule_sets = [("全局", _config.get("global") or {})]
+            if tag:
+                rule_sets.append((f"标签 {tag} ", (_config.get("tags") or {}).get(tag) or {}))
+            rule_sets.append(("RSS源", (_config.get("feeds") or {}).get(feed_url) or {}))
+            compiled = _cache[key] = CompiledFilter(rule_sets)
+        return compiled
+
+
+def parse_published(value):
+    """解析发布时间字符串，返回带时区的datetime，无法解析时返回None
+
+    支持 ISO 8601（蜜柑的 2024-04-07T21:30:00.4，不带时区时按北京时间处理）和 RFC 822 格式。
+    """
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    try:
+        # 旧版本 Python 只接受3位或6位小数秒，秒以下的精度不需要
+        published = datetime.fromisoformat(FRACTION_RE.sub("", value).replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            published = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=MIKAN_TZ)
+    return published
+
+
+def entry_published(entry, key="published"):
+    """读取RSS条目的发布时间（带时区的datetime）"""
+    published = parse_published(entry.get(key))
+    if published is None and entry.get(key + "_parsed"):
+        # feedparser 已解析为UTC时间
+        published = datetime(*entry[key + "_parsed"][:6], tzinfo=timezone.utc)
+    return published
+
+
+def newest(entries, limit, published_of):
+    """按发布时间从新到旧保留最多 limit 个条目，其余留待下个周期
+
+    Args:
+        entries: 条目列表
+        limit: 最多保留的条目数，0 表示不限制
+        published_of: 返回条目发布时间的函数，未知时返回None
+
+    Returns:
+        tuple: (保留的条目（保持原有顺序）, 推迟的条目数)
+    """
+    if not limit or len(entries) <= limit:
+        return entries, 0
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    ranked = sorted(range(len(entries)), key=lambda i: published_of(entries[i]) or oldest, reverse=True)
+    kept = set(ranked[:limit])
+    return [entry for i, entry in enumerate(entries) if i in kept], len(entries) - limit
+
+
+def entry_size(entry):
+    """从RSS条目的附件信息中读取文件大小（字节）"""
+    for enclosure in entry.get("enclosures") or []:
+        try:
+            length = int(enclosure.get("length") or 0)
+        except (TypeError, ValueError):
+            continue
+        if length:
+            return length
+    return None
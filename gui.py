@@ -13,6 +13,12 @@ from io import StringIO
 
 # 导入核心功能模块
 import core
+import circuit
+import trigger
+import opml
+import state
+import metrics
+import titles
 # 导入版本信息
 from version import get_version_info
 
@@ -48,6 +54,12 @@ class BangumiPikPakGUI:
         # 设置定时检查日志队列
         self.root.after(100, self.check_log_queue)
         
+        # 定时刷新RSS源的熔断状态
+        self.root.after(1000, self.refresh_circuit_states)
+        
+        # 定时刷新状态页
+        self.root.after(1000, self.refresh_status)
+        
     def setup_logger(self):
         """设置日志记录器，将日志同时输出到文件和GUI"""
         # 创建GUI日志处理器
@@ -74,14 +86,21 @@ class BangumiPikPakGUI:
         settings_tab = ttk.Frame(tab_control)
         tab_control.add(settings_tab, text="设置")
         
+        # 创建"状态"选项卡
+        status_tab = ttk.Frame(tab_control)
+        tab_control.add(status_tab, text="状态")
+        
         # 创建"日志"选项卡
         log_tab = ttk.Frame(tab_control)
         tab_control.add(log_tab, text="日志")
         
         tab_control.pack(fill=tk.BOTH, expand=True)
+        self.tab_control = tab_control
+        self.status_tab = status_tab
         
         # 设置选项卡内容
         self.setup_settings_tab(settings_tab)
+        self.setup_status_tab(status_tab)
         self.setup_log_tab(log_tab)
         
         # 底部状态栏
@@ -133,16 +152,18 @@ class BangumiPikPakGUI:
         rss_container.pack(fill=tk.BOTH, expand=True)
         
         # RSS链接列表 - 使用Treeview替代Listbox以支持多列显示
-        columns = ("url", "tag")
+        columns = ("url", "tag", "state")
         self.rss_tree = ttk.Treeview(rss_container, columns=columns, show="headings", height=6, selectmode="extended")
         
         # 设置列标题
         self.rss_tree.heading("url", text="RSS链接")
         self.rss_tree.heading("tag", text="标签")
+        self.rss_tree.heading("state", text="状态")
         
         # 设置列宽
         self.rss_tree.column("url", width=400, anchor="w")
         self.rss_tree.column("tag", width=150, anchor="w")
+        self.rss_tree.column("state", width=120, anchor="w")
         
         # 添加滚动条
         rss_scrollbar = ttk.Scrollbar(rss_container, orient=tk.VERTICAL, command=self.rss_tree.yview)
@@ -159,6 +180,10 @@ class BangumiPikPakGUI:
         # 编辑标签按钮
         ttk.Button(tree_buttons_frame, text="编辑标签", command=self.edit_tag).pack(side=tk.LEFT, padx=5)
         
+        # OPML导入导出按钮
+        ttk.Button(tree_buttons_frame, text="导入OPML", command=self.import_opml).pack(side=tk.LEFT, padx=5)
+        ttk.Button(tree_buttons_frame, text="导出OPML", command=self.export_opml).pack(side=tk.LEFT)
+        
         # RSS操作按钮框架
         rss_button_frame = ttk.Frame(rss_frame)
         rss_button_frame.pack(fill=tk.X, pady=5)
@@ -209,6 +234,137 @@ class BangumiPikPakGUI:
         self.interval_var = tk.StringVar(value="10")
         ttk.Entry(interval_frame, textvariable=self.interval_var, width=5).pack(side=tk.LEFT, padx=5)
     
+    def setup_status_tab(self, parent):
+        """状态选项卡布局和内容：RSS源、处理周期、缓存命中率和账号提交情况"""
+        status_frame = ttk.Frame(parent, padding="10")
+        status_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # RSS源状态
+        feed_frame = ttk.LabelFrame(status_frame, text="RSS源", padding="5")
+        feed_frame.pack(fill=tk.BOTH, expand=True)
+        columns = ("url", "latency", "items", "errors", "fetched", "next", "state")
+        self.feed_status_tree = ttk.Treeview(feed_frame, columns=columns, show="headings", height=6)
+        for column, text, width in (("url", "RSS链接", 300), ("latency", "耗时", 70), ("items", "新条目", 60),
+                                    ("errors", "错误", 50), ("fetched", "上次获取", 80),
+                                    ("next", "下次检查", 80), ("state", "熔断状态", 120)):
+            self.feed_status_tree.heading(column, text=text)
+            self.feed_status_tree.column(column, width=width, anchor="w")
+        feed_scrollbar = ttk.Scrollbar(feed_frame, orient=tk.VERTICAL, command=self.feed_status_tree.yview)
+        self.feed_status_tree.configure(yscrollcommand=feed_scrollbar.set)
+        self.feed_status_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        feed_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        bottom_frame = ttk.Frame(status_frame)
+        bottom_frame.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
+        
+        # 处理周期耗时（最近的在前）
+        cycle_frame = ttk.LabelFrame(bottom_frame, text="处理周期", padding="5")
+        cycle_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.cycle_summary_label = ttk.Label(cycle_frame, text="暂无记录")
+        self.cycle_summary_label.pack(anchor=tk.W)
+        self.cycle_tree = ttk.Treeview(cycle_frame, columns=("time", "duration", "result"), show="headings", height=5)
+        for column, text, width in (("time", "结束时间", 80), ("duration", "耗时", 70), ("result", "结果", 70)):
+            self.cycle_tree.heading(column, text=text)
+            self.cycle_tree.column(column, width=width, anchor="w")
+        self.cycle_tree.pack(fill=tk.BOTH, expand=True)
+        
+        right_frame = ttk.Frame(bottom_frame)
+        right_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(10, 0))
+        
+        # 番剧标题的缓存命中率
+        cache_frame = ttk.LabelFrame(right_frame, text="缓存", padding="5")
+        cache_frame.pack(fill=tk.X)
+        self.cache_label = ttk.Label(cache_frame, text="暂无记录", justify=tk.LEFT)
+        self.cache_label.pack(anchor=tk.W)
+        
+        # 各账号的提交情况
+        account_frame = ttk.LabelFrame(right_frame, text="账号提交", padding="5")
+        account_frame.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
+        self.account_tree = ttk.Treeview(account_frame, columns=("account", "submitted", "failed", "rate"),
+                                         show="headings", height=3)
+        for column, text, width in (("account", "账号", 150), ("submitted", "已提交", 60),
+                                    ("failed", "失败", 50), ("rate", "每小时", 60)):
+            self.account_tree.heading(column, text=text)
+            self.account_tree.column(column, width=width, anchor="w")
+        self.account_tree.pack(fill=tk.BOTH, expand=True)
+    
+    def refresh_status(self):
+        """刷新状态页，只读取进程内的计数，状态页不可见时跳过"""
+        try:
+            if self.tab_control.select() == str(self.status_tab):
+                self.update_status_tab()
+        except Exception as e:
+            logging.debug(f"刷新状态页失败: {str(e)}")
+        finally:
+            self.root.after(2000, self.refresh_status)
+    
+    @staticmethod
+    def format_clock(timestamp):
+        return datetime.fromtimestamp(timestamp).strftime("%H:%M:%S") if timestamp else "-"
+    
+    @staticmethod
+    def replace_rows(tree, rows):
+        """用新的行替换表格内容，行数不变时原地更新，避免闪烁"""
+        items = tree.get_children()
+        for item, values in zip(items, rows):
+            if tuple(str(value) for value in tree.item(item, "values")) != tuple(str(value) for value in values):
+                tree.item(item, values=values)
+        for item in items[len(rows):]:
+            tree.delete(item)
+        for values in rows[len(items):]:
+            tree.insert("", tk.END, values=values)
+    
+    def update_status_tab(self):
+        """根据运行指标更新状态页的内容"""
+        feed_stats = metrics.feed_stats()
+        next_poll = self.format_clock(metrics.next_poll_at) if metrics.next_poll_at else "检查中"
+        rows = []
+        for item in self.rss_tree.get_children():
+            rss_url = self.rss_tree.item(item, "values")[0]
+            stats = feed_stats.get(rss_url)
+            if stats is None:
+                rows.append((rss_url, "-", "-", "-", "-", next_poll, circuit.feed_breaker(rss_url).describe()))
+                continue
+            rows.append((
+                rss_url,
+                f"{stats['latency'] * 1000:.0f} ms" if stats["latency"] is not None else "-",
+                stats["items"],
+                stats["errors"],
+                self.format_clock(stats["fetched_at"]),
+                next_poll,
+                circuit.feed_breaker(rss_url).describe(),
+            ))
+        self.replace_rows(self.feed_status_tree, rows)
+        
+        cycles = metrics.cycle_history()
+        if cycles:
+            durations = sorted(duration for _, duration, _, _ in cycles)
+            self.cycle_summary_label.config(
+                text=f"最近 {len(cycles)} 个周期: 平均 {sum(durations) / len(durations):.1f} 秒，"
+                     f"最长 {durations[-1]:.1f} 秒")
+            self.replace_rows(self.cycle_tree, [
+                (self.format_clock(ended_at), f"{duration:.1f} 秒", "超时" if timed_out else ("成功" if ok else "失败"))
+                for ended_at, duration, ok, timed_out in reversed(cycles)
+            ])
+        
+        # 不需要请求剧集页的标题解析（频道信息、缓存）视为命中
+        title_hits = titles.stats["channel"] + titles.stats["cache"]
+        title_total = title_hits + titles.stats["bangumi_page"] + titles.stats["episode"]
+        requests = core.title_requests.stats
+        lines = []
+        if title_total:
+            lines.append(f"番剧标题: 命中 {title_hits}/{title_total} ({title_hits * 100 / title_total:.0f}%)，"
+                         f"番剧页 {titles.stats['bangumi_page']}，剧集页 {titles.stats['episode']}")
+        if requests["calls"]:
+            lines.append(f"页面请求合并: {requests['coalesced']}/{requests['calls']} "
+                         f"({requests['coalesced'] * 100 / requests['calls']:.0f}%)")
+        self.cache_label.config(text="\n".join(lines) or "暂无记录")
+        
+        self.replace_rows(self.account_tree, [
+            (account, stats["submitted"], stats["failed"], f"{stats['per_hour']:.0f}")
+            for account, stats in metrics.account_stats().items()
+        ])
+    
     def setup_log_tab(self, parent):
         """日志选项卡布局和内容"""
         log_frame = ttk.Frame(parent, padding="10")
@@ -243,16 +399,14 @@ class BangumiPikPakGUI:
             messagebox.showwarning("提示", "RSS链接格式不正确，必须以http://或https://开头")
             return
             
-        # 避免重复添加
-        current_items = self.rss_tree.get_children()
-        for item in current_items:
-            item_url = self.rss_tree.item(item, "values")[0]
-            if rss_url == item_url:
-                messagebox.showinfo("提示", "该RSS链接已存在")
-                return
+        # 避免重复添加（按规范化后的链接比较）
+        rss_url = opml.normalize_url(rss_url)
+        if rss_url in self.feed_urls():
+            messagebox.showinfo("提示", "该RSS链接已存在")
+            return
             
         # 添加到列表
-        self.rss_tree.insert("", tk.END, values=(rss_url, rss_tag))
+        self.rss_tree.insert("", tk.END, values=(rss_url, rss_tag, circuit.feed_breaker(rss_url).describe()))
         self.new_rss_var.set("")  # 清空输入框
         self.new_tag_var.set("")  # 清空标签
         logging.info(f"添加RSS链接: {rss_url} 标签: {rss_tag}")
@@ -262,6 +416,105 @@ class BangumiPikPakGUI:
         # 更新状态栏
         self.status_label.config(text=f"已添加RSS链接，当前共有 {len(self.rss_tree.get_children())} 个RSS源")
     
+    def feed_urls(self):
+        """列表中所有RSS链接（规范化后）的集合"""
+        return {opml.normalize_url(self.rss_tree.item(item, "values")[0]) for item in self.rss_tree.get_children()}
+    
+    def import_opml(self):
+        """从OPML文件批量导入RSS订阅，新的RSS源在后台并发检查后再确认导入"""
+        file_path = filedialog.askopenfilename(
+            filetypes=[("OPML文件", "*.opml *.xml"), ("所有文件", "*.*")],
+            title="导入OPML"
+        )
+        if not file_path:
+            return
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                imported = opml.parse(f.read())
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"读取OPML文件失败: {str(e)}")
+            return
+        
+        existing = [self.rss_tree.item(item, "values")[0] for item in self.rss_tree.get_children()]
+        new_feeds, skipped = opml.merge(existing, imported)
+        if not new_feeds:
+            messagebox.showinfo("提示", f"OPML中的 {len(imported)} 个RSS源均已订阅")
+            return
+        
+        logging.info(f"OPML中共有 {len(imported)} 个RSS源，{skipped} 个已订阅，正在检查 {len(new_feeds)} 个新RSS源")
+        self.status_label.config(text=f"正在检查 {len(new_feeds)} 个RSS源...")
+        threading.Thread(target=self.validate_imported, args=(new_feeds, skipped), daemon=True).start()
+    
+    def validate_imported(self, new_feeds, skipped):
+        """在后台线程中检查导入的RSS源"""
+        try:
+            results = asyncio.run(opml.validate(
+                [url for url, _ in new_feeds],
+                on_result=lambda result: logging.info(f"检查RSS源: {opml.describe(result)}")))
+        except Exception as e:
+            # except 块结束后 e 会被删除，回调执行时不能再引用它
+            message = f"检查RSS源失败: {str(e)}"
+            logging.error(message)
+            self.root.after(0, lambda: messagebox.showerror("错误", message))
+            return
+        self.root.after(0, lambda: self.confirm_import(new_feeds, results, skipped))
+    
+    def confirm_import(self, new_feeds, results, skipped):
+        """根据检查结果确认要导入的RSS源，并写入配置文件"""
+        reachable = [feed for feed, result in zip(new_feeds, results) if result.reachable]
+        unreachable = len(new_feeds) - len(reachable)
+        summary = f"{len(new_feeds)} 个新RSS源（另有 {skipped} 个已订阅）: {len(reachable)} 个可用，{unreachable} 个不可用"
+        self.status_label.config(text=summary)
+        if unreachable:
+            answer = messagebox.askyesnocancel(
+                "导入OPML", f"{summary}，详见日志。\n\n是: 只导入可用的RSS源\n否: 全部导入\n取消: 不导入")
+            if answer is None:
+                return
+            accepted = reachable if answer else new_feeds
+        else:
+            if not messagebox.askyesno("导入OPML", f"{summary}，确定导入吗？"):
+                return
+            accepted = reachable
+        
+        # 检查期间列表可能已被修改，再次去重
+        known = self.feed_urls()
+        added = 0
+        for rss_url, rss_tag in accepted:
+            if rss_url in known:
+                continue
+            known.add(rss_url)
+            self.rss_tree.insert("", tk.END, values=(rss_url, rss_tag, circuit.feed_breaker(rss_url).describe()))
+            added += 1
+        
+        self.update_core_rss_list()
+        # 尚未保存过配置时只更新列表，由用户填写账号信息后保存
+        if os.path.exists(core.CONFIG_FILE):
+            core.update_config()
+        logging.info(f"已从OPML导入 {added} 个RSS源")
+        self.status_label.config(text=f"已导入 {added} 个RSS源，当前共有 {len(self.rss_tree.get_children())} 个RSS源")
+    
+    def export_opml(self):
+        """将列表中的RSS订阅导出为OPML文件"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".opml",
+            filetypes=[("OPML文件", "*.opml"), ("所有文件", "*.*")],
+            title="导出OPML"
+        )
+        if not file_path:
+            return
+        rss_links = []
+        rss_tags = {}
+        for item in self.rss_tree.get_children():
+            rss_url, tag, _ = self.rss_tree.item(item, "values")
+            rss_links.append(rss_url)
+            if tag:
+                rss_tags[rss_url] = tag
+        try:
+            state.atomic_write(file_path, opml.export(rss_links, rss_tags))
+            messagebox.showinfo("提示", f"已导出 {len(rss_links)} 个RSS源到 {file_path}")
+        except Exception as e:
+            messagebox.showerror("错误", f"导出OPML失败: {str(e)}")
+    
     def remove_rss(self):
         """从列表中移除选中的RSS链接（支持多选）"""
         selected_items = self.rss_tree.selection()
@@ -315,7 +568,8 @@ class BangumiPikPakGUI:
             new_tag = simpledialog.askstring("编辑标签", "请输入新标签:", initialvalue=current_tag)
             if new_tag is not None:
                 # 更新标签
-                self.rss_tree.item(selected_items[0], values=(self.rss_tree.item(selected_items[0], "values")[0], new_tag))
+                rss_url, _, circuit_state = self.rss_tree.item(selected_items[0], "values")
+                self.rss_tree.item(selected_items[0], values=(rss_url, new_tag, circuit_state))
                 logging.info(f"更新RSS链接标签: {new_tag}")
                 
                 # 立即更新核心模块的RSS列表和标签
@@ -329,8 +583,8 @@ class BangumiPikPakGUI:
             if new_tag is not None:
                 # 批量更新所有选中项
                 for item in selected_items:
-                    rss_url = self.rss_tree.item(item, "values")[0]
-                    self.rss_tree.item(item, values=(rss_url, new_tag))
+                    rss_url, _, circuit_state = self.rss_tree.item(item, "values")
+                    self.rss_tree.item(item, values=(rss_url, new_tag, circuit_state))
                 
                 # 立即更新核心模块的RSS列表和标签
                 self.update_core_rss_list()
@@ -367,7 +621,7 @@ class BangumiPikPakGUI:
                 for rss in rss_links:
                     # 获取对应的标签，如果没有则显示空字符串
                     tag = rss_tags.get(rss, "")
-                    self.rss_tree.insert("", tk.END, values=(rss, tag))
+                    self.rss_tree.insert("", tk.END, values=(rss, tag, circuit.feed_breaker(rss).describe()))
                     
                 # 更新检查间隔
                 interval_minutes = config.get("interval", 10)
@@ -415,21 +669,22 @@ class BangumiPikPakGUI:
                 messagebox.showwarning("提示", "检查间隔不能小于1分钟")
                 return
                 
-            # 更新核心模块的全局变量
-            core.USER[0] = username
-            core.PASSWORD[0] = password
-            core.PATH[0] = folder_id
-            core.RSS = rss_links
-            core.RSS_TAGS = rss_tags  # 更新RSS标签
-            core.INTERVAL_TIME_RSS = interval * 60  # 转换为秒
+            # 在当前配置的基础上更新界面中的设置，只应用发生变化的部分
+            # （账号信息变化时才会重新初始化客户端）
+            config = core.current_config()
+            config.update({
+                "username": username,
+                "password": password,
+                "path": folder_id,
+                "rss": rss_links,
+                "rss_tags": rss_tags,
+                "interval": interval,
+            })
+            core.apply_config(config)
             
             # 保存配置
             core.update_config()  # 使用核心模块的方法保存配置
                 
-            # 如果客户端已初始化，需要重新初始化
-            if hasattr(core, 'PIKPAK_CLIENTS') and core.PIKPAK_CLIENTS[0] != "":
-                core.init_clients()
-                
             logging.info("配置已保存")
             messagebox.showinfo("提示", "配置已保存")
             
@@ -444,6 +699,7 @@ class BangumiPikPakGUI:
         if self.is_running:
             # 停止服务
             self.is_running = False
+            trigger.stop()
             self.start_stop_btn.config(text="启动服务")
             self.status_label.config(text="服务已停止")
             logging.info("服务已停止")
@@ -468,26 +724,36 @@ class BangumiPikPakGUI:
             # 初始化客户端
             core.load_config()
             core.init_clients()
+            # 启动推送触发接口（未启用时不做任何事）
+            trigger.start(core.request_fetch, core.is_subscribed)
             
             # 运行主循环
+            feeds = None  # None 表示获取全部RSS源
+            last_full_cycle = time.monotonic()
             while self.is_running:
-                logging.info("开始检查RSS更新...")
-                asyncio.run(core.process_rss())
+                if feeds is None:
+                    logging.info("开始检查RSS更新...")
+                    last_full_cycle = time.monotonic()
+                else:
+                    logging.info(f"立即获取 {len(feeds)} 个RSS源")
+                asyncio.run(core.process_rss(feeds))
                 
                 # 更新运行状态
                 self.root.after(0, lambda: self.status_label.config(text=f"服务运行中... 上次更新: {datetime.now().strftime('%H:%M:%S')}"))
                 
-                # 等待下一次检查
-                for _ in range(core.INTERVAL_TIME_RSS):
-                    if not self.is_running:
-                        break
-                    time.sleep(1)
+                # 等待下一次检查，配置文件被外部修改时同步刷新界面
+                feeds = core.wait_next_cycle(
+                    last_full_cycle,
+                    should_stop=lambda: not self.is_running,
+                    on_reload=lambda changes: self.root.after(0, self.load_config))
                     
         except Exception as e:
-            logging.error(f"服务运行出错: {str(e)}")
-            self.root.after(0, lambda: messagebox.showerror("错误", f"服务运行出错: {str(e)}"))
+            message = f"服务运行出错: {str(e)}"
+            logging.error(message)
+            self.root.after(0, lambda: messagebox.showerror("错误", message))
             self.root.after(0, lambda: self.start_stop_btn.config(text="启动服务"))
             self.is_running = False
+            trigger.stop()
     
     def update_now(self):
         """立即执行一次更新"""
@@ -545,8 +811,9 @@ class BangumiPikPakGUI:
             self.root.after(0, lambda: self.status_label.config(text=f"更新完成 ({datetime.now().strftime('%H:%M:%S')})"))
             
         except Exception as e:
-            logging.error(f"更新失败: {str(e)}")
-            self.root.after(0, lambda: messagebox.showerror("错误", f"更新失败: {str(e)}"))
+            message = f"更新失败: {str(e)}"
+            logging.error(message)
+            self.root.after(0, lambda: messagebox.showerror("错误", message))
             self.root.after(0, lambda: self.status_label.config(text="更新失败"))
     
     def check_log_queue(self):
@@ -561,6 +828,17 @@ class BangumiPikPakGUI:
             # 每100毫秒检查一次队列
             self.root.after(100, self.check_log_queue)
     
+    def refresh_circuit_states(self):
+        """刷新RSS列表中每个源的熔断状态"""
+        try:
+            for item in self.rss_tree.get_children():
+                rss_url, tag, circuit_state = self.rss_tree.item(item, "values")
+                new_state = circuit.feed_breaker(rss_url).describe()
+                if new_state != circuit_state:
+                    self.rss_tree.item(item, values=(rss_url, tag, new_state))
+        finally:
+            self.root.after(5000, self.refresh_circuit_states)
+    
     def update_log_display(self, log_entry):
         """更新日志显示"""
         self.log_display.config(state=tk.NORMAL)
@@ -610,9 +888,11 @@ class BangumiPikPakGUI:
             if tag:  # 只保存非空标签
                 rss_tags[rss_url] = tag  # 保存标签
         
-        # 更新核心模块的全局变量
-        core.RSS = rss_links
-        core.RSS_TAGS = rss_tags
+        # 更新核心模块的配置，删除的RSS源会同时取消其待提交条目
+        config = core.current_config()
+        config["rss"] = rss_links
+        config["rss_tags"] = rss_tags
+        core.apply_config(config)
         
         # 输出日志
         logging.debug(f"实时更新: RSS链接数量 {len(rss_links)}, 有标签的RSS数量 {len(rss_tags)}")
@@ -638,7 +918,7 @@ def main_gui():
         if messagebox.askokcancel("退出", "确定要退出吗?"):
             if app.is_running:
                 app.toggle_service()  # 停止服务
-            core.save_client()  # 保存客户端状态
+            core.save_client(force=True)  # 保存客户端状态
             root.destroy()
             
     root.protocol("WM_DELETE_WINDOW", on_closing)
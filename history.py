@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+已处理种子历史模块
+以20字节的 infohash 记录已处理的种子，主文件为按 infohash 排序的定长记录数组，
+通过内存映射二分查找；前置布隆过滤器快速排除未处理的种子；新记录先追加到日志文件，
+积累到一定数量后合并进主文件，同时丢弃超出保留天数的记录。
+内存占用只与布隆过滤器（每条约10比特）和未合并的日志有关，启动时无需加载全部历史。
+"""
+
+import base64
+import contextlib
+import hashlib
+import heapq
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+# 排序后的历史记录；同名的 .log 文件保存尚未合并的新记录，.bloom 文件保存对应的布隆过滤器
+HISTORY_FILE = "history.bin"
+
+DEFAULT_WINDOW_DAYS = 730      # 默认保留最近两年的记录，0 表示永久保留
+COMPACT_THRESHOLD = 4096       # 日志中的记录数达到该值时合并
+BLOOM_BITS_PER_ITEM = 10       # 每条记录占用的比特数，误判率约1%
+BLOOM_HASHES = 7
+BLOOM_MIN_BITS = 1 << 16
+
+RECORD = struct.Struct(">20sI")        # infohash + 首次记录的日期（自1970-01-01起的天数）
+HASH_SIZE = 20
+BLOOM_HEADER = struct.Struct(">4sQIQ")  # 标识、比特数、哈希次数、对应主文件的字节数
+BLOOM_MAGIC = b"BLM1"
+
+BTIH_RE = re.compile(r"urn:btih:([0-9a-fA-F]{40}|[A-Za-z2-7]{32})")
+HEX_HASH_RE = re.compile(r"(?<![0-9a-fA-F])([0-9a-fA-F]{40})(?![0-9a-fA-F])")
+
+
+def infohash(torrent):
+    """将种子URL或磁力链接转换为20字节的 infohash
+
+    蜜柑的种子链接和磁力链接中带有 infohash，直接使用；其他链接使用URL的SHA-1摘要。
+    """
+    match = BTIH_RE.search(torrent)
+    if match:
+        value = match.group(1)
+        return bytes.fromhex(value) if len(value) == 40 else base64.b32decode(value.upper())
+    match = HEX_HASH_RE.search(torrent.rsplit("/", 1)[-1])
+    if match:
+        return bytes.fromhex(match.group(1))
+    return hashlib.sha1(torrent.encode("utf-8")).digest()
+
+
+def today():
+    return int(time.time() // 86400)
+
+
+class BloomFilter:
+    """固定大小的布隆过滤器，key 本身已是均匀分布的哈希值，直接切分作为哈希函数"""
+
+    def __init__(self, bits, hashes=BLOOM_HASHES, data=None):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = data if data is not None else bytearray((bits + 7) // 8)
+
+    @classmethod
+    def for_items(cls, count):
+        return cls(max(BLOOM_MIN_BITS, count * BLOOM_BITS_PER_ITEM))
+
+    def _positions(self, key):
+        h1 = int.from_bytes(key[:8], "big")
+        h2 = int.from_bytes(key[8:16], "big") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.data[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.data[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def save(self, path, main_size):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, self.bits, self.hashes, main_size))
+            f.write(self.data)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, main_size):
+        """读取保存的布隆过滤器，与主文件不对应时返回None"""
+        try:
+            with open(path, "rb") as f:
+                header = f.read(BLOOM_HEADER.size)
+                if len(header) != BLOOM_HEADER.size:
+                    return None
+                magic, bits, hashes, size = BLOOM_HEADER.unpack(header)
+                data = bytearray(f.read())
+        except OSError:
+            return None
+        if magic != BLOOM_MAGIC or size != main_size or len(data) != (bits + 7) // 8:
+            return None
+        return cls(bits, hashes, data)
+
+
+class HistoryStore:
+    """已处理种子的历史记录
+
+    多个工作进程（--workers）共用同一组文件：追加日志和合并时持有 .lock 文件的排他锁，
+    合并前在锁内重新读取完整的日志；其他进程发现主文件被替换后重新加载，日志中新追加的记录也会被读入。
+    """
+
+    def __init__(self, path=HISTORY_FILE, window_days=DEFAULT_WINDOW_DAYS):
+        self.path = path
+        self.log_path = path + ".log"
+        self.bloom_path = path + ".bloom"
+        self.lock_path = path + ".lock"
+        self.window_days = window_days
+        self._file = None
+        self._map = None
+        self._count = 0
+        self._main_id = None
+        self._log_offset = 0  # 日志中已读取的字节数
+        self._recent = {}  # 日志中的记录 {infohash: 日期}
+        self._bloom = None
+        self._lock = threading.Lock()
+
+    # 主文件
+
+    def _open_main(self):
+        self._close_main()
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        self._count = size // RECORD.size
+        if self._count:
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return size
+
+    def _close_main(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._count = 0
+
+    def _stat_main(self):
+        """主文件的标识，其他进程合并后会变化"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _iter_main(self):
+        for i in range(self._count):
+            yield RECORD.unpack_from(self._map, i * RECORD.size)
+
+    def _search(self, key):
+        """在主文件中二分查找 infohash"""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = mid * RECORD.size
+            current = self._map[offset:offset + HASH_SIZE]
+            if current == key:
+                return True
+            if current < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return False
+
+    # 进程间文件锁
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        with open(self.lock_path, "a+b") as f:
+            if os.name == "nt":
+                import msvcrt
+                f.seek(0)
+                # LK_LOCK 最多等待10秒，超时抛出 OSError
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    # 打开与合并
+
+    def _load(self):
+        """加载主文件、布隆过滤器和完整的日志，需持有文件锁"""
+        self._main_id = self._stat_main()
+        size = self._open_main()
+        self._bloom = BloomFilter.load(self.bloom_path, size)
+        if self._bloom is None:
+            self._bloom = BloomFilter.for_items(self._count + COMPACT_THRESHOLD)
+            for key, _ in self._iter_main():
+                self._bloom.add(key)
+            self._bloom.save(self.bloom_path, size)
+        self._recent = {}
+        self._log_offset = 0
+        self._read_log()
+
+    def _read_log(self):
+        """读取日志中新追加的记录，包括其他进程追加的"""
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(self._log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # 只读取完整的记录，写了一半的记录留到下次
+        data = data[:len(data) - len(data) % RECORD.size]
+        for key, day in RECORD.iter_unpack(data):
+            # 同一种子被多个进程重复记录时保留最早的日期
+            self._recent[key] = min(day, self._recent.get(key, day))
+            self._bloom.add(key)
+        self._log_offset += len(data)
+
+    def _ensure_open(self):
+        """首次使用或其他进程合并过主文件时重新加载，否则只读取日志中新追加的记录"""
+        if self._bloom is not None and self._stat_main() == self._main_id:
+            self._read_log()
+            return
+        started = time.perf_counter()
+        with self._file_lock():
+            self._load()
+        logging.info(f"已加载种子历史: {self._count} 条记录，{len(self._recent)} 条待合并，"
+                     f"耗时 {(time.perf_counter() - started) * 1000:.0f} ms")
+        if len(self._recent) >= COMPACT_THRESHOLD:
+            self._compact()
+
+    def _compact(self):
+        """将日志合并进主文件，并丢弃超出保留天数的记录"""
+        with self._file_lock():
+            # 其他进程可能已经合并或追加了日志，在锁内重新读取，合并后清空的日志中不会有遗漏的记录
+            if self._stat_main() != self._main_id:
+                self._load()
+            else:
+                self._read_log()
+            self._merge()
+
+    def _merge(self):
+        cutoff = today() - self.window_days if self.window_days > 0 else 0
+        tmp = self.path + ".tmp"
+        merged = heapq.merge(self._iter_main(), sorted(self._recent.items()))
+        count = dropped = 0
+        last_key, last_day = None, 0
+        bloom = BloomFilter.for_items(self._count + len(self._recent) + COMPACT_THRESHOLD)
+        with open(tmp, "wb") as f:
+            def flush():
+                nonlocal count, dropped
+                if last_key is None:
+                    return
+                if last_day < cutoff:
+                    dropped += 1
+                    return
+                f.write(RECORD.pack(last_key, last_day))
+                bloom.add(last_key)
+                count += 1
+            for key, day in merged:
+                if key == last_key:
+                    # 保留首次记录的日期，保留天数从首次处理时算起
+                    last_day = min(last_day, day)
+                    continue
+                flush()
+                last_key, last_day = key, day
+            flush()
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Windows 下不能替换已映射的文件，先关闭映射
+        self._close_main()
+        try:
+            os.replace(tmp, self.path)
+        except PermissionError:
+            # Windows 下其他进程仍打开着主文件，保留日志，之后再合并
+            os.remove(tmp)
+            self._open_main()
+            logging.warning("种子历史主文件正被其他进程使用，暂不合并")
+            return
+        with open(self.log_path, "wb"):
+            pass
+        self._recent = {}
+        self._log_offset = 0
+
+        self._bloom = bloom
+        size = self._open_main()
+        self._bloom.save(self.bloom_path, size)
+        self._main_id = self._stat_main()
+        logging.info(f"种子历史已合并: {count} 条记录" + (f"，丢弃 {dropped} 条过期记录" if dropped else ""))
+
+    # 对外接口
+
+    def contains(self, torrent):
+        key = infohash(torrent)
+        with self._lock:
+            self._ensure_open()
+            if key in self._recent:
+                return True
+            if key not in self._bloom:
+                return False
+            return self._search(key)
+
+    def add(self, torrent):
+        key = infohash(torrent)
+        with self._lock:
+            self._ensure_open()
+            if key in self._recent or (key in self._bloom and self._search(key)):
+                return
+            day = today()
+            # 与其他进程的合并互斥，避免记录追加到即将被清空的日志中
+            with self._file_lock():
+                with open(self.log_path, "ab") as f:
+                    f.write(RECORD.pack(key, day))
+            self._recent[key] = day
+            self._bloom.add(key)
+            if len(self._recent) >= COMPACT_THRESHOLD:
+                self._compact()
+
+    def compact(self):
+        with self._lock:
+            self._ensure_open()
+            self._compact()
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_open()
+            return self._count + len(self._recent)
+
+    def close(self):
+        with self._lock:
+            self._close_main()
+            self._bloom = None
+            self._recent = {}
+            self._main_id = None
+            self._log_offset = 0
+
+
+_store = HistoryStore()
+
+
+def configure(window_days):
+    """设置历史记录的保留天数，0 表示永久保留，在下一次合并时生效"""
+    try:
+        _store.window_days = max(0, int(window_days))
+    except (TypeError, ValueError):
+        logging.warning(f"无效的历史记录保留天数: {window_days}，使用默认值 {DEFAULT_WINDOW_DAYS}")
+        _store.window_days = DEFAULT_WINDOW_DAYS
+
+
+def contains(torrent):
+    """种子是否已经处理过"""
+    return _store.contains(torrent)
+
+
+def add(torrent):
+    """记录已处理的种子"""
+    _store.add(torrent)
+
+
+def compact():
+    _store.compact()
+
+
+def close():
+    _store.close()
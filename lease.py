@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多进程租约模块
+多个工作进程通过共享数据库 bangumi.db 中的租约划分RSS源和账号：
+每个进程按存活进程数平分资源，租约由后台线程定期续期，进程退出或失去响应后
+租约过期，其他进程在下一次分配时接手。提交条目前还需取得该条目的租约，避免重复提交。
+"""
+
+import logging
+import math
+import os
+import socket
+import threading
+import time
+
+import outbox
+
+LEASE_TTL = 90.0          # 租约有效期（秒），超过该时间未续期视为进程已退出
+HEARTBEAT_INTERVAL = 20.0  # 心跳和续期间隔（秒）
+
+FEED = "feed"
+ACCOUNT = "account"
+ITEM = "item"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    resource TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leases_owner ON leases (owner);
+"""
+
+outbox.register_schema(SCHEMA)
+
+worker_id = None  # 开启多进程模式时按主机名和进程号生成
+enabled = False
+
+_stop = threading.Event()
+_thread = None
+
+
+def _key(kind, resource):
+    return f"{kind}:{resource}"
+
+
+def _transaction(work):
+    """在立即加写锁的事务中执行 work(conn, now)，保证多个进程之间的分配互斥"""
+    with outbox.db_lock:
+        conn = outbox.connect()
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn, time.time())
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def heartbeat():
+    """登记本进程存活，续期本进程持有的租约，并清理已退出进程的记录和租约"""
+    def work(conn, now):
+        conn.execute("INSERT OR REPLACE INTO workers (worker_id, pid, heartbeat_at) VALUES (?, ?, ?)",
+                     (worker_id, os.getpid(), now))
+        conn.execute("UPDATE leases SET expires_at = ? WHERE owner = ?", (now + LEASE_TTL, worker_id))
+        dead = [row[0] for row in conn.execute(
+            "SELECT worker_id FROM workers WHERE heartbeat_at < ?", (now - LEASE_TTL,))]
+        for worker in dead:
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker,))
+            released = conn.execute("DELETE FROM leases WHERE owner = ?", (worker,)).rowcount
+            logging.warning(f"工作进程 {worker} 已失去响应，释放其 {released} 个租约")
+        conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+    _transaction(work)
+
+
+def _heartbeat_loop():
+    while not _stop.wait(HEARTBEAT_INTERVAL):
+        try:
+            heartbeat()
+        except Exception as e:
+            logging.error(f"租约续期失败: {str(e)}")
+
+
+def enable():
+    """开启多进程模式：登记本进程并启动后台续期线程"""
+    global enabled, worker_id, _thread
+    if enabled:
+        return
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    heartbeat()
+    enabled = True
+    _stop.clear()
+    _thread = threading.Thread(target=_heartbeat_loop, name="lease-heartbeat", daemon=True)
+    _thread.start()
+    logging.info(f"已开启多进程模式，工作进程: {worker_id}")
+
+
+def disable():
+    """退出多进程模式，立即释放本进程的全部租约，便于其他进程尽快接手"""
+    global enabled, _thread
+    if not enabled:
+        return
+    enabled = False
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
+
+    def work(conn, now):
+        conn.execute("DELETE FROM leases WHERE owner = ?", (worker_id,))
+        conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+    try:
+        _transaction(work)
+    except Exception as e:
+        logging.error(f"释放租约失败: {str(e)}")
+
+
+def live_workers():
+    """返回存活的工作进程列表"""
+    with outbox.db_lock:
+        rows = outbox.connect().execute(
+            "SELECT worker_id FROM workers WHERE heartbeat_at >= ? ORDER BY worker_id",
+            (time.time() - LEASE_TTL,)).fetchall()
+    return [row[0] for row in rows]
+
+
+def balance(kind, resources):
+    """按存活进程数平分一类资源，返回本进程负责的部分
+
+    保留本进程已持有的租约（不超过平均份额），超出份额的租约释放给其他进程，
+    份额不足时领取无人持有或已过期的资源。新进程加入或旧进程退出后，
+    各进程在下一次调用时自动重新平衡。
+
+    Args:
+        kind: 资源类别（FEED、ACCOUNT）
+        resources: 该类别的全部资源
+
+    Returns:
+        list: 本进程负责的资源，保持 resources 中的顺序
+    """
+    resources = list(dict.fromkeys(resources))
+    keys = {_key(kind, resource): resource for resource in resources}
+    prefix = _key(kind, "")
+
+    def work(conn, now):
+        workers = [row[0] for row in conn.execute(
+            "SELECT worker_id FROM workers WHERE heartbeat_at >= ?", (now - LEASE_TTL,))]
+        if worker_id not in workers:
+            workers.append(worker_id)
+        share = math.ceil(len(resources) / len(workers)) if resources else 0
+
+        owners = {}
+        for resource, owner, expires_at in conn.execute("SELECT resource, owner, expires_at FROM leases"):
+            if resource.startswith(prefix) and expires_at >= now:
+                owners[resource] = owner
+
+        mine = [key for key in keys if owners.get(key) == worker_id]
+        released = mine[share:]
+        mine = mine[:share]
+        for key in keys:
+            if len(mine) >= share:
+                break
+            if key not in owners:
+                mine.append(key)
+
+        # 释放超出份额的租约，以及已不存在的资源的租约
+        stale = [key for key, owner in owners.items() if owner == worker_id and key not in keys]
+        for key in released + stale:
+            conn.execute("DELETE FROM leases WHERE resource = ? AND owner = ?", (key, worker_id))
+        conn.executemany("INSERT OR REPLACE INTO leases (resource, owner, expires_at) VALUES (?, ?, ?)",
+                         [(key, worker_id, now + LEASE_TTL) for key in mine])
+        return set(mine), len(workers)
+
+    mine, worker_count = _transaction(work)
+    owned = [keys[key] for key in keys if key in mine]
+    logging.info(f"租约分配: {kind} 共 {len(resources)} 个，{worker_count} 个工作进程，本进程负责 {len(owned)} 个")
+    return owned
+
+
+def owned(kind):
+    """返回本进程当前持有的某类资源（不重新分配）"""
+    prefix = _key(kind, "")
+    with outbox.db_lock:
+        rows = outbox.connect().execute(
+            "SELECT resource FROM leases WHERE owner = ? AND expires_at >= ?", (worker_id, time.time())).fetchall()
+    return [row[0][len(prefix):] for row in rows if row[0].startswith(prefix)]
+
+
+def claim(kind, resource):
+    """独占一个资源（如待提交的条目），已被其他进程持有时返回False"""
+    key = _key(kind, resource)
+
+    def work(conn, now):
+        row = conn.execute("SELECT owner, expires_at FROM leases WHERE resource = ?", (key,)).fetchone()
+        if row and row[0] != worker_id and row[1] >= now:
+            return False
+        conn.execute("INSERT OR REPLACE INTO leases (resource, owner, expires_at) VALUES (?, ?, ?)",
+                     (key, worker_id, now + LEASE_TTL))
+        return True
+    return _transaction(work)
+
+
+def release(kind, resource):
+    """释放本进程持有的资源租约"""
+    def work(conn, now):
+        conn.execute("DELETE FROM leases WHERE resource = ? AND owner = ?", (_key(kind, resource), worker_id))
+    _transaction(work)
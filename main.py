@@ -8,41 +8,68 @@ Bangumi-PikPak RSS 命令行工具
 
 import os
 import sys
+import argparse
+import multiprocessing
 import time
 import signal
 import asyncio
 import logging
 
+STARTED_AT = time.perf_counter()  # 用于统计启动耗时
+
+# 退出码（--once 模式）
+EXIT_OK = 0             # 本次运行成功
+EXIT_CONFIG_ERROR = 1   # 初始化失败，如配置文件缺失或无效
+EXIT_CYCLE_FAILED = 2   # 处理失败，如所有账号登录失败或运行出错
+EXIT_DEADLINE = 3       # 超出周期截止时间，未完成的条目留待下次运行
+EXIT_INTERRUPTED = 130  # 被用户中断
+
 # 导入核心功能模块
 import core
+import trigger
+import lease
 
 def signal_handler(sig, frame):
     """处理退出信号"""
     logging.info("正在保存状态并退出...")
-    core.save_client()  # 保存客户端状态
+    trigger.stop()
+    core.save_client(force=True)  # 保存客户端状态
     core.update_config()  # 保存配置
     sys.exit(0)
 
 async def main_loop():
     """主循环函数"""
+    feeds = None  # None 表示获取全部RSS源
+    last_full_cycle = time.monotonic()
     while True:
+        if feeds is None:
+            last_full_cycle = time.monotonic()
+        else:
+            logging.info(f"立即获取 {len(feeds)} 个RSS源")
         try:
             # 执行一次RSS处理
-            await core.process_rss()
+            await core.process_rss(feeds)
         except Exception as e:
             logging.error(f"执行周期任务时发生错误: {str(e)}")
         finally:
             # 保存当前状态
             core.save_client()
             
-        # 等待下一次检查
+        # 等待下一次检查，期间会应用配置文件的修改
         logging.info(f"等待 {core.INTERVAL_TIME_RSS} 秒后执行下一次检查...")
-        await asyncio.sleep(core.INTERVAL_TIME_RSS)
+        feeds = await core.async_wait_next_cycle(last_full_cycle)
+
+def run(worker_index=None):
+    """运行服务
+
+    Args:
+        worker_index: 多进程模式下的工作进程编号，单进程模式为None
+    """
+    # 多进程模式下每个工作进程写入自己的日志文件，避免日志轮转冲突
+    log_file = "rss-pikpak.log" if worker_index is None else f"rss-pikpak.worker{worker_index}.log"
 
-def main():
-    """主函数"""
     # 初始化系统
-    if not core.init_system():
+    if not core.init_system(log_file):
         logging.error("系统初始化失败，请检查配置文件")
         return
 
@@ -50,9 +77,17 @@ def main():
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
-    logging.info("Bangumi-PikPak RSS 命令行工具已启动")
+    logging.info(f"Bangumi-PikPak RSS 命令行工具已启动，启动耗时 {startup_ms():.0f} ms")
     logging.info(f"当前配置: 用户 {core.USER[0]}, {len(core.RSS)} 个RSS源, 检查间隔 {core.INTERVAL_TIME_RSS}秒")
     
+    # 多进程模式：通过共享数据库中的租约与其他工作进程划分RSS源和账号
+    if worker_index is not None:
+        lease.enable()
+    
+    # 启动推送触发接口（未启用时不做任何事），多进程模式下只由第一个工作进程监听
+    if not worker_index:
+        trigger.start(core.request_fetch, core.is_subscribed)
+    
     try:
         # 运行主循环
         asyncio.run(main_loop())
@@ -61,8 +96,201 @@ def main():
     except Exception as e:
         logging.error(f"程序运行出错: {str(e)}")
     finally:
-        core.save_client()
+        trigger.stop()
+        core.save_client(force=True)
+        lease.disable()
         core.update_config()
 
+def startup_ms():
+    """从导入本模块到当前的耗时（毫秒）"""
+    return (time.perf_counter() - STARTED_AT) * 1000
+
+def run_once():
+    """只执行一次处理周期后退出，供 cron、systemd timer 等定时调度使用
+
+    Returns:
+        int: 退出码
+    """
+    if not core.init_system():
+        logging.error("系统初始化失败，请检查配置文件")
+        return EXIT_CONFIG_ERROR
+    logging.info(f"单次运行模式，启动耗时 {startup_ms():.0f} ms，{len(core.RSS)} 个RSS源")
+    
+    try:
+        ok = asyncio.run(core.process_rss())
+    except KeyboardInterrupt:
+        logging.info("接收到退出信号，保存状态并退出...")
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        logging.error(f"程序运行出错: {str(e)}")
+        return EXIT_CYCLE_FAILED
+    finally:
+        core.save_client(force=True)
+        logging.info(f"本次运行耗时 {startup_ms() / 1000:.1f} 秒")
+    
+    if core.last_cycle_timed_out:
+        return EXIT_DEADLINE
+    return EXIT_OK if ok else EXIT_CYCLE_FAILED
+
+def import_opml(path, keep_unreachable=False):
+    """从 OPML 文件批量导入RSS订阅
+
+    新的RSS源先并发检查，只把可用的（keep_unreachable 时为全部）写入配置文件。
+
+    Returns:
+        int: 退出码
+    """
+    import opml
+
+    core.setup_logging()
+    if not core.load_config():
+        return EXIT_CONFIG_ERROR
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            imported = opml.parse(f.read())
+    except (OSError, ValueError) as e:
+        logging.error(f"读取OPML文件失败: {str(e)}")
+        return EXIT_CONFIG_ERROR
+
+    new_feeds, skipped = opml.merge(core.RSS, imported)
+    logging.info(f"OPML中共有 {len(imported)} 个RSS源，{skipped} 个已订阅，{len(new_feeds)} 个待检查")
+    if not new_feeds:
+        return EXIT_OK
+
+    results = asyncio.run(opml.validate([url for url, _ in new_feeds]))
+    for result in results:
+        print(opml.describe(result))
+    accepted = [(url, tag) for (url, tag), result in zip(new_feeds, results) if result.reachable or keep_unreachable]
+    if not accepted:
+        logging.warning("没有可导入的RSS源")
+        return EXIT_CYCLE_FAILED
+
+    config = core.current_config()
+    config["rss"] = core.RSS + [url for url, _ in accepted]
+    config["rss_tags"] = dict(core.RSS_TAGS, **{url: tag for url, tag in accepted if tag})
+    core.apply_config(config)
+    core.update_config()
+    logging.info(f"已导入 {len(accepted)} 个RSS源")
+    return EXIT_OK
+
+def export_opml(path):
+    """将当前的RSS订阅导出为 OPML 文件
+
+    Returns:
+        int: 退出码
+    """
+    import opml
+    import state
+
+    core.setup_logging()
+    if not core.load_config():
+        return EXIT_CONFIG_ERROR
+    try:
+        state.atomic_write(path, opml.export(core.RSS, core.RSS_TAGS))
+    except OSError as e:
+        logging.error(f"写入OPML文件失败: {str(e)}")
+        return EXIT_CONFIG_ERROR
+    logging.info(f"已导出 {len(core.RSS)} 个RSS源到 {path}")
+    return EXIT_OK
+
+def run_backfill(target, since=None, until=None, episodes=None, parallel=None, per_minute=None):
+    """补全一部番剧在指定范围内的剧集，中断后以相同参数再次运行可从中断处继续
+
+    Returns:
+        int: 退出码
+    """
+    import backfill
+
+    if not core.init_system():
+        logging.error("系统初始化失败，请检查配置文件")
+        return EXIT_CONFIG_ERROR
+    try:
+        scope = backfill.parse_scope(since, until, episodes)
+    except ValueError as e:
+        logging.error(f"补全范围无效: {str(e)}")
+        return EXIT_CONFIG_ERROR
+
+    try:
+        status = asyncio.run(backfill.run(
+            target, scope,
+            parallel=backfill.DEFAULT_PARALLEL if parallel is None else parallel,
+            per_minute=backfill.DEFAULT_PER_MINUTE if per_minute is None else per_minute))
+    except KeyboardInterrupt:
+        logging.info("补全已中断，再次运行相同的命令可从中断处继续")
+        return EXIT_INTERRUPTED
+    except RuntimeError as e:
+        logging.error(f"规划补全任务失败: {str(e)}")
+        return EXIT_CYCLE_FAILED
+    finally:
+        core.save_client(force=True)
+    if status is None or status.get(backfill.FAILED):
+        return EXIT_CYCLE_FAILED
+    return EXIT_OK
+
+def run_workers(count):
+    """启动多个工作进程并等待其退出，收到退出信号时通知所有工作进程"""
+    core.setup_logging()
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=run, args=(i,), name=f"worker-{i}") for i in range(count)]
+    
+    def stop_workers(sig, frame):
+        logging.info("正在停止所有工作进程...")
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+    
+    signal.signal(signal.SIGINT, stop_workers)
+    signal.signal(signal.SIGTERM, stop_workers)
+    
+    for worker in workers:
+        worker.start()
+    logging.info(f"已启动 {count} 个工作进程，日志见 rss-pikpak.worker<编号>.log")
+    
+    # 某个工作进程退出后，其租约过期，由其余进程自动接手
+    for worker in workers:
+        worker.join()
+        if worker.exitcode:
+            logging.warning(f"工作进程 {worker.name} 异常退出，退出码 {worker.exitcode}")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="Bangumi-PikPak RSS 命令行工具")
+    parser.add_argument("--once", action="store_true",
+                        help="只执行一次检查后退出，退出码表示运行结果（0 成功，1 配置错误，2 处理失败，3 超出截止时间）")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="工作进程数，大于1时多个进程通过租约划分RSS源和账号")
+    parser.add_argument("--import-opml", metavar="FILE",
+                        help="从OPML文件导入RSS订阅，新的RSS源检查可用后写入配置文件")
+    parser.add_argument("--export-opml", metavar="FILE", help="将RSS订阅导出为OPML文件")
+    parser.add_argument("--keep-unreachable", action="store_true",
+                        help="导入OPML时同时导入检查失败的RSS源")
+    parser.add_argument("--backfill", metavar="FEED_OR_ID",
+                        help="补全一部番剧的剧集（RSS链接或蜜柑 bangumiId），中断后以相同参数再次运行可继续")
+    parser.add_argument("--since", metavar="DATE", help="补全范围的起始发布日期 YYYY-MM-DD")
+    parser.add_argument("--until", metavar="DATE", help="补全范围的结束发布日期 YYYY-MM-DD")
+    parser.add_argument("--episodes", metavar="RANGE", help="补全的集数范围，如 1-12、13- 或 5")
+    parser.add_argument("--parallel", type=int, help="补全时同时提交的条目数（默认 2）")
+    parser.add_argument("--per-minute", type=int, help="补全时每分钟最多提交的条目数，0 表示不限制（默认 30）")
+    args = parser.parse_args()
+    if args.once and args.workers > 1:
+        parser.error("--once 不能与 --workers 同时使用")
+    if args.import_opml and args.export_opml:
+        parser.error("--import-opml 不能与 --export-opml 同时使用")
+    if not args.backfill and (args.since or args.until or args.episodes):
+        parser.error("--since、--until、--episodes 只能与 --backfill 同时使用")
+    
+    if args.backfill:
+        sys.exit(run_backfill(args.backfill, args.since, args.until, args.episodes, args.parallel, args.per_minute))
+    if args.import_opml:
+        sys.exit(import_opml(args.import_opml, args.keep_unreachable))
+    if args.export_opml:
+        sys.exit(export_opml(args.export_opml))
+    if args.once:
+        sys.exit(run_once())
+    if args.workers > 1:
+        run_workers(args.workers)
+    else:
+        run()
+
 if __name__ == "__main__":
     main()
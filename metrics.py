@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+运行指标模块
+在进程内记录每个RSS源的获取情况、处理周期耗时和各账号的提交情况，
+供图形界面的状态页读取；只做计数和有限长度的历史记录，读取时返回快照，不进行任何IO。
+"""
+
+import threading
+import time
+from collections import deque
+
+CYCLE_HISTORY = 50            # 保留最近的处理周期数
+THROUGHPUT_WINDOW = 3600.0    # 提交速率的统计窗口（秒）
+
+_lock = threading.Lock()
+_feeds = {}                   # {rss_url: {"latency", "items", "errors", "failures", "fetched_at"}}
+_cycles = deque(maxlen=CYCLE_HISTORY)  # [(结束时间, 耗时, 是否成功, 是否超时)]
+_accounts = {}                # {账号: {"submitted", "failed", "recent": deque[提交时间]}}
+next_poll_at = None           # 下一次完整检查的时间（time.time()），未在等待时为None
+
+
+def record_feed(url, latency, items, ok):
+    """记录一次RSS源获取
+
+    Args:
+        url: RSS链接
+        latency: 获取耗时（秒，包括重试）
+        items: 获取到的新条目数
+        ok: 是否获取成功
+    """
+    with _lock:
+        feed = _feeds.setdefault(url, {"latency": None, "items": 0, "errors": 0, "failures": 0,
+                                       "fetched_at": None})
+        feed["latency"] = latency
+        feed["fetched_at"] = time.time()
+        if ok:
+            feed["items"] = items
+            feed["failures"] = 0
+        else:
+            feed["errors"] += 1
+            feed["failures"] += 1
+
+
+def record_cycle(duration, ok, timed_out=False):
+    """记录一次处理周期"""
+    with _lock:
+        _cycles.append((time.time(), duration, ok, timed_out))
+
+
+def record_submission(account, ok):
+    """记录一个账号的一次提交"""
+    now = time.time()
+    with _lock:
+        stats = _accounts.setdefault(account, {"submitted": 0, "failed": 0, "recent": deque()})
+        if ok:
+            stats["submitted"] += 1
+            stats["recent"].append(now)
+        else:
+            stats["failed"] += 1
+        while stats["recent"] and stats["recent"][0] < now - THROUGHPUT_WINDOW:
+            stats["recent"].popleft()
+
+
+def set_next_poll(timestamp):
+    global next_poll_at
+    next_poll_at = timestamp
+
+
+def forget_feed(url):
+    """删除已移除的RSS源的记录"""
+    with _lock:
+        _feeds.pop(url, None)
+
+
+def feed_stats():
+    """各RSS源的获取情况快照 {rss_url: {...}}"""
+    with _lock:
+        return {url: dict(stats) for url, stats in _feeds.items()}
+
+
+def cycle_history():
+    """最近的处理周期 [(结束时间, 耗时, 是否成功, 是否超时)]，从旧到新"""
+    with _lock:
+        return list(_cycles)
+
+
+def account_stats():
+    """各账号的提交情况 {账号: {"submitted", "failed", "per_hour"}}"""
+    now = time.time()
+    with _lock:
+        result = {}
+        for account, stats in _accounts.items():
+            recent = sum(1 for at in stats["recent"] if at >= now - THROUGHPUT_WINDOW)
+            result[account] = {
+                "submitted": stats["submitted"],
+                "failed": stats["failed"],
+                "per_hour": recent * 3600.0 / THROUGHPUT_WINDOW,
+            }
+        return result
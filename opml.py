@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+OPML 导入导出模块
+批量导入导出RSS订阅：导入时规范化链接并去重，导入前并发检查每个RSS源能否访问、
+包含多少条目以及响应耗时，由调用方决定把哪些RSS源写入配置。
+标签对应 OPML 中的分组（外层 outline），导出时同一标签的RSS源放在同一分组下。
+"""
+
+import asyncio
+import logging
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import ratelimit
+
+VALIDATE_CONCURRENCY = 8   # 同时检查的RSS源数量
+VALIDATE_TIMEOUT = 15.0    # 单个RSS源的超时（秒）
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# 检查结果：reachable 为能否访问并解析，items 为条目数，latency 为响应耗时（秒）
+FeedCheck = namedtuple("FeedCheck", ["url", "reachable", "items", "latency", "error"])
+
+
+def normalize_url(url):
+    """规范化RSS链接，使同一个RSS源的不同写法得到相同的结果
+
+    协议和主机名转为小写，去掉默认端口、片段和空路径，查询参数按名称排序。
+    """
+    url = (url or "").strip()
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def parse(text):
+    """解析 OPML 内容
+
+    Args:
+        text: OPML 文件内容
+
+    Returns:
+        list: [(规范化后的RSS链接, 标签)]，保持文件中的顺序，重复的链接只保留第一个
+
+    Raises:
+        ValueError: 内容不是有效的 OPML
+    """
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError as e:
+        raise ValueError(f"OPML格式错误: {str(e)}")
+    body = root.find("body")
+    if body is None:
+        raise ValueError("OPML缺少 body 元素")
+
+    feeds = {}
+
+    def walk(node, group):
+        for outline in node.findall("outline"):
+            url = outline.get("xmlUrl")
+            if url:
+                # 分组名优先，其次是 outline 自身的 category 属性
+                tag = group or (outline.get("category") or "").split(",")[0].strip("/ ")
+                feeds.setdefault(normalize_url(url), tag)
+            else:
+                walk(outline, outline.get("text") or outline.get("title") or group)
+
+    walk(body, "")
+    return list(feeds.items())
+
+
+def export(feeds, tags=None, title="Bangumi-PikPak 订阅"):
+    """导出RSS订阅为 OPML 2.0
+
+    Args:
+        feeds: RSS链接列表
+        tags: RSS链接对应的标签 {rss_url: tag}
+
+    Returns:
+        str: OPML 文件内容
+    """
+    tags = tags or {}
+    root = ET.Element("opml", version="2.0")
+    head = ET.SubElement(root, "head")
+    ET.SubElement(head, "title").text = title
+    ET.SubElement(head, "dateCreated").text = time.strftime("%a, %d %b %Y %H:%M:%S %z")
+    body = ET.SubElement(root, "body")
+
+    groups = {}
+    for url in feeds:
+        tag = tags.get(url, "")
+        parent = body
+        if tag:
+            if tag not in groups:
+                groups[tag] = ET.SubElement(body, "outline", text=tag, title=tag)
+            parent = groups[tag]
+        ET.SubElement(parent, "outline", type="rss", text=url, xmlUrl=url)
+    ET.indent(root)
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(root, encoding="unicode") + "\n"
+
+
+def merge(existing, imported):
+    """找出导入的RSS源中尚未订阅的部分（按规范化后的链接比较）
+
+    Args:
+        existing: 已订阅的RSS链接列表
+        imported: parse() 返回的 [(RSS链接, 标签)]
+
+    Returns:
+        tuple: (新的 [(RSS链接, 标签)], 已订阅而跳过的数量)
+    """
+    known = {normalize_url(url) for url in existing}
+    new = [(url, tag) for url, tag in imported if url not in known]
+    return new, len(imported) - len(new)
+
+
+async def validate(urls, concurrency=VALIDATE_CONCURRENCY, timeout=VALIDATE_TIMEOUT, on_result=None):
+    """并发检查RSS源，同时进行的请求不超过 concurrency 个
+
+    Args:
+        urls: RSS链接列表
+        concurrency: 最大并发数
+        timeout: 单个RSS源的超时（秒）
+        on_result: 每完成一个检查时调用 on_result(FeedCheck)，用于显示进度
+
+    Returns:
+        list: FeedCheck 列表，与 urls 顺序相同
+    """
+    import feedparser
+    import httpx
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def check(client, url):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await ratelimit.acquire(url)
+                response = await client.get(url)
+                response.raise_for_status()
+                rss = feedparser.parse(response.text)
+                latency = time.perf_counter() - started
+                entries = len(rss.get("entries", []))
+                if not entries and rss.get("bozo"):
+                    result = FeedCheck(url, False, 0, latency, "不是有效的RSS")
+                else:
+                    result = FeedCheck(url, True, entries, latency, None)
+            except httpx.HTTPStatusError as e:
+                result = FeedCheck(url, False, 0, time.perf_counter() - started, f"HTTP {e.response.status_code}")
+            except Exception as e:
+                result = FeedCheck(url, False, 0, time.perf_counter() - started, str(e) or type(e).__name__)
+        if on_result:
+            on_result(result)
+        return result
+
+    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
+        results = await asyncio.gather(*(check(client, url) for url in urls))
+    reachable = sum(1 for result in results if result.reachable)
+    logging.info(f"已检查 {len(results)} 个RSS源，{reachable} 个可用，{len(results) - reachable} 个不可用")
+    return results
+
+
+def describe(result):
+    """检查结果的单行描述，用于日志和命令行输出"""
+    if result.reachable:
+        return f"可用 {result.items} 个条目 {result.latency * 1000:.0f} ms  {result.url}"
+    return f"不可用 ({result.error}) {result.latency * 1000:.0f} ms  {result.url}"
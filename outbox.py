@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+离线任务发件箱模块
+将发现的新条目持久化到 SQLite，由提交流程按退避策略重试，多次失败后转入死信
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+import ratelimit
+
+DB_FILE = "bangumi.db"   # 本地状态数据库
+
+PENDING = "pending"      # 等待提交
+DONE = "done"            # 已提交
+DEAD = "dead"            # 多次失败，不再自动重试
+
+MAX_ATTEMPTS = 5         # 最大提交次数，超过后转入死信
+RETRY_BASE = 60.0        # 重试退避基数（秒）
+RETRY_MAX = 6 * 3600     # 重试间隔上限（秒）
+
+_conn = None
+db_lock = threading.RLock()  # 共享连接的锁，其他使用同一数据库的模块也需持有
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    torrent TEXT PRIMARY KEY,
+    title TEXT,
+    link TEXT,
+    pub TEXT,
+    bangumi_title TEXT,
+    feed TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    task_id TEXT,
+    task_name TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (state, next_attempt_at);
+"""
+
+_schemas = [SCHEMA]
+
+
+def register_schema(schema):
+    """注册其他模块使用同一数据库时需要的表结构"""
+    with db_lock:
+        _schemas.append(schema)
+        if _conn is not None:
+            _conn.executescript(schema)
+            _conn.commit()
+
+
+def connect():
+    """返回共享的数据库连接，首次调用时创建表结构"""
+    global _conn
+    with db_lock:
+        if _conn is None:
+            _conn = sqlite3.connect(DB_FILE, timeout=30, check_same_thread=False)
+            _conn.row_factory = sqlite3.Row
+            _conn.execute("PRAGMA journal_mode=WAL")
+            for schema in _schemas:
+                _conn.executescript(schema)
+            _conn.commit()
+        return _conn
+
+
+def close():
+    global _conn
+    with db_lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+
+def enqueue(items):
+    """将新条目加入发件箱，已存在的种子会被忽略
+
+    Args:
+        items: 字典列表，包含 torrent、title、link、pub、bangumi_title、feed
+
+    Returns:
+        int: 新加入的条目数
+    """
+    now = time.time()
+    rows = [
+        (item["torrent"], item.get("title"), item.get("link"), item.get("pub"),
+         item.get("bangumi_title"), item.get("feed"), now, now)
+        for item in items
+    ]
+    with db_lock:
+        conn = connect()
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO outbox (torrent, title, link, pub, bangumi_title, feed, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        return conn.total_changes - before
+
+
+def contains(torrent):
+    """种子是否已在发件箱中（任意状态）"""
+    with db_lock:
+        row = connect().execute("SELECT 1 FROM outbox WHERE torrent = ?", (torrent,)).fetchone()
+    return row is not None
+
+
+def due(limit=None):
+    """返回已到重试时间的待提交条目，按加入顺序排列"""
+    sql = "SELECT * FROM outbox WHERE state = ? AND next_attempt_at <= ? ORDER BY created_at"
+    params = [PENDING, time.time()]
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with db_lock:
+        return [dict(row) for row in connect().execute(sql, params)]
+
+
+def is_due(torrent):
+    """条目是否仍在等待提交且已到重试时间（多进程模式下取得条目租约后再次确认）"""
+    with db_lock:
+        row = connect().execute("SELECT 1 FROM outbox WHERE torrent = ? AND state = ? AND next_attempt_at <= ?",
+                                (torrent, PENDING, time.time())).fetchone()
+    return row is not None
+
+
+def mark_done(torrent, task_id=None, task_name=None):
+    with db_lock:
+        conn = connect()
+        conn.execute(
+            "UPDATE outbox SET state = ?, task_id = ?, task_name = ?, last_error = NULL, updated_at = ? "
+            "WHERE torrent = ?", (DONE, task_id, task_name, time.time(), torrent))
+        conn.commit()
+
+
+def mark_failed(torrent, error):
+    """记录一次提交失败，按退避策略安排重试，超过最大次数转入死信
+
+    Returns:
+        str: 条目的新状态
+    """
+    now = time.time()
+    with db_lock:
+        conn = connect()
+        row = conn.execute("SELECT attempts, title FROM outbox WHERE torrent = ?", (torrent,)).fetchone()
+        if row is None:
+            return None
+        attempts = row["attempts"] + 1
+        if attempts >= MAX_ATTEMPTS:
+            state, next_attempt = DEAD, now
+            logging.error(f"条目 {row['title']} 已失败 {attempts} 次，转入死信: {error}")
+        else:
+            state = PENDING
+            next_attempt = now + ratelimit.backoff_delay(attempts - 1, RETRY_BASE, RETRY_MAX)
+            logging.warning(f"条目 {row['title']} 提交失败 ({attempts}/{MAX_ATTEMPTS})，"
+                            f"将于 {time.strftime('%H:%M:%S', time.localtime(next_attempt))} 重试")
+        conn.execute(
+            "UPDATE outbox SET state = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ? "
+            "WHERE torrent = ?", (state, attempts, next_attempt, str(error), now, torrent))
+        conn.commit()
+        return state
+
+
+def cancel_feed(feed):
+    """删除某个RSS源尚未提交的条目（RSS源被移除时调用）
+
+    Returns:
+        int: 删除的条目数
+    """
+    with db_lock:
+        conn = connect()
+        cursor = conn.execute("DELETE FROM outbox WHERE feed = ? AND state = ?", (feed, PENDING))
+        conn.commit()
+        return cursor.rowcount
+
+
+def requeue_dead():
+    """将死信条目重新放回待提交队列
+
+    Returns:
+        int: 重新入队的条目数
+    """
+    with db_lock:
+        conn = connect()
+        cursor = conn.execute(
+            "UPDATE outbox SET state = ?, attempts = 0, next_attempt_at = 0, updated_at = ? WHERE state = ?",
+            (PENDING, time.time(), DEAD))
+        conn.commit()
+        return cursor.rowcount
+
+
+def counts():
+    """各状态的条目数 {state: count}"""
+    with db_lock:
+        rows = connect().execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall()
+    return {state: count for state, count in rows}
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按主机限速模块
+为每个主机维护一个令牌桶，统一处理 429/503 的 Retry-After 与带抖动的退避
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import tracing
+
+MIKAN_HOST = "mikanani.me"
+PIKPAK_HOST = "mypikpak.com"
+DEFAULT_HOST = "default"
+
+# 默认速率 {主机: (每秒请求数, 突发容量)}，未列出的主机使用 default 的速率
+DEFAULT_RATE_LIMITS = {
+    MIKAN_HOST: (2.0, 4),
+    PIKPAK_HOST: (5.0, 10),
+    DEFAULT_HOST: (5.0, 10),
+}
+
+# 需要按 Retry-After 退让的状态码
+RETRY_STATUS_CODES = {429, 503}
+
+BACKOFF_BASE = 2.0    # 退避基数（秒）
+BACKOFF_MAX = 120.0   # 单次退避上限（秒）
+
+_rate_limits = dict(DEFAULT_RATE_LIMITS)
+_buckets = {}
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    """令牌桶：按固定速率补充令牌，支持被 Retry-After 暂时封锁"""
+
+    def __init__(self, rate, burst):
+        self.rate = max(float(rate), 0.001)
+        self.capacity = max(float(burst), 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self):
+        """预约一个令牌，返回调用方需要等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def block(self, seconds):
+        """在指定秒数内暂停发放令牌"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def host_key(url_or_host):
+    """将URL或主机名映射为限速配置中的主机键
+
+    子域名会归入已配置的上级域名，例如 api-drive.mypikpak.com -> mypikpak.com
+    """
+    host = urlsplit(url_or_host).hostname if "://" in url_or_host else url_or_host
+    host = (host or DEFAULT_HOST).lower()
+    for key in _rate_limits:
+        if key != DEFAULT_HOST and (host == key or host.endswith("." + key)):
+            return key
+    return host
+
+
+def configure(limits):
+    """应用配置文件中的限速设置
+
+    Args:
+        limits: {主机: {"rate": 每秒请求数, "burst": 突发容量}}，缺省项保留默认值
+    """
+    global _rate_limits
+    merged = dict(DEFAULT_RATE_LIMITS)
+    for host, value in (limits or {}).items():
+        try:
+            merged[host.lower()] = (float(value["rate"]), int(value.get("burst", 1)))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            logging.warning(f"忽略无效的限速配置: {host} = {value}")
+    with _lock:
+        _rate_limits = merged
+        _buckets.clear()
+
+
+def export_limits():
+    """导出当前生效的限速设置，用于写回配置文件"""
+    return {host: {"rate": rate, "burst": burst} for host, (rate, burst) in _rate_limits.items()}
+
+
+def _bucket(key):
+    bucket = _buckets.get(key)
+    if bucket is None:
+        rate, burst = _rate_limits.get(key, _rate_limits[DEFAULT_HOST])
+        bucket = _buckets[key] = TokenBucket(rate, burst)
+    return bucket
+
+
+async def acquire(url_or_host):
+    """在向主机发起请求前获取令牌，必要时等待"""
+    key = host_key(url_or_host)
+    with _lock:
+        wait = _bucket(key).reserve()
+    if wait > 0:
+        logging.debug(f"主机 {key} 限速，等待 {wait:.2f} 秒")
+        tracing.event("rate_limit.wait", host=key, seconds=round(wait, 3))
+        await asyncio.sleep(wait)
+
+
+def retry_after(response):
+    """解析响应中的 Retry-After 头，返回秒数或None"""
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(retry, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """计算第 retry 次重试前的等待时间（指数退避 + 抖动）"""
+    ceiling = min(cap, base * (2 ** retry))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+async def backoff(url_or_host, retry, response=None, base=BACKOFF_BASE):
+    """重试前等待
+
+    若响应为 429/503 并带有 Retry-After，则按服务器要求等待，并暂停该主机的
+    其他请求；否则使用带抖动的指数退避。
+
+    Returns:
+        float: 实际等待的秒数
+    """
+    key = host_key(url_or_host)
+    delay = None
+    if response is not None and response.status_code in RETRY_STATUS_CODES:
+        delay = retry_after(response)
+        if delay is None:
+            delay = backoff_delay(retry + 1, base)
+        delay = min(delay, BACKOFF_MAX)
+        with _lock:
+            _bucket(key).block(delay)
+        logging.warning(f"主机 {key} 返回 {response.status_code}，暂停请求 {delay:.1f} 秒")
+    if delay is None:
+        delay = backoff_delay(retry, base)
+        logging.info(f"将在 {delay:.1f} 秒后重试 ({key})")
+    tracing.event("retry.backoff", host=key, retry=retry + 1, seconds=round(delay, 3),
+                  status_code=response.status_code if response is not None else None)
+    await asyncio.sleep(delay)
+    return delay
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+提交调度模块
+决定发件箱中待提交条目的提交顺序：优先级高的标签先提交；同一优先级内按加权公平排队
+在各RSS源之间轮流提交，单个RSS源积压大量条目（如补全旧番）时不会拖延其他RSS源的新剧集；
+同一RSS源内发布时间越新越先提交。
+
+配置示例（config.json 中的 scheduling 字段）:
+    {
+        "tags": {"新番": {"priority": 10, "weight": 2}},
+        "feeds": {"https://mikanani.me/RSS/Bangumi?bangumiId=3310": {"priority": 20}}
+    }
+
+priority 越大越先提交（默认0）；weight 为同一优先级内的份额（默认1），weight 为2的RSS源
+每轮提交两个条目，其他RSS源提交一个。feeds 中的设置覆盖该RSS源所属标签的设置。
+"""
+
+import heapq
+import logging
+from datetime import datetime, timezone
+
+import filters
+
+DEFAULT_PRIORITY = 0
+DEFAULT_WEIGHT = 1.0
+
+_OLDEST = datetime.min.replace(tzinfo=timezone.utc)
+
+_config = {}
+
+
+def configure(config):
+    """应用配置文件中的调度设置"""
+    global _config
+    _config = config if isinstance(config, dict) else {}
+
+
+def export_config():
+    return _config
+
+
+def feed_settings(feed, tag=None):
+    """返回RSS源生效的 (优先级, 权重)：默认值 < 标签的设置 < RSS源的设置"""
+    settings = {"priority": DEFAULT_PRIORITY, "weight": DEFAULT_WEIGHT}
+    if tag:
+        settings.update((_config.get("tags") or {}).get(tag) or {})
+    if feed:
+        settings.update((_config.get("feeds") or {}).get(feed) or {})
+    try:
+        priority = int(settings["priority"])
+        weight = float(settings["weight"])
+    except (TypeError, ValueError):
+        logging.warning(f"RSS源 {feed} 的调度设置无效: {settings}，使用默认值")
+        return DEFAULT_PRIORITY, DEFAULT_WEIGHT
+    return priority, weight if weight > 0 else DEFAULT_WEIGHT
+
+
+def _published(item):
+    return filters.parse_published(item.get("pub")) or _OLDEST
+
+
+def order(items, tags=None):
+    """按优先级和加权公平排队确定提交顺序
+
+    每个RSS源有一个虚拟完成时间，每提交一个条目增加 1/weight，每次从虚拟完成时间
+    最小的RSS源取出其最新的条目；完成时间相同时先提交发布时间更新的条目。
+
+    Args:
+        items: 发件箱记录列表，包含 feed、pub
+        tags: RSS源对应的标签 {rss_url: tag}
+
+    Returns:
+        list: 排序后的发件箱记录
+    """
+    tags = tags or {}
+    classes = {}
+    for seq, item in enumerate(items):
+        feed = item.get("feed")
+        priority, weight = feed_settings(feed, tags.get(feed))
+        queues = classes.setdefault(priority, {})
+        # 发布时间相同时先加入发件箱的在前
+        queues.setdefault(feed, (weight, []))[1].append((_published(item).timestamp(), -seq, item))
+
+    ordered = []
+    for priority in sorted(classes, reverse=True):
+        heap = []
+        for index, (weight, queue) in enumerate(classes[priority].values()):
+            # 同一RSS源内最新的在末尾，pop() 依次取出
+            queue.sort(key=lambda entry: entry[:2])
+            heapq.heappush(heap, (1.0 / weight, -queue[-1][0], index, weight, queue))
+        while heap:
+            finish, _, index, weight, queue = heapq.heappop(heap)
+            ordered.append(queue.pop()[2])
+            if queue:
+                heapq.heappush(heap, (finish + 1.0 / weight, -queue[-1][0], index, weight, queue))
+
+    if len(classes) > 1 or any(len(queues) > 1 for queues in classes.values()):
+        logging.debug(f"提交顺序: {len(ordered)} 个条目，{sum(len(q) for q in classes.values())} 个RSS源，"
+                      f"{len(classes)} 个优先级")
+    return ordered
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+蜜柑页面标题提取模块
+边下载边扫描页面，找到 .bangumi-title 元素后立即停止读取，只解析该片段
+"""
+
+import re
+from collections import namedtuple
+
+BANGUMI_TITLE_CLASS = "bangumi-title"
+CHUNK_SIZE = 8192              # 每次读取的字节数
+MAX_SCAN_BYTES = 512 * 1024    # 最多读取的字节数，超过后放弃查找
+OVERLAP = 1024                 # 跨块查找标签时回看的字节数
+
+START_TAG_RE = re.compile(
+    rb'<(?P<tag>[a-zA-Z][a-zA-Z0-9]*)\b[^>]*(?<![\w-])class\s*=\s*["\'][^"\']*(?<![\w-])bangumi-title(?![\w-])[^>]*>',
+    re.I)
+PAGE_TITLE_RE = re.compile(rb'<title[^>]*>(?P<text>.*?)</title\s*>', re.I | re.S)
+
+ScanResult = namedtuple("ScanResult", ["title", "page_title", "bytes_read", "snippet"])
+
+
+class TitleScanner:
+    """增量扫描HTML字节流，定位番剧标题元素和页面标题"""
+
+    def __init__(self, encoding="utf-8"):
+        self.encoding = encoding
+        self.buffer = bytearray()
+        self.page_title = None
+        self.fragment = None
+        self._start = None
+        self._end_tag = None
+
+    def feed(self, chunk):
+        """追加一块数据，找到完整的标题元素时返回True"""
+        scan_from = max(0, len(self.buffer) - OVERLAP)
+        self.buffer += chunk
+
+        if self.page_title is None:
+            match = PAGE_TITLE_RE.search(self.buffer)
+            if match:
+                self.page_title = match.group("text").decode(self.encoding, errors="replace").strip()
+
+        if self._start is None:
+            match = START_TAG_RE.search(self.buffer, scan_from)
+            if not match:
+                return False
+            self._start = match.start()
+            self._end_tag = re.compile(rb"</" + re.escape(match.group("tag")) + rb"\s*>", re.I)
+            scan_from = match.end()
+
+        end = self._end_tag.search(self.buffer, max(scan_from, self._start))
+        if not end:
+            return False
+        self.fragment = bytes(self.buffer[self._start:end.end()])
+        return True
+
+    def title(self):
+        """解析已定位的片段，返回番剧标题或None"""
+        if self.fragment is None:
+            return None
+        from bs4 import BeautifulSoup  # 只有找到标题片段时才需要
+
+        soup = BeautifulSoup(self.fragment.decode(self.encoding, errors="replace"), "html.parser")
+        element = soup.select_one(f".{BANGUMI_TITLE_CLASS}")
+        text = element.text.strip() if element else ""
+        return text or None
+
+
+async def stream_title(response):
+    """从 httpx 流式响应中提取番剧标题，找到后立即停止读取
+
+    Args:
+        response: 通过 client.stream() 获得的响应
+
+    Returns:
+        ScanResult: (番剧标题, 页面标题, 读取的字节数, 页面开头片段)
+    """
+    scanner = TitleScanner(response.charset_encoding or "utf-8")
+    found = False
+    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+        if scanner.feed(chunk):
+            found = True
+            break
+        if len(scanner.buffer) >= MAX_SCAN_BYTES:
+            break
+    title = scanner.title() if found else None
+    snippet = bytes(scanner.buffer[:500]).decode(scanner.encoding, errors="replace")
+    return ScanResult(title, scanner.page_title, len(scanner.buffer), snippet)
+
+
+def extract_title(html):
+    """完整解析页面提取标题（原有方式，用于对比测试）
+
+    Returns:
+        tuple: (番剧标题或None, 页面标题或None)
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    element = soup.select_one(f".{BANGUMI_TITLE_CLASS}")
+    if not element:
+        element = soup.select_one("p.bangumi-title")
+    if not element:
+        element = soup.select_one("h3.bangumi-title")
+    title = element.text.strip() if element and element.text else None
+    page_title = soup.title.text.strip() if soup.title else None
+    return title or None, page_title
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求合并与并发限制模块
+同一个键（如同一个页面URL）同时只发起一次请求，其间的其他调用等待并共享结果；
+并发上限按事件循环分别创建信号量，图形界面中多次 asyncio.run 也能正常使用。
+"""
+
+import asyncio
+import threading
+import weakref
+
+
+class SingleFlight:
+    """合并同一键的并发调用
+
+    共享的调用在独立的任务中执行，某个调用方（包括最先发起的）被取消不会影响其他调用方；
+    所有调用方都被取消时才取消该任务，之后仍在等待的调用方会重新发起调用。
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = weakref.WeakKeyDictionary()  # {事件循环: {键: [任务, 等待的调用方数]}}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    async def do(self, key, func):
+        """调用 func() 获取键对应的结果；同一键的调用正在进行时等待其结果
+
+        Args:
+            key: 请求的键
+            func: 返回协程的函数，只在没有进行中的同键调用时执行
+
+        Returns:
+            func() 的结果（合并的调用共享同一结果或异常）
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.stats["calls"] += 1
+        first = True
+        while True:
+            with self._lock:
+                calls = self._calls.setdefault(loop, {})
+                call = calls.get(key)
+                if call is None or call[0].cancelled():
+                    call = calls[key] = [asyncio.ensure_future(func()), 0]
+                    call[0].add_done_callback(lambda task, call=call: self._finish(calls, key, call))
+                elif first:
+                    self.stats["coalesced"] += 1
+                call[1] += 1
+            first = False
+            task = call[0]
+            try:
+                # wait 不会因本调用方被取消而取消任务，也不会抛出任务的异常
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                with self._lock:
+                    call[1] -= 1
+                    abandoned = call[1] == 0
+                if abandoned:
+                    task.cancel()
+                raise
+            with self._lock:
+                call[1] -= 1
+            if not task.cancelled():
+                return task.result()
+            # 其他调用方都已离开、任务被取消后本调用方才加入，重新发起调用
+
+    def _finish(self, calls, key, call):
+        with self._lock:
+            if calls.get(key) is call:
+                del calls[key]
+        # 所有调用方都已离开时没有人读取异常，避免“未获取”的提示
+        if not call[0].cancelled():
+            call[0].exception()
+
+    def describe(self):
+        return f"{self.name}: {self.stats['calls']} 次调用，合并 {self.stats['coalesced']} 次"
+
+
+class LoopSemaphore:
+    """按事件循环分别创建的信号量，用法: async with limiter(): ..."""
+
+    def __init__(self, value):
+        self.value = value
+        # 信号量引用着所属的事件循环，不能用 WeakKeyDictionary（值引用键时键永远不会被回收），
+        # 改为在取用时清理已关闭的事件循环
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                for closed in [other for other in self._semaphores if other.is_closed()]:
+                    del self._semaphores[closed]
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.value)
+        return semaphore
@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+长时间运行（浸泡）测试
+在本地模拟的蜜柑和PikPak服务上连续运行数千个加速的处理周期，
+定期记录进程内存（RSS）、打开的文件描述符、周期结束后残留的 asyncio 任务、线程数和对象数量，
+增长超过阈值时以非零退出码结束，用于发现长时间运行才会暴露的资源泄漏。
+
+模拟服务运行在单独的进程中，其内存和文件描述符不计入测量结果；
+测试在临时目录中进行，不会修改当前目录下的配置、数据库和种子文件。
+
+用法:
+    python soak.py                              # 默认 2000 个周期
+    python soak.py --cycles 5000 --feeds 20 --csv soak.csv
+    python soak.py --mode cli --max-rss-growth 20 --tracemalloc
+"""
+
+import argparse
+import asyncio
+import gc
+import hashlib
+import http.server
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque, namedtuple
+from email.utils import formatdate
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+ITEMS_PER_FEED = 12          # 每个模拟RSS源保留的最新条目数
+RELEASE_GROUPS = ("喵萌奶茶屋", "LoliHouse")  # 每集的两个版本，用于触发剧集去重
+FOLDER_FILE_LIMIT = 200      # 模拟PikPak每个文件夹保留的文件数
+TASK_LIMIT = 1000            # 模拟PikPak保留的离线任务数
+PIKPAK_PATH = "soak-root"    # 模拟PikPak中的保存路径
+
+RELEASED_AT = 1700000000     # 第0集的发布时间，之后每小时更新一集
+ROTATING_FEED_ID = 9000      # 定期加入、移除的RSS源，用于检查已删除RSS源的状态是否被释放
+
+Sample = namedtuple("Sample", ["cycle", "elapsed", "rss_mb", "fds", "tasks", "threads", "objects"])
+
+
+# ---------------------------------------------------------------- 模拟服务（单独进程）
+
+def torrent_hash(bangumi_id, episode, group):
+    return hashlib.sha1(f"{bangumi_id}-{episode}-{group}".encode("utf-8")).hexdigest()
+
+
+class FakeMikan:
+    """模拟蜜柑：每次请求单番剧RSS时该番剧更新一集"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.episodes = {}   # {bangumiId: 最新集数}
+        self.pages = {}      # {种子hash: bangumiId}
+        self.base = ""
+
+    def release(self, bangumi_id):
+        with self.lock:
+            latest = self.episodes.get(bangumi_id, 0) + 1
+            self.episodes[bangumi_id] = latest
+        return latest
+
+    def item(self, bangumi_id, episode, group):
+        digest = torrent_hash(bangumi_id, episode, group)
+        with self.lock:
+            self.pages[digest] = bangumi_id
+        resolution = "1080p" if group == RELEASE_GROUPS[0] else "720p"
+        title = f"[{group}] 番剧{bangumi_id} - {episode:02d} [{resolution}]"
+        return (f"<item><title>{escape(title)}</title>"
+                f"<link>{self.base}/Home/Episode/{digest}</link>"
+                f"<pubDate>{formatdate(RELEASED_AT + episode * 3600)}</pubDate>"
+                f'<enclosure type="application/x-bittorrent" length="1048576" '
+                f'url="{self.base}/Download/20240101/{digest}.torrent"/></item>')
+
+    def bangumi_feed(self, bangumi_id):
+        latest = self.release(bangumi_id)
+        items = [self.item(bangumi_id, episode, group)
+                 for episode in range(latest, max(0, latest - ITEMS_PER_FEED // 2), -1)
+                 for group in RELEASE_GROUPS]
+        return self.channel(f"Mikan Project - 番剧{bangumi_id}", items)
+
+    def my_bangumi_feed(self):
+        # 聚合RSS：各番剧的最新一集，频道标题无法确定番剧，需要逐集抓取页面
+        with self.lock:
+            latest = dict(self.episodes)
+        items = [self.item(bangumi_id, episode, RELEASE_GROUPS[0])
+                 for bangumi_id, episode in sorted(latest.items())]
+        return self.channel("Mikan Project - 我的番组", items)
+
+    @staticmethod
+    def channel(title, items):
+        return ('<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+                f"<title>{escape(title)}</title><link>https://mikanani.me/</link>"
+                + "".join(items) + "</channel></rss>")
+
+    @staticmethod
+    def page(bangumi_id):
+        return (f"<html><head><title>Mikan Project - 番剧{bangumi_id}</title></head><body>"
+                + "<div class='nav'>导航</div>" * 50
+                + f'<p class="bangumi-title">番剧{bangumi_id}</p>'
+                + "<p>字幕组简介</p>" * 200 + "</body></html>")
+
+    def handle(self, path, query):
+        """返回 (状态码, Content-Type, 内容)"""
+        lowered = path.lower()
+        if lowered == "/rss/bangumi":
+            bangumi_id = int(query.get("bangumiId", ["0"])[0])
+            return 200, "application/xml; charset=utf-8", self.bangumi_feed(bangumi_id)
+        if lowered == "/rss/mybangumi":
+            return 200, "application/xml; charset=utf-8", self.my_bangumi_feed()
+        if lowered.startswith("/home/episode/"):
+            with self.lock:
+                bangumi_id = self.pages.get(path.rsplit("/", 1)[-1])
+            if bangumi_id is None:
+                return 404, "text/plain", "not found"
+            return 200, "text/html; charset=utf-8", self.page(bangumi_id)
+        if lowered.startswith("/home/bangumi/"):
+            return 200, "text/html; charset=utf-8", self.page(path.rsplit("/", 1)[-1])
+        if lowered.startswith("/download/"):
+            return 200, "application/x-bittorrent", b"d8:announce35:udp://tracker.example:6969/announce" + b"e" * 64
+        return 404, "text/plain", "not found"
+
+
+class FakePikPakServer:
+    """模拟PikPak接口：文件夹、文件列表（分页和类型过滤）、离线任务"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files = {PIKPAK_PATH: deque(maxlen=FOLDER_FILE_LIMIT)}  # {文件夹ID: 文件列表}
+        self.tasks = deque(maxlen=TASK_LIMIT)
+        self.next_id = 0
+
+    def new_id(self, prefix):
+        self.next_id += 1
+        return f"{prefix}{self.next_id}"
+
+    @staticmethod
+    def page(items, token, size):
+        start = int(token or 0)
+        end = start + size
+        return items[start:end], (str(end) if end < len(items) else "")
+
+    def handle(self, method, path, query, body):
+        with self.lock:
+            if path == "/drive/v1/files" and method == "GET":
+                parent_id = query.get("parent_id", [""])[0]
+                if parent_id not in self.files:
+                    return 404, {"error": "file_not_found"}
+                kind = query.get("kind", [None])[0]
+                files = [f for f in self.files[parent_id] if not kind or f["kind"] == kind]
+                files, token = self.page(files, query.get("page_token", [""])[0],
+                                         int(query.get("size", ["100"])[0]))
+                return 200, {"files": files, "next_page_token": token}
+            if path == "/drive/v1/folders" and method == "POST":
+                folder = {"id": self.new_id("folder"), "name": body["name"], "kind": "drive#folder"}
+                self.files.setdefault(body.get("parent_id") or PIKPAK_PATH, deque(maxlen=FOLDER_FILE_LIMIT)).append(folder)
+                self.files[folder["id"]] = deque(maxlen=FOLDER_FILE_LIMIT)
+                return 200, {"file": folder}
+            if path == "/drive/v1/tasks" and method == "POST":
+                parent_id = body.get("parent_id") or PIKPAK_PATH
+                if parent_id not in self.files:
+                    return 404, {"error": "file_not_found"}
+                name = body["file_url"].rsplit("/", 1)[-1]
+                task = {"id": self.new_id("task"), "name": name, "phase": "PHASE_TYPE_COMPLETE", "progress": 100}
+                self.tasks.appendleft(task)
+                self.files[parent_id].append({
+                    "id": self.new_id("file"), "name": name, "kind": "drive#file",
+                    "params": {"url": f"magnet:?xt=urn:btih:{name.rsplit('.', 1)[0]}"},
+                })
+                return 200, {"task": task}
+            if path == "/drive/v1/tasks" and method == "GET":
+                tasks, token = self.page(list(self.tasks), query.get("page_token", [""])[0],
+                                         int(query.get("size", ["500"])[0]))
+                return 200, {"tasks": tasks, "next_page_token": token}
+            if path.startswith("/v1/auth/") and method == "POST":
+                return 200, {"access_token": self.new_id("token")}
+        return 404, {"error": "not_found"}
+
+
+def start_server(handle):
+    """在本地随机端口启动HTTP服务，handle(method, path, query, body) 返回 (状态码, Content-Type, 内容)"""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def respond(self, method):
+            parts = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else {}
+            status, content_type, content = handle(method, parts.path, parse_qs(parts.query), body)
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            try:
+                self.wfile.write(content)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # 流式读取标题时客户端会提前关闭连接
+
+        def do_GET(self):
+            self.respond("GET")
+
+        def do_POST(self):
+            self.respond("POST")
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve_fakes(ports):
+    """模拟服务进程的入口，启动后通过队列返回两个服务的端口"""
+    mikan = FakeMikan()
+    pikpak = FakePikPakServer()
+
+    def mikan_handle(method, path, query, body):
+        return mikan.handle(path, query)
+
+    def pikpak_handle(method, path, query, body):
+        status, result = pikpak.handle(method, path, query, body)
+        return status, "application/json", json.dumps(result, ensure_ascii=False)
+
+    mikan_server = start_server(mikan_handle)
+    pikpak_server = start_server(pikpak_handle)
+    mikan.base = f"http://127.0.0.1:{mikan_server.server_address[1]}"
+    ports.put((mikan_server.server_address[1], pikpak_server.server_address[1]))
+    threading.Event().wait()
+
+
+# ---------------------------------------------------------------- 被测进程
+
+class FakePikPak:
+    """PikPakApi 客户端的替身，只实现 core 用到的接口，请求发往模拟PikPak服务"""
+
+    def __init__(self, base_url, username="soak"):
+        self.base_url = base_url
+        self.username = username
+        self.access_token = None
+
+    async def request(self, method, path, params=None, body=None):
+        import httpx
+
+        # 模拟服务只使用HTTP，不加载证书，避免每次请求的开销计入周期耗时
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=10.0, verify=False) as client:
+            response = await client.request(method, path, params=params, json=body)
+        if response.status_code == 404:
+            raise Exception(response.json().get("error", "not_found"))
+        response.raise_for_status()
+        return response.json()
+
+    async def login(self):
+        self.access_token = (await self.request("POST", "/v1/auth/signin"))["access_token"]
+
+    async def refresh_access_token(self):
+        self.access_token = (await self.request("POST", "/v1/auth/token"))["access_token"]
+
+    async def file_list(self, size=100, parent_id=None, next_page_token=None, additional_filters=None):
+        params = {"parent_id": parent_id or "", "size": size, "page_token": next_page_token or ""}
+        kind = ((additional_filters or {}).get("kind") or {}).get("eq")
+        if kind:
+            params["kind"] = kind
+        return await self.request("GET", "/drive/v1/files", params=params)
+
+    async def create_folder(self, name="新建文件夹", parent_id=None):
+        return await self.request("POST", "/drive/v1/folders", body={"name": name, "parent_id": parent_id})
+
+    async def offline_download(self, file_url, parent_id=None, name=None):
+        return await self.request("POST", "/drive/v1/tasks", body={"file_url": file_url, "parent_id": parent_id})
+
+    async def offline_list(self, size=10000, next_page_token=None, phase=None):
+        return await self.request("GET", "/drive/v1/tasks",
+                                  params={"size": size, "page_token": next_page_token or ""})
+
+    def to_dict(self):
+        return {"username": self.username, "access_token": self.access_token}
+
+
+def rss_mb():
+    """当前进程的常驻内存（MB），无法获取时返回None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # 没有 /proc 时只能取峰值：Linux 的单位是 KB，macOS 是字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def open_fds():
+    """当前进程打开的文件描述符数，无法获取时返回None"""
+    for path in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return None
+
+
+def object_counts():
+    return Counter(type(obj).__name__ for obj in gc.get_objects())
+
+
+def soak_config(mikan, feeds, rotating):
+    """模拟环境使用的配置：feeds 个单番剧RSS源加一个聚合RSS源，rotating 为真时加入轮换的RSS源"""
+    ids = list(range(1, feeds + 1)) + ([ROTATING_FEED_ID] if rotating else [])
+    rss = [f"{mikan}/RSS/Bangumi?bangumiId={bangumi_id}" for bangumi_id in ids]
+    rss.append(f"{mikan}/RSS/MyBangumi?token=soak")
+    return {
+        "username": "soak",
+        "password": "soak",
+        "path": PIKPAK_PATH,
+        "rss": rss,
+        "interval": 1,
+        "rate_limits": {"127.0.0.1": {"rate": 10000, "burst": 1000},
+                        "mypikpak.com": {"rate": 10000, "burst": 1000}},
+    }
+
+
+class Soak:
+    """运行处理周期并定期采样"""
+
+    def __init__(self, args, mikan, pikpak):
+        import core
+
+        self.args = args
+        self.core = core
+        self.mikan = mikan
+        self.samples = []
+        self.max_tasks = 0
+        self.durations = []
+        self.failed_cycles = 0
+        self.baseline_objects = None
+        self.snapshot = None          # 基准采样时的内存分配快照（--tracemalloc）
+        self.started = time.monotonic()
+        self.rotating = False
+
+        core.setup_logging(log_file="soak.log", log_level=logging.WARNING)
+        # 日志只写入文件，控制台只输出采样结果
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if type(handler) is logging.StreamHandler:
+                root.removeHandler(handler)
+        self.write_config()
+        core.load_config()
+        core.PIKPAK_CLIENTS[0] = FakePikPak(pikpak)
+
+    def write_config(self):
+        with open(self.core.CONFIG_FILE, "w", encoding="utf-8") as f:
+            json.dump(soak_config(self.mikan, self.args.feeds, self.rotating), f, ensure_ascii=False, indent=4)
+
+    def before_cycle(self, cycle):
+        import tracker
+
+        # 每个周期都轮询任务状态，定期刷新 token 和修改配置文件（加入或移除一个RSS源）
+        tracker.next_poll_at = 0
+        if self.args.refresh_every and cycle % self.args.refresh_every == 0:
+            self.core.last_refresh_time = 0
+        if self.args.reload_every and cycle and cycle % self.args.reload_every == 0:
+            self.rotating = not self.rotating
+            self.write_config()
+            # 修改时间精度不足时同一秒内的修改可能检测不到，强制重新读取
+            self.core.config_mtime = None
+        self.core.check_config_reload()
+
+    async def cycle(self):
+        """执行一个处理周期，返回 (是否成功, 周期结束后残留的任务数)"""
+        started = time.perf_counter()
+        ok = await self.core.process_rss()
+        self.durations.append(time.perf_counter() - started)
+        return ok, len(asyncio.all_tasks()) - 1
+
+    def after_cycle(self, cycle, ok, leftover):
+        import state
+
+        self.core.save_client()
+        state.flush_all()
+        if not ok:
+            self.failed_cycles += 1
+        self.max_tasks = max(self.max_tasks, leftover)
+        done = cycle + 1
+        if done == self.args.warmup or (done > self.args.warmup and done % self.args.sample_every == 0) \
+                or done == self.args.cycles:
+            self.sample(done, leftover)
+
+    def sample(self, cycle, leftover):
+        gc.collect()
+        counts = object_counts()
+        if self.baseline_objects is None:
+            self.baseline_objects = counts
+            if self.args.tracemalloc:
+                import tracemalloc
+                self.snapshot = tracemalloc.take_snapshot()
+        sample = Sample(cycle, time.monotonic() - self.started, rss_mb(), open_fds(), leftover,
+                        threading.active_count(), sum(counts.values()))
+        self.samples.append(sample)
+        print(f"周期 {sample.cycle:>6}  {sample.elapsed:>7.1f}s  "
+              f"RSS {format_value(sample.rss_mb, '.1f')} MB  FD {format_value(sample.fds)}  "
+              f"残留任务 {sample.tasks}  线程 {sample.threads}  对象 {sample.objects}  "
+              f"条目 {len(self.core.mylist)}/{len(self.core.pending_entries)}", flush=True)
+
+    def run_gui_mode(self):
+        # 与图形界面相同：每个周期一个新的事件循环
+        for cycle in range(self.args.cycles):
+            self.before_cycle(cycle)
+            ok, leftover = asyncio.run(self.cycle())
+            self.after_cycle(cycle, ok, leftover)
+
+    async def run_cli_mode(self):
+        # 与命令行相同：所有周期共用一个事件循环
+        for cycle in range(self.args.cycles):
+            self.before_cycle(cycle)
+            ok, leftover = await self.cycle()
+            self.after_cycle(cycle, ok, leftover)
+
+    def run(self):
+        if self.args.mode == "cli":
+            asyncio.run(self.run_cli_mode())
+        else:
+            self.run_gui_mode()
+
+
+def format_value(value, spec=""):
+    return "-" if value is None else format(value, spec)
+
+
+def growth_per_1000(samples, field):
+    """按采样做线性回归，估计每1000个周期的增长量"""
+    points = [(s.cycle, getattr(s, field)) for s in samples if getattr(s, field) is not None]
+    if len(points) < 3:
+        return None
+    cycles, values = zip(*points)
+    return statistics.linear_regression(cycles, values).slope * 1000
+
+
+def check(soak, args):
+    """与第一次采样比较，返回超出阈值的项目"""
+    failures = []
+    if len(soak.samples) < 2:
+        return ["采样次数不足，请增加 --cycles 或减小 --warmup"]
+    first, last = soak.samples[0], soak.samples[-1]
+
+    if first.rss_mb is not None and last.rss_mb is not None:
+        growth = last.rss_mb - first.rss_mb
+        # 分配器在前期会一次性扩大内存池，用后一半采样估计稳定后的趋势；持续泄漏在默认周期数内
+        # 可能还达不到总增长的阈值，但趋势会超出
+        trend = growth_per_1000(soak.samples[len(soak.samples) // 2:], "rss_mb")
+        print(f"内存增长 {growth:+.1f} MB（阈值 {args.max_rss_growth} MB），"
+              f"整体趋势 {format_value(growth_per_1000(soak.samples, 'rss_mb'), '+.2f')} MB/千周期，"
+              f"稳定后趋势 {format_value(trend, '+.2f')} MB/千周期（阈值 {args.max_rss_trend}）")
+        if growth > args.max_rss_growth:
+            failures.append(f"内存增长 {growth:.1f} MB 超过 {args.max_rss_growth} MB")
+        if trend is None:
+            failures.append("采样次数不足以估计内存趋势（至少需要6次采样），请增加 --cycles 或减小 --sample-every")
+        elif trend > args.max_rss_trend:
+            failures.append(f"稳定后内存趋势 {trend:+.1f} MB/千周期 超过 {args.max_rss_trend} MB/千周期")
+
+    if first.fds is not None and last.fds is not None:
+        growth = last.fds - first.fds
+        print(f"文件描述符增长 {growth:+d}（阈值 {args.max_fd_growth}）")
+        if growth > args.max_fd_growth:
+            failures.append(f"文件描述符增长 {growth} 超过 {args.max_fd_growth}")
+
+    print(f"周期结束后残留任务最多 {soak.max_tasks} 个（阈值 {args.max_tasks}）")
+    if soak.max_tasks > args.max_tasks:
+        failures.append(f"周期结束后残留 {soak.max_tasks} 个任务，超过 {args.max_tasks}")
+
+    thread_growth = last.threads - first.threads
+    if thread_growth > 0:
+        failures.append(f"线程数增长 {thread_growth}")
+
+    object_growth = (last.objects - first.objects) * 100.0 / max(1, first.objects)
+    print(f"对象数量增长 {object_growth:+.1f}%（阈值 {args.max_object_growth}%）")
+    if object_growth > args.max_object_growth:
+        failures.append(f"对象数量增长 {object_growth:.1f}% 超过 {args.max_object_growth}%")
+    return failures
+
+
+def report(soak, args):
+    durations = soak.durations
+    if durations:
+        print(f"共 {len(durations)} 个周期，失败 {soak.failed_cycles} 个，"
+              f"平均耗时 {statistics.mean(durations) * 1000:.1f} ms，"
+              f"最长 {max(durations) * 1000:.1f} ms")
+
+    if soak.baseline_objects is not None:
+        gc.collect()
+        growth = object_counts()
+        growth.subtract(soak.baseline_objects)
+        top = [(name, count) for name, count in growth.most_common(args.top) if count > 0]
+        if top:
+            print("增长最多的对象类型:")
+            for name, count in top:
+                print(f"  {name:<32} {count:+d}")
+
+    if soak.snapshot is not None:
+        import tracemalloc
+
+        stats = tracemalloc.take_snapshot().compare_to(soak.snapshot, "lineno")
+        print("增长最多的内存分配位置:")
+        for stat in stats[:args.top]:
+            print(f"  {stat}")
+
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8") as f:
+            f.write(",".join(Sample._fields) + "\n")
+            for sample in soak.samples:
+                f.write(",".join("" if value is None else str(value) for value in sample) + "\n")
+        print(f"采样结果已写入 {args.csv}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="长时间运行测试：检查内存、文件描述符和任务泄漏")
+    parser.add_argument("--cycles", type=int, default=2000, help="处理周期数")
+    parser.add_argument("--feeds", type=int, default=10, help="模拟的单番剧RSS源数量（另有一个聚合RSS源）")
+    parser.add_argument("--mode", choices=("gui", "cli"), default="gui",
+                        help="gui: 每个周期新建事件循环（同图形界面）；cli: 共用一个事件循环（同命令行）")
+    parser.add_argument("--warmup", type=int, default=200, help="预热周期数，之后的第一次采样作为基准")
+    parser.add_argument("--sample-every", type=int, default=100, help="采样间隔（周期数）")
+    parser.add_argument("--refresh-every", type=int, default=50, help="每隔多少个周期刷新一次 token，0 表示不刷新")
+    parser.add_argument("--reload-every", type=int, default=100,
+                        help="每隔多少个周期修改一次配置文件（加入或移除一个RSS源），0 表示不修改")
+    parser.add_argument("--max-rss-growth", type=float, default=32.0, help="允许的内存增长（MB）")
+    parser.add_argument("--max-rss-trend", type=float, default=20.0,
+                        help="允许的稳定后内存增长趋势（MB/千周期，按后一半采样线性回归）")
+    parser.add_argument("--max-fd-growth", type=int, default=8, help="允许的文件描述符增长")
+    parser.add_argument("--max-tasks", type=int, default=0, help="允许周期结束后残留的任务数")
+    parser.add_argument("--max-object-growth", type=float, default=10.0, help="允许的对象数量增长（%%）")
+    parser.add_argument("--top", type=int, default=10, help="报告中列出的对象类型和分配位置数量")
+    parser.add_argument("--tracemalloc", action="store_true", help="记录内存分配位置（明显变慢）")
+    parser.add_argument("--csv", help="将采样结果写入CSV文件")
+    parser.add_argument("--keep", action="store_true", help="保留临时工作目录（日志、数据库）")
+    args = parser.parse_args()
+    if args.csv:
+        args.csv = os.path.abspath(args.csv)
+
+    # 被测模块在临时目录中导入和运行，状态文件都写在其中
+    workdir = tempfile.mkdtemp(prefix="pikpak-soak-")
+    cwd = os.getcwd()
+    context = multiprocessing.get_context("spawn")
+    ports = context.Queue()
+    server = context.Process(target=serve_fakes, args=(ports,), daemon=True)
+    server.start()
+    failures = ["测试未完成"]
+    try:
+        mikan_port, pikpak_port = ports.get(timeout=30)
+        os.chdir(workdir)
+        print(f"工作目录 {workdir}，模拟蜜柑 127.0.0.1:{mikan_port}，模拟PikPak 127.0.0.1:{pikpak_port}")
+        soak = Soak(args, f"http://127.0.0.1:{mikan_port}", f"http://127.0.0.1:{pikpak_port}")
+        if args.tracemalloc:
+            import tracemalloc
+            tracemalloc.start()
+        try:
+            soak.run()
+        except KeyboardInterrupt:
+            print("已中断，报告已完成的周期")
+        report(soak, args)
+        failures = check(soak, args)
+    finally:
+        os.chdir(cwd)
+        server.terminate()
+        server.join(5)
+        logging.shutdown()
+        if args.keep:
+            print(f"工作目录已保留: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"失败: {failure}")
+    print("通过" if not failures else "未通过")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+状态文件持久化模块
+JSON状态文件（配置、客户端token）只在内容变化时写入，写入时先写临时文件、fsync 后再原子替换，
+程序在写入过程中崩溃也不会留下损坏的文件；频繁保存的状态可以设置去抖间隔合并写入。
+"""
+
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+
+_files = []
+_lock = threading.Lock()
+
+
+def atomic_write(path, text):
+    """原子地写入文本文件：写入同目录下的临时文件并 fsync，再替换目标文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    # 临时文件名唯一，多个进程或线程同时写入同一文件时不会互相覆盖临时文件
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 创建的文件只有所有者可读写，沿用原文件的权限
+        try:
+            os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    # 同步目录项，确保替换本身也已落盘（Windows 不支持打开目录）
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class JsonFile:
+    """记录已写入的内容，内容未变化时不写文件，变化时按去抖间隔写入"""
+
+    def __init__(self, path, debounce=0.0):
+        self.path = path
+        self.debounce = debounce
+        self._saved = None      # 文件中的内容
+        self._pending = None    # 等待写入的内容
+        self._written_at = 0.0
+        with _lock:
+            _files.append(self)
+
+    @staticmethod
+    def _dumps(data):
+        return json.dumps(data, indent=4, ensure_ascii=False)
+
+    @property
+    def dirty(self):
+        return self._pending is not None
+
+    def remember(self, data):
+        """记录从文件中读取的内容，与之相同的保存请求不会写文件"""
+        with _lock:
+            self._saved = self._dumps(data)
+            self._pending = None
+
+    def save(self, data, force=False):
+        """保存内容，内容未变化时忽略，距上次写入不足去抖间隔时推迟到 flush
+
+        Returns:
+            bool: 是否实际写入了文件
+        """
+        text = self._dumps(data)
+        with _lock:
+            if text == self._saved:
+                self._pending = None
+                return False
+            self._pending = text
+            if not force and time.monotonic() - self._written_at < self.debounce:
+                return False
+        return self.flush()
+
+    def flush(self):
+        """写入推迟的内容
+
+        Returns:
+            bool: 是否实际写入了文件
+        """
+        with _lock:
+            text = self._pending
+            if text is None:
+                return False
+            atomic_write(self.path, text)
+            self._saved = text
+            self._pending = None
+            self._written_at = time.monotonic()
+        return True
+
+
+def flush_all():
+    """写入所有推迟的状态，在等待间隙和退出前调用"""
+    with _lock:
+        files = list(_files)
+    for state_file in files:
+        try:
+            state_file.flush()
+        except Exception as e:
+            logging.error(f"保存状态文件 {state_file.path} 失败: {str(e)}")
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+import circuit
+
+
+def open_breaker(monkeypatch, now):
+    breaker = circuit.CircuitBreaker("host:example.org", failure_threshold=3, reset_timeout=600)
+    monkeypatch.setattr(circuit.time, "monotonic", lambda: now[0])
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == circuit.OPEN and breaker.is_open()
+    return breaker
+
+
+def test_failure_after_timeout_reopens_with_longer_timeout(monkeypatch):
+    now = [1000.0]
+    breaker = open_breaker(monkeypatch, now)
+    now[0] += 601
+    assert not breaker.is_open()
+    # 熔断期过后未经 allow() 的调用失败，视为探测失败，重新熔断并延长熔断时间
+    breaker.record_failure()
+    assert breaker.is_open()
+    assert breaker.reset_timeout == 1200
+    now[0] += 601
+    assert breaker.is_open()
+    now[0] += 600
+    assert not breaker.is_open()
+
+
+def test_half_open_allows_a_single_probe(monkeypatch):
+    now = [1000.0]
+    breaker = open_breaker(monkeypatch, now)
+    assert not breaker.allow()
+    now[0] += 601
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open() and breaker.reset_timeout == 1200
+    now[0] += 1201
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == circuit.CLOSED and breaker.allow() and breaker.allow()
+
+
+def test_released_probe_can_be_retried(monkeypatch):
+    now = [1000.0]
+    breaker = open_breaker(monkeypatch, now)
+    now[0] += 601
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.allow()
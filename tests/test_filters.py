@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import filters
+
+
+@pytest.fixture(autouse=True)
+def reset_config():
+    yield
+    filters.configure({})
+
+
+def test_regex_rule_with_inline_flags():
+    # 单独有效的 (?i) 规则在合并后不能出现在中间，不能让合并的正则编译失败
+    filters.configure({"global": {"exclude": ["re:(?i)720p", "HEVC"]}})
+    rules = filters.matcher("https://mikanani.me/RSS/Bangumi?bangumiId=1")
+    assert rules.accepts("[ANi] 某番剧 - 01 [720P]")[0] is False
+    assert rules.accepts("[ANi] 某番剧 - 01 [hevc]")[0] is False
+    assert rules.accepts("[ANi] 某番剧 - 01 [1080P]")[0] is True
+
+
+def test_rules_that_cannot_be_combined_are_matched_one_by_one():
+    filters.configure({"global": {"include": ["re:(?P<group>ANi)", "re:(?P<group>LoliHouse)"]}})
+    rules = filters.matcher("https://mikanani.me/RSS/Bangumi?bangumiId=1")
+    assert rules.accepts("[LoliHouse] 某番剧 - 01")[0] is True
+    assert rules.accepts("[其他字幕组] 某番剧 - 01")[0] is False
+
+
+def test_invalid_regex_rule_is_ignored():
+    filters.configure({"global": {"exclude": ["re:(", "720p"]}})
+    rules = filters.matcher("https://mikanani.me/RSS/Bangumi?bangumiId=1")
+    assert rules.accepts("某番剧 - 01 [1080p]")[0] is True
+    assert rules.accepts("某番剧 - 01 [720p]")[0] is False
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+import history
+
+TORRENT = "magnet:?xt=urn:btih:" + "ab" * 20
+
+
+def write_log(store, *days):
+    key = history.infohash(TORRENT)
+    with open(store.log_path, "ab") as f:
+        for day in days:
+            f.write(history.RECORD.pack(key, day))
+
+
+def main_records(store):
+    with open(store.path, "rb") as f:
+        return list(history.RECORD.iter_unpack(f.read()))
+
+
+def test_compaction_keeps_first_recorded_day(tmp_path):
+    store = history.HistoryStore(str(tmp_path / "history.bin"), window_days=0)
+    # 两个工作进程先后记录了同一个种子
+    write_log(store, 200, 100)
+    store.compact()
+    assert main_records(store) == [(history.infohash(TORRENT), 100)]
+
+    # 主文件中已有的记录比日志中的更早
+    write_log(store, 300)
+    store.close()
+    store.compact()
+    assert main_records(store) == [(history.infohash(TORRENT), 100)]
+    store.close()
+
+
+def test_compaction_expires_by_first_recorded_day(tmp_path):
+    store = history.HistoryStore(str(tmp_path / "history.bin"), window_days=30)
+    today = history.today()
+    # 首次记录已超出保留天数，之后的重复记录不会延长保留时间
+    write_log(store, today - 40, today - 5)
+    store.compact()
+    assert main_records(store) == []
+    assert not store.contains(TORRENT)
+    store.close()
+
+
+def test_records_are_visible_after_reopen(tmp_path):
+    path = str(tmp_path / "history.bin")
+    store = history.HistoryStore(path)
+    store.add(TORRENT)
+    store.close()
+    assert history.HistoryStore(path).contains(TORRENT)
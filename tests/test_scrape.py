@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+import scrape
+
+
+def test_start_tag_matches_whole_class_token():
+    html = b'<div class="bangumi-title-wrap"><p class="bangumi-info bangumi-title">X</p></div>'
+    match = scrape.START_TAG_RE.search(html)
+    assert match.group(0) == b'<p class="bangumi-info bangumi-title">'
+
+
+def test_start_tag_ignores_similar_attributes():
+    assert scrape.START_TAG_RE.search(b'<h3 data-class="bangumi-title">X</h3>') is None
+    assert scrape.START_TAG_RE.search(b'<h3 class="bangumi-title-sub">X</h3>') is None
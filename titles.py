@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+番剧标题解析模块
+优先使用RSS频道信息和 bangumiId 确定番剧标题，每部番剧只查询一次番剧页面，
+仅在无法确定时才逐集抓取剧集页面
+"""
+
+import logging
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import outbox
+
+MIKAN_BANGUMI_PAGE = "https://mikanani.me/Home/Bangumi/{}"
+CHANNEL_PREFIX = "Mikan Project - "
+UNKNOWN_TITLE = "未知番剧"
+
+# 聚合类RSS的频道标题，不能代表某一部番剧
+GENERIC_CHANNEL_TITLES = {"我的番组", "最新更新", "Mikan Project"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bangumi_titles (
+    bangumi_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+outbox.register_schema(SCHEMA)
+
+_titles = {}  # 内存缓存 {bangumi_id: title}
+_lock = threading.Lock()
+
+# 各种方式解析出标题的次数，用于观察请求数的变化
+stats = {"channel": 0, "cache": 0, "bangumi_page": 0, "episode": 0}
+
+
+def bangumi_id_from_url(rss_url):
+    """从蜜柑番剧RSS链接中提取 bangumiId，不存在时返回None"""
+    query = parse_qs(urlsplit(rss_url).query)
+    for key, values in query.items():
+        if key.lower() == "bangumiid" and values and values[0]:
+            return values[0]
+    return None
+
+
+def is_bangumi_feed(rss_url):
+    """是否为单部番剧的RSS（/RSS/Bangumi?bangumiId=...）"""
+    return urlsplit(rss_url).path.lower().rstrip("/").endswith("/rss/bangumi") and bangumi_id_from_url(rss_url)
+
+
+def title_from_channel(parsed_feed):
+    """从RSS频道标题中提取番剧标题，聚合类频道返回None"""
+    channel_title = (parsed_feed.get("feed") or {}).get("title") or ""
+    if not channel_title.startswith(CHANNEL_PREFIX):
+        return None
+    title = channel_title[len(CHANNEL_PREFIX):].strip()
+    if not title or title in GENERIC_CHANNEL_TITLES or "搜索结果" in title:
+        return None
+    return title
+
+
+def cached_title(bangumi_id):
+    """查询缓存中的番剧标题（内存优先，其次本地数据库）"""
+    with _lock:
+        title = _titles.get(bangumi_id)
+    if title:
+        return title
+    with outbox.db_lock:
+        row = outbox.connect().execute(
+            "SELECT title FROM bangumi_titles WHERE bangumi_id = ?", (bangumi_id,)).fetchone()
+    if row:
+        with _lock:
+            _titles[bangumi_id] = row["title"]
+        return row["title"]
+    return None
+
+
+def remember(bangumi_id, title):
+    """缓存 bangumiId 对应的番剧标题"""
+    with _lock:
+        if _titles.get(bangumi_id) == title:
+            return
+        _titles[bangumi_id] = title
+    with outbox.db_lock:
+        conn = outbox.connect()
+        conn.execute("INSERT OR REPLACE INTO bangumi_titles (bangumi_id, title, updated_at) VALUES (?, ?, ?)",
+                     (bangumi_id, title, time.time()))
+        conn.commit()
+
+
+async def resolve_feed_title(rss_url, parsed_feed, fetch_title):
+    """确定整个RSS源对应的番剧标题
+
+    依次尝试：单番剧RSS的频道标题 -> bangumiId 缓存 -> 番剧页面（每部番剧一次请求）。
+
+    Args:
+        rss_url: RSS链接
+        parsed_feed: feedparser 解析结果
+        fetch_title: 从蜜柑页面提取标题的协程函数，失败时返回 None 或"未知番剧"；
+            结果会被持久缓存，只应返回页面中番剧标题元素的文本，不应退回网页的 <title>
+
+    Returns:
+        str: 番剧标题；RSS源包含多部番剧或无法确定时返回None，由调用方逐集抓取
+    """
+    bangumi_id = bangumi_id_from_url(rss_url)
+    if not bangumi_id:
+        return None
+
+    if is_bangumi_feed(rss_url):
+        title = title_from_channel(parsed_feed)
+        if title:
+            stats["channel"] += 1
+            remember(bangumi_id, title)
+            return title
+
+    title = cached_title(bangumi_id)
+    if title:
+        stats["cache"] += 1
+        return title
+
+    title = await fetch_title(MIKAN_BANGUMI_PAGE.format(bangumi_id))
+    if title and title != UNKNOWN_TITLE:
+        stats["bangumi_page"] += 1
+        logging.info(f"通过番剧页面获取标题: {title} (bangumiId={bangumi_id})")
+        remember(bangumi_id, title)
+        return title
+    return None
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+处理链路追踪模块
+为每个处理周期和每个条目记录追踪片段（span），包括获取RSS、获取番剧标题、查找文件夹、
+下载种子和提交离线任务，以及其中的重试和等待；片段以JSON Lines格式写入本地文件，
+字段与 OpenTelemetry 的 span 对应（trace_id、span_id、parent_span_id、时间、属性、事件）。
+
+配置示例（config.json 中的 tracing 字段）:
+    {"enabled": true, "file": "trace.jsonl"}
+
+离线分析: python tracing.py trace.jsonl，按片段名称统计次数、耗时分位数和等待时间。
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_OPTIONS = {
+    "enabled": False,
+    "file": "trace.jsonl",
+}
+MAX_FILE_BYTES = 50 * 1024 * 1024  # 追踪文件超过该大小时轮转为 .1
+
+_options = dict(DEFAULT_OPTIONS)
+_current = contextvars.ContextVar("trace_span", default=None)
+_lock = threading.Lock()
+_file = None
+
+enabled = False
+
+
+class Span:
+    """一个追踪片段，结束时写入追踪文件"""
+
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "attributes", "events", "status",
+                 "start_ns", "_started")
+
+    def __init__(self, name, parent, attributes):
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent else None
+        self.name = name
+        self.attributes = attributes
+        self.events = []
+        self.status = {"code": "OK"}
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter()
+
+    def to_dict(self):
+        duration = time.perf_counter() - self._started
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.start_ns + int(duration * 1e9),
+            "duration_ms": round(duration * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+def configure(options):
+    """应用配置文件中的追踪设置，缺省项使用默认值"""
+    global _options, enabled
+    merged = dict(DEFAULT_OPTIONS)
+    merged.update(options or {})
+    with _lock:
+        if merged["file"] != _options["file"] or not merged["enabled"]:
+            _close()
+        _options = merged
+        enabled = bool(merged["enabled"])
+    if enabled:
+        logging.info(f"已开启处理链路追踪，输出到 {merged['file']}")
+
+
+def export_options():
+    return dict(_options)
+
+
+def _close():
+    global _file
+    if _file is not None:
+        _file.close()
+        _file = None
+
+
+def _write(record):
+    global _file
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    with _lock:
+        if not enabled:
+            return
+        try:
+            path = _options["file"]
+            if _file is None:
+                _file = open(path, "a", encoding="utf-8")
+            if _file.tell() > MAX_FILE_BYTES:
+                _close()
+                os.replace(path, path + ".1")
+                _file = open(path, "a", encoding="utf-8")
+            _file.write(line)
+            _file.flush()
+        except OSError as e:
+            logging.error(f"写入追踪文件失败: {str(e)}")
+
+
+def close():
+    """关闭追踪文件，在程序退出前调用"""
+    with _lock:
+        _close()
+
+
+@contextmanager
+def span(name, **attributes):
+    """记录一个追踪片段，嵌套的片段（包括 asyncio 子任务中的）自动成为其子片段
+
+    未开启追踪时不记录任何内容。片段内抛出的异常记为错误状态并继续向上抛出。
+
+    Yields:
+        Span: 当前片段，未开启追踪时为None
+    """
+    if not enabled:
+        yield None
+        return
+    current = Span(name, _current.get(), attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = {"code": "ERROR", "message": f"{type(e).__name__}: {e}"}
+        raise
+    finally:
+        _current.reset(token)
+        _write(current.to_dict())
+
+
+def traced(name=None, failed=None):
+    """将异步函数的每次调用记录为一个追踪片段
+
+    Args:
+        name: 片段名称，默认使用函数名
+        failed: 判断返回值是否表示失败的函数（用于不抛出异常、以返回值表示失败的函数）
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name or func.__name__) as current:
+                result = await func(*args, **kwargs)
+                if current is not None and failed is not None and failed(result):
+                    current.status = {"code": "ERROR", "message": "返回失败结果"}
+                return result
+        return wrapper
+    return decorator
+
+
+def set_attributes(**attributes):
+    """为当前片段添加属性"""
+    current = _current.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def event(name, **attributes):
+    """在当前片段中记录一个事件，如重试和限速等待"""
+    current = _current.get()
+    if current is not None:
+        current.events.append({"name": name, "time_unix_nano": time.time_ns(), "attributes": attributes})
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(path):
+    """统计追踪文件中各片段的次数、耗时分位数、失败次数和等待时间
+
+    Returns:
+        dict: {片段名称: {"count", "errors", "p50_ms", "p95_ms", "max_ms", "wait_s"}}
+    """
+    durations = {}
+    errors = {}
+    waits = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            name = record.get("name")
+            durations.setdefault(name, []).append(record.get("duration_ms", 0.0))
+            if record.get("status", {}).get("code") == "ERROR":
+                errors[name] = errors.get(name, 0) + 1
+            for item in record.get("events", []):
+                waits[name] = waits.get(name, 0.0) + item.get("attributes", {}).get("seconds", 0.0)
+    summary = {}
+    for name, values in durations.items():
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50_ms": _percentile(values, 0.5),
+            "p95_ms": _percentile(values, 0.95),
+            "max_ms": values[-1],
+            "wait_s": round(waits.get(name, 0.0), 3),
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    trace_file = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_OPTIONS["file"]
+    print(f"{'片段':<20}{'次数':>8}{'失败':>8}{'p50(ms)':>12}{'p95(ms)':>12}{'最大(ms)':>12}{'等待(s)':>10}")
+    for span_name, stats in sorted(summarize(trace_file).items(), key=lambda item: -item[1]["count"]):
+        print(f"{span_name:<20}{stats['count']:>8}{stats['errors']:>8}{stats['p50_ms']:>12.1f}"
+              f"{stats['p95_ms']:>12.1f}{stats['max_ms']:>12.1f}{stats['wait_s']:>10.1f}")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+离线任务跟踪模块
+记录已提交的PikPak离线任务，按账号批量查询任务状态，失败或过期的任务放回发件箱重新提交
+"""
+
+import logging
+import time
+
+import outbox
+import ratelimit
+
+# PikPak 离线任务阶段
+PHASE_PENDING = "PHASE_TYPE_PENDING"
+PHASE_RUNNING = "PHASE_TYPE_RUNNING"
+PHASE_COMPLETE = "PHASE_TYPE_COMPLETE"
+PHASE_ERROR = "PHASE_TYPE_ERROR"
+PHASE_EXPIRED = "EXPIRED"  # 本地状态：长时间未完成或已从任务列表中消失
+ALL_PHASES = [PHASE_PENDING, PHASE_RUNNING, PHASE_COMPLETE, PHASE_ERROR]
+ACTIVE_PHASES = (PHASE_PENDING, PHASE_RUNNING)
+
+MIN_POLL_INTERVAL = 120    # 最短轮询间隔（秒）
+MAX_POLL_INTERVAL = 1800   # 最长轮询间隔（秒）
+TASK_TIMEOUT = 3 * 86400   # 任务超过该时间仍未完成视为过期（秒）
+MISSING_GRACE = 3600       # 提交后多久仍未出现在任务列表中视为过期（秒）
+PAGE_SIZE = 500            # 每次列表请求的任务数
+
+next_poll_at = 0.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    torrent TEXT NOT NULL,
+    account INTEGER NOT NULL DEFAULT 0,
+    phase TEXT NOT NULL DEFAULT 'PHASE_TYPE_PENDING',
+    progress INTEGER NOT NULL DEFAULT 0,
+    message TEXT,
+    submitted_at REAL NOT NULL,
+    last_seen_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_phase ON tasks (phase, account);
+"""
+
+outbox.register_schema(SCHEMA)
+
+
+def track(task_id, torrent, account):
+    """记录一个新提交的离线任务"""
+    global next_poll_at
+    now = time.time()
+    with outbox.db_lock:
+        conn = outbox.connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO tasks (task_id, torrent, account, submitted_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (task_id, torrent, account, now, now))
+        conn.commit()
+    # 有新任务时在最短间隔后安排一次轮询
+    if next_poll_at <= now or next_poll_at > now + MIN_POLL_INTERVAL:
+        next_poll_at = now + MIN_POLL_INTERVAL
+
+
+def active_tasks():
+    """返回仍在进行中的任务 {账号: {任务ID: 任务记录}}"""
+    with outbox.db_lock:
+        rows = outbox.connect().execute(
+            f"SELECT * FROM tasks WHERE phase IN ({','.join('?' * len(ACTIVE_PHASES))})", ACTIVE_PHASES).fetchall()
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row["account"], {})[row["task_id"]] = dict(row)
+    return grouped
+
+
+def poll_interval(active_count):
+    """根据进行中的任务数计算下次轮询间隔：任务越多轮询越频繁"""
+    if active_count <= 0:
+        return MAX_POLL_INTERVAL
+    return max(MIN_POLL_INTERVAL, MAX_POLL_INTERVAL // (1 + active_count))
+
+
+def poll_due():
+    return time.time() >= next_poll_at
+
+
+async def _list_account_tasks(client, wanted):
+    """分页列出账号的离线任务，所有待查任务都找到后提前结束
+
+    Returns:
+        dict: {任务ID: 任务信息}，只包含 wanted 中的任务
+    """
+    found = {}
+    page_token = None
+    while True:
+        await ratelimit.acquire(ratelimit.PIKPAK_HOST)
+        result = await client.offline_list(size=PAGE_SIZE, next_page_token=page_token, phase=ALL_PHASES)
+        for task in result.get("tasks", []):
+            if task.get("id") in wanted:
+                found[task["id"]] = task
+        page_token = result.get("next_page_token")
+        if not page_token or len(found) == len(wanted):
+            return found
+
+
+async def poll(clients):
+    """批量查询进行中的任务状态，每个账号只做一次（分页）列表请求
+
+    失败或过期的任务会放回发件箱重新提交。
+
+    Args:
+        clients: {账号索引: PikPakApi客户端}
+
+    Returns:
+        dict: 各阶段在本次轮询中更新的任务数
+    """
+    global next_poll_at
+    summary = {}
+    grouped = active_tasks()
+    now = time.time()
+    for account, tasks in grouped.items():
+        client = clients.get(account)
+        if client is None:
+            continue
+        try:
+            found = await _list_account_tasks(client, set(tasks))
+        except Exception as e:
+            logging.warning(f"查询账号 {account} 的离线任务状态失败: {str(e)}")
+            continue
+
+        for task_id, record in tasks.items():
+            task = found.get(task_id)
+            if task is not None:
+                phase = task.get("phase", record["phase"])
+                progress = int(task.get("progress") or 0)
+                message = task.get("message")
+                last_seen = now
+                if phase in ACTIVE_PHASES and now - record["submitted_at"] > TASK_TIMEOUT:
+                    phase = PHASE_EXPIRED
+            else:
+                phase, progress, message, last_seen = record["phase"], record["progress"], record["message"], record["last_seen_at"]
+                if now - (last_seen or record["submitted_at"]) > MISSING_GRACE:
+                    phase, message = PHASE_EXPIRED, "任务已不在PikPak任务列表中"
+            if task is None and phase == record["phase"]:
+                continue
+
+            with outbox.db_lock:
+                conn = outbox.connect()
+                conn.execute(
+                    "UPDATE tasks SET phase = ?, progress = ?, message = ?, last_seen_at = ?, updated_at = ? WHERE task_id = ?",
+                    (phase, progress, message, last_seen, now, task_id))
+                conn.commit()
+            if phase == record["phase"]:
+                continue
+            summary[phase] = summary.get(phase, 0) + 1
+
+            if phase == PHASE_COMPLETE:
+                logging.info(f"离线任务已完成: {task.get('file_name') or task_id}")
+            elif phase in (PHASE_ERROR, PHASE_EXPIRED):
+                reason = "离线任务失败" if phase == PHASE_ERROR else "离线任务过期"
+                logging.warning(f"{reason}: {task_id} {message or ''}，重新放回发件箱")
+                outbox.mark_failed(record["torrent"], f"{reason}: {message or task_id}")
+
+    active = sum(len(tasks) for tasks in active_tasks().values())
+    next_poll_at = time.time() + poll_interval(active)
+    if grouped:
+        logging.info(f"离线任务状态更新: {summary or '无变化'}，进行中 {active} 个，"
+                     f"{int(next_poll_at - time.time())} 秒后再次查询")
+    return summary
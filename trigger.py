@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+推送触发模块
+提供可选的本地HTTP接口，收到通知后立即获取指定的RSS源，无需缩短全局检查间隔
+
+    POST /trigger?feed=<RSS链接>    需要令牌（Authorization: Bearer <token> 或 ?token=）
+    GET  /websub?hub.challenge=...  WebSub 订阅验证，hub.topic 为已订阅的RSS源时原样返回 challenge
+    POST /websub?feed=<RSS链接>     WebSub 内容推送，配置了 secret 时校验 X-Hub-Signature
+"""
+
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_OPTIONS = {
+    "enabled": False,
+    "host": "127.0.0.1",
+    "port": 8765,
+    "token": "",    # /trigger 的访问令牌，为空时不校验，只允许在本机地址监听
+    "secret": "",   # WebSub 推送签名密钥，为空时不校验
+}
+MAX_BODY_BYTES = 1024 * 1024  # 请求体上限，WebSub 推送的内容本身不会被使用
+
+_options = dict(DEFAULT_OPTIONS)
+_config = {}
+_server = None
+_thread = None
+_on_trigger = None
+_is_subscribed = None
+_lock = threading.Lock()
+
+
+def configure(options):
+    """应用配置文件中的推送触发设置，监听地址或开关变化时重启服务"""
+    global _options, _config
+    _config = options if isinstance(options, dict) else {}
+    new_options = dict(DEFAULT_OPTIONS)
+    new_options.update({key: value for key, value in _config.items() if key in DEFAULT_OPTIONS})
+    with _lock:
+        restart = _server is not None and any(
+            new_options[key] != _options[key] for key in ("enabled", "host", "port", "token"))
+        _options = new_options
+    if restart:
+        stop()
+        start(_on_trigger, _is_subscribed)
+
+
+def export_options():
+    return _config
+
+
+def is_loopback(host):
+    """监听地址是否只能从本机访问"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def start(on_trigger, is_subscribed):
+    """启动推送触发服务（未启用时不做任何事）
+
+    Args:
+        on_trigger: 收到通知时调用的函数，参数为RSS链接列表，返回已接受的RSS链接列表
+        is_subscribed: 判断RSS链接是否已订阅的函数，用于 WebSub 订阅验证
+    """
+    global _server, _thread, _on_trigger, _is_subscribed
+    with _lock:
+        _on_trigger = on_trigger
+        _is_subscribed = is_subscribed
+        if _server is not None or not _options["enabled"]:
+            return
+        if not _options["token"] and not is_loopback(_options["host"]):
+            # 没有令牌时任何能访问该地址的人都可以触发获取
+            logging.error(f"推送触发服务监听 {_options['host']} 时必须设置 token，服务未启动")
+            return
+        try:
+            server = ThreadingHTTPServer((_options["host"], int(_options["port"])), TriggerHandler)
+        except OSError as e:
+            logging.error(f"推送触发服务启动失败 {_options['host']}:{_options['port']}: {str(e)}")
+            return
+        server.daemon_threads = True
+        _server = server
+        _thread = threading.Thread(target=server.serve_forever, name="trigger", daemon=True)
+        _thread.start()
+    logging.info(f"推送触发服务已启动: http://{_options['host']}:{_options['port']}/trigger")
+
+
+def stop():
+    """停止推送触发服务"""
+    global _server, _thread
+    with _lock:
+        server, _server = _server, None
+        thread, _thread = _thread, None
+    if server is None:
+        return
+    server.shutdown()
+    server.server_close()
+    if thread is not None:
+        thread.join(timeout=5)
+    logging.info("推送触发服务已停止")
+
+
+def _check_token(headers, query):
+    """校验 /trigger 的访问令牌"""
+    token = _options["token"]
+    if not token:
+        return True
+    provided = ""
+    auth = headers.get("Authorization") or ""
+    if auth.lower().startswith("bearer "):
+        provided = auth[7:].strip()
+    elif query.get("token"):
+        provided = query["token"][0]
+    return hmac.compare_digest(provided.encode(), str(token).encode())
+
+
+def _check_signature(headers, body):
+    """校验 WebSub 推送的 X-Hub-Signature（格式为 算法=十六进制摘要）"""
+    secret = _options["secret"]
+    if not secret:
+        return True
+    signature = headers.get("X-Hub-Signature-256") or headers.get("X-Hub-Signature") or ""
+    method, _, digest = signature.partition("=")
+    if method not in ("sha1", "sha256", "sha384", "sha512") or not digest:
+        return False
+    expected = hmac.new(str(secret).encode(), body, getattr(hashlib, method)).hexdigest()
+    return hmac.compare_digest(expected, digest.lower())
+
+
+def _feeds_from_request(query, body, content_type):
+    """从查询参数和请求体（表单或JSON）中读取RSS链接"""
+    feeds = list(query.get("feed", [])) + list(query.get("hub.topic", []))
+    if body and "application/json" in content_type:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = {}
+        if isinstance(data, dict):
+            value = data.get("feeds") or data.get("feed") or []
+            feeds += [value] if isinstance(value, str) else [url for url in value if isinstance(url, str)]
+    elif body and "application/x-www-form-urlencoded" in content_type:
+        feeds += parse_qs(body.decode("utf-8", errors="replace")).get("feed", [])
+    return list(dict.fromkeys(url.strip() for url in feeds if url.strip()))
+
+
+class TriggerHandler(BaseHTTPRequestHandler):
+    """处理触发请求，只负责登记需要立即获取的RSS源，实际获取由主循环完成"""
+
+    server_version = "BangumiPikPakTrigger"
+
+    def log_message(self, format, *args):
+        logging.debug(f"推送触发请求 {self.address_string()}: {format % args}")
+
+    def _reply(self, status, payload=None, text=None):
+        body = text.encode("utf-8") if text is not None else json.dumps(payload or {}, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8" if text is not None else "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            return None
+        return self.rfile.read(length) if length > 0 else b""
+
+    def _trigger(self, feeds):
+        if not feeds:
+            self._reply(400, {"error": "缺少 feed 参数"})
+            return
+        accepted = _on_trigger(feeds) if _on_trigger else []
+        if not accepted:
+            self._reply(404, {"error": "RSS源未订阅", "feeds": feeds})
+            return
+        logging.info(f"收到推送通知，立即获取 {len(accepted)} 个RSS源")
+        self._reply(202, {"accepted": accepted})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path != "/websub":
+            self._reply(404, {"error": "not found"})
+            return
+        # WebSub 订阅/退订验证：原样返回 challenge 表示确认
+        challenge = (query.get("hub.challenge") or [""])[0]
+        mode = (query.get("hub.mode") or [""])[0]
+        topic = (query.get("hub.topic") or [""])[0].strip()
+        if not challenge or not topic or mode not in ("subscribe", "unsubscribe"):
+            self._reply(400, {"error": "缺少 hub.challenge 或 hub.topic"})
+            return
+        # 只确认已订阅RSS源的订阅请求；退订请求总是确认
+        if mode == "subscribe" and not (_is_subscribed and _is_subscribed(topic)):
+            logging.warning(f"拒绝未订阅RSS源的 WebSub 订阅验证: {topic}")
+            self._reply(404, {"error": "RSS源未订阅", "feed": topic})
+            return
+        self._reply(200, text=challenge)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        body = self._read_body()
+        if body is None:
+            self._reply(413, {"error": "请求体过大"})
+            return
+        content_type = self.headers.get("Content-Type") or ""
+
+        if url.path == "/trigger":
+            if not _check_token(self.headers, query):
+                self._reply(401, {"error": "令牌无效"})
+                return
+            self._trigger(_feeds_from_request(query, body, content_type))
+        elif url.path == "/websub":
+            if not _check_signature(self.headers, body):
+                self._reply(403, {"error": "签名无效"})
+                return
+            # 推送内容只作为通知，RSS源仍按正常流程获取和解析
+            self._trigger(list(dict.fromkeys(query.get("feed", []) + query.get("hub.topic", []))))
+        else:
+            self._reply(404, {"error": "not found"})